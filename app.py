@@ -2,51 +2,75 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from flask import Flask
-import pymysql
-pymysql.install_as_MySQLdb()
 import logging
+import time
 from config import Config
-from models import db, Company, Customer, Quotation, QuotationItem, Invoice, InvoiceItem
+import migrations
+from models import db
 from routes import main_bp
+from cli import register_commands
+from services import cache_service, company_service, metrics, sql_profiler
 import os
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _install_mysql_driver(uri: str) -> None:
+    """Serve ``mysql://`` URIs with pymysql — imported only when one is configured."""
+    if uri.startswith('mysql'):
+        import pymysql
+        pymysql.install_as_MySQLdb()
+
+
+def init_db() -> None:
+    """Create missing tables, apply migrations and seed the default company.
+
+    Needs an app context.  Also available as ``flask --app app init-db``.
+    """
+    applied = migrations.init_db(db.engine)
+    if applied:
+        logger.info("Applied migrations: %s", ", ".join(map(str, applied)))
+    if company_service.ensure_default_company():
+        logger.info("Default company created.")
+
+
 def create_app(config_class=Config):
+    started = time.perf_counter()
     app = Flask(__name__)
     app.config.from_object(config_class)
+    _install_mysql_driver(app.config['SQLALCHEMY_DATABASE_URI'] or '')
 
-    # Ensure upload folder exists
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    # Ensure the job folder exists (uploads are parsed from memory)
+    os.makedirs(app.config['JOB_FOLDER'], exist_ok=True)
+    cache_service.configure(app.config['CACHE_FOLDER'])
 
     db.init_app(app)
 
-    # Register Blueprint
+    # Register Blueprint and CLI commands
     app.register_blueprint(main_bp)
+    register_commands(app)
 
     with app.app_context():
-        try:
-            # Create database tables for our data models
-            db.create_all()
-            
-            # Ensure at least one company record exists
-            if not Company.query.first():
-                # Create a placeholder company
-                default_company = Company(
-                    name="SRI VASAVI AGENCIES",
-                    address_line_1="No.54, West Car Street, Villianur, Puducherry-605 110.",
-                    state="Puducherry",
-                    gstin="34AGLPV5711E1ZC",
-                    phone="99436 77409"
-                )
-                db.session.add(default_company)
-                db.session.commit()
-                logger.info("Default company created.")
-        except Exception as e:
-            logger.error(f"Error initializing database: {e}")
-            db.session.rollback()
+        if app.config['PERF_PROFILE']:
+            sql_profiler.install(db.engine)
+        if app.config['METRICS']:
+            metrics.instrument_engine(db.engine)
+        if app.config['INIT_DB_ON_STARTUP']:
+            # Schema pass on every start — production runs `flask init-db`
+            # once per deploy and sets INIT_DB_ON_STARTUP=0 instead.
+            schema_started = time.perf_counter()
+            try:
+                init_db()
+                # `flask init-db` reports this pass instead of repeating it
+                app.extensions['schema_pass_seconds'] = time.perf_counter() - schema_started
+            except Exception as e:
+                logger.error(f"Error initializing database: {e}")
+                db.session.rollback()
 
+    logger.info("App created in %.0f ms (pid %d, schema pass %s).",
+                (time.perf_counter() - started) * 1000, os.getpid(),
+                "on" if app.config['INIT_DB_ON_STARTUP'] else "off")
     return app
 
 app = create_app()
@@ -0,0 +1,299 @@
+"""
+benchmarks.bench_routes
+=======================
+End-to-end route benchmarks on a seeded SQLite database.
+
+Builds the app through :func:`app.create_app` against a SQLite file,
+seeds it through :mod:`services.seed_service` and drives the hot routes through Flask's test
+client.  The seeded database is kept per set of volumes and copied afresh
+for every run, so runs start from identical data:
+
+==================  ==============================================
+dashboard           ``GET /`` (summary cache warm)
+dashboard_cold      ``GET /`` with the summary cache invalidated
+invoices            ``GET /invoices``
+gst_report          ``GET /gst-report`` (latest seeded month)
+gst_export          ``GET /gst-report/export`` (same month, .xlsx)
+api_customers       ``GET /api/customers?q=…`` (rotating queries,
+                    search index warm)
+api_customers_cold  the same with the search index invalidated
+invoice_new         ``POST /invoice/new`` (JSON, existing customer)
+quotation_convert   ``POST /quotation/<id>/to-invoice``
+==================  ==============================================
+
+The ``_cold`` cases invalidate their cache before every request (outside
+the timing and statement count), so they measure the queries the cache
+saves; the warm cases measure what most requests cost.
+
+For each route it reports p50 / p95 / mean latency over ``--repeat``
+timed requests, the SQL statements per request, and the peak Python
+memory allocated by one request (a separate ``tracemalloc`` pass, so the
+timings are not slowed by it).
+
+Results are written to ``--out`` (JSON).  With ``--baseline`` the run is
+compared to an earlier result and regressions — p95 slower than the
+tolerance, or more statements per request — are flagged; ``--check``
+turns them into a non-zero exit code.
+
+Usage
+-----
+::
+
+    python benchmarks/bench_routes.py --customers 10000 --invoices 200000
+    python benchmarks/bench_routes.py --out benchmarks/baseline.json      # record
+    python benchmarks/bench_routes.py --baseline benchmarks/baseline.json --check
+
+Everything (databases, caches, job files) lives in ``--workdir``
+(default ``.bench/`` in the current directory).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_QUERIES = ["abc", "tra", "glo", "33", "ent", "ind", "sri", "99"]
+
+
+# ─── Environment ──────────────────────────────────────────────────────────────
+
+def _prepare_env(workdir: str) -> str:
+    """Point config at *workdir* before anything imports it; return the DB path."""
+    os.makedirs(workdir, exist_ok=True)
+    shutil.rmtree(os.path.join(workdir, "cache"), ignore_errors=True)   # start cold
+    db_path = os.path.join(workdir, "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    for name in ("BACKGROUND_JOBS", "PERF_PROFILE", "METRICS"):
+        os.environ[name] = "0"
+    os.chdir(workdir)                  # Config derives cache / job folders from the cwd
+    sys.path.insert(0, ROOT)
+    return db_path
+
+
+# ─── Seeding ──────────────────────────────────────────────────────────────────
+
+def seed(customers: int, invoices: int, items: int, quotations: int) -> None:
+    """Bulk-insert the synthetic data set (see :mod:`services.seed_service`)."""
+    from services import seed_service
+
+    stats = seed_service.seed(seed_service.SeedPlan(
+        customers=customers, invoices=invoices, items=items, quotations=quotations,
+    ))
+    print(f"Seeded {customers} customers, {invoices} invoices ({stats['items']} items), "
+          f"{quotations} quotations in {stats['seconds']:.1f}s.")
+
+
+# ─── Measuring ────────────────────────────────────────────────────────────────
+
+class _StatementCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+
+def _cases(app) -> list[tuple[str, callable, callable]]:
+    """``(name, fn, reset)`` triples; each fn performs one request and returns
+    the response, *reset* (or ``None``) runs before every request."""
+    from models import Customer, Invoice, Quotation, db
+    from services import dashboard_service, search_service
+
+    with app.app_context():
+        latest  = db.session.execute(db.select(db.func.max(Invoice.date))).scalar() or date.today()
+        pending = [q for (q,) in db.session.execute(
+            db.select(Quotation.id).outerjoin(Invoice, Invoice.quotation_id == Quotation.id)
+            .where(Invoice.id.is_(None)).order_by(Quotation.id)
+        )]
+        buyers  = [c.to_dict() for c in Customer.query.order_by(Customer.id).limit(200)]
+
+    client  = app.test_client()
+    month   = {"month": latest.month, "year": latest.year}
+    counter = {"q": 0, "cust": 0}
+
+    def api_customers():
+        counter["q"] += 1
+        return client.get("/api/customers", query_string={"q": _QUERIES[counter["q"] % len(_QUERIES)]})
+
+    def invoice_new():
+        counter["cust"] += 1
+        return client.post("/invoice/new", json={
+            "date"    : latest.isoformat(),
+            "customer": buyers[counter["cust"] % len(buyers)],
+            "items"   : [{"description": "Bench item", "qty": 2, "rate": 100, "basic": 200,
+                          "gst": 36, "total": 236, "gst_rate": 18}],
+            "totals"  : {"basic": 200, "gst": 36, "grand": 236},
+        })
+
+    def quotation_convert():
+        if not pending:
+            raise RuntimeError("No unconverted quotations left — reseed or raise --quotations.")
+        return client.post(f"/quotation/{pending.pop(0)}/to-invoice")
+
+    cold_dashboard, cold_search = dashboard_service.invalidate, search_service.invalidate
+    return [
+        ("dashboard",          lambda: client.get("/"), None),
+        ("dashboard_cold",     lambda: client.get("/"), cold_dashboard),
+        ("invoices",           lambda: client.get("/invoices"), None),
+        ("gst_report",         lambda: client.get("/gst-report", query_string=month), None),
+        ("gst_export",         lambda: client.get("/gst-report/export", query_string=month), None),
+        ("api_customers",      api_customers, None),
+        ("api_customers_cold", api_customers, cold_search),
+        ("invoice_new",        invoice_new, None),
+        ("quotation_convert",  quotation_convert, None),
+    ]
+
+
+def _percentile(sorted_ms: list[float], pct: float) -> float:
+    k = (len(sorted_ms) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_ms) - 1)
+    return sorted_ms[lo] + (sorted_ms[hi] - sorted_ms[lo]) * (k - lo)
+
+
+def run_case(fn, counter: _StatementCounter, repeat: int, warmup: int, reset=None) -> dict:
+    reset = reset or (lambda: None)
+    for _ in range(warmup):
+        reset()
+        fn().close()
+
+    timings, statements, failures = [], [], 0
+    for _ in range(repeat):
+        reset()
+        before = counter.count
+        started = time.perf_counter()
+        response = fn()
+        response.get_data()                   # drain streamed bodies (exports)
+        timings.append((time.perf_counter() - started) * 1000)
+        statements.append(counter.count - before)
+        failures += response.status_code >= 400
+        response.close()
+
+    reset()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    response = fn()
+    response.get_data()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    response.close()
+
+    timings.sort()
+    return {
+        "p50_ms"    : round(_percentile(timings, 50), 2),
+        "p95_ms"    : round(_percentile(timings, 95), 2),
+        "mean_ms"   : round(statistics.fmean(timings), 2),
+        "statements": max(statements),
+        "peak_kib"  : round(peak / 1024, 1),
+        "failures"  : failures,
+    }
+
+
+# ─── Baseline comparison ──────────────────────────────────────────────────────
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Print the diff against *baseline*; return the names of regressed routes."""
+    if baseline.get("volumes") != result["volumes"]:
+        print(f"note: baseline volumes {baseline.get('volumes')} differ from this run.")
+    regressed = []
+    print(f"\n{'route':<19} {'p95 base':>9} {'p95 now':>9} {'Δ':>7}   {'stmts':>11}")
+    for name, now in result["routes"].items():
+        base = baseline.get("routes", {}).get(name)
+        if base is None:
+            print(f"{name:<19} {'—':>9} {now['p95_ms']:>9.1f}    new")
+            continue
+        delta = now["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        flag  = ""
+        if delta > tolerance or now["statements"] > base["statements"]:
+            flag = "  REGRESSION"
+            regressed.append(name)
+        print(f"{name:<19} {base['p95_ms']:>9.1f} {now['p95_ms']:>9.1f} {delta:>+6.0%}   "
+              f"{base['statements']:>4} → {now['statements']:<4}{flag}")
+    return regressed
+
+
+# ─── Main ─────────────────────────────────────────────────────────────────────
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--invoices", type=int, default=200_000)
+    parser.add_argument("--items", type=int, default=3, help="average line items per invoice")
+    parser.add_argument("--quotations", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=30, help="timed requests per route")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--only", nargs="*", help="route names to run (default: all)")
+    parser.add_argument("--workdir", default=os.path.join(os.getcwd(), ".bench"))
+    parser.add_argument("--out", default=None, help="result JSON (default: <workdir>/result.json)")
+    parser.add_argument("--baseline", default=None, help="earlier result JSON to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="allowed p95 slowdown (0.20 = 20%%)")
+    parser.add_argument("--check", action="store_true", help="exit 1 on any regression")
+    args = parser.parse_args()
+
+    out      = os.path.abspath(args.out or os.path.join(args.workdir, "result.json"))
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+    db_path  = _prepare_env(os.path.abspath(args.workdir))
+    volumes  = {"customers": args.customers, "invoices": args.invoices,
+                "items": args.items, "quotations": args.quotations}
+
+    seeded = os.path.join(args.workdir, "seed-{customers}c-{invoices}i-{items}it-{quotations}q.db"
+                          .format(**volumes))
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    if os.path.exists(seeded):
+        shutil.copyfile(seeded, db_path)      # every run starts from the same data
+
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        if not os.path.exists(seeded):
+            seed(args.customers, args.invoices, args.items, args.quotations)
+            db.session.remove()
+            db.engine.dispose()
+            shutil.copyfile(db_path, seeded)
+        counter = _StatementCounter(db.engine)
+
+    result = {
+        "volumes": volumes,
+        "repeat" : args.repeat,
+        "when"   : datetime.now().isoformat(timespec="seconds"),
+        "python" : platform.python_version(),
+        "machine": platform.machine(),
+        "routes" : {},
+    }
+    print(f"\n{'route':<19} {'p50 ms':>8} {'p95 ms':>8} {'stmts':>6} {'peak KiB':>9}")
+    for name, fn, reset in _cases(app):
+        if args.only and name not in args.only:
+            continue
+        stats = run_case(fn, counter, args.repeat, args.warmup, reset)
+        result["routes"][name] = stats
+        print(f"{name:<19} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+              f"{stats['statements']:>6} {stats['peak_kib']:>9.0f}"
+              + (f"  ({stats['failures']} failed)" if stats["failures"] else ""))
+
+    with open(out, "w") as fh:
+        json.dump(result, fh, indent=2)
+    print(f"\nResult written to {out}")
+
+    if baseline:
+        with open(baseline) as fh:
+            regressed = compare(result, json.load(fh), args.tolerance)
+        if regressed and args.check:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+benchmarks.bench_startup
+========================
+Cold start to first request, with and without the start-up schema pass.
+
+Every run starts a fresh process and times it until the first ``GET /``
+has been answered:
+
+==================  ==========================================================
+process             ``python`` importing :mod:`app` (which creates the app)
+                    and sending ``GET /`` through the test client; the child
+                    also reports the import and first-request times
+gunicorn            ``gunicorn app:app`` on a free port, polled until ``GET /``
+                    returns 200 — once per worker mode (plain / ``--preload``)
+==================  ==========================================================
+
+Each mode runs with ``INIT_DB_ON_STARTUP=1`` (the schema pass in every
+process) and ``=0`` (schema prepared beforehand by ``init-db``), so the
+difference is the per-worker cost that ``flask init-db`` moves out of
+start-up.  The schema pass matters most against a remote database; pass
+``--database-url`` to measure against the real one.
+
+Usage
+-----
+::
+
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --gunicorn --workers 4
+    python benchmarks/bench_startup.py --database-url "mysql+pymysql://…" --runs 3
+
+Everything lives in ``--workdir`` (default ``.bench/`` in the current
+directory); without ``--database-url`` a SQLite file there is used.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+status = app.app.test_client().get("/").status_code
+print(json.dumps({"import_ms": (imported - started) * 1000,
+                  "first_ms": (time.perf_counter() - imported) * 1000, "status": status}))
+"""
+
+
+def _env(database_url: str, init: bool) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL"      : database_url,
+        "INIT_DB_ON_STARTUP": "1" if init else "0",
+        "BACKGROUND_JOBS"   : "0",
+        "PERF_PROFILE"      : "0",
+        "METRICS"           : "0",
+        "PYTHONPATH"        : ROOT + os.pathsep + env.get("PYTHONPATH", ""),
+    })
+    return env
+
+
+# ─── Runs ─────────────────────────────────────────────────────────────────────
+
+def run_process(workdir: str, env: dict) -> dict:
+    """One cold ``python`` start: total wall, import and first-request ms."""
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", _CHILD], cwd=workdir, env=env,
+                         capture_output=True, text=True, check=True)
+    wall = (time.perf_counter() - started) * 1000
+    child = json.loads(out.stdout.strip().splitlines()[-1])
+    if child["status"] >= 400:
+        raise RuntimeError(f"GET / returned {child['status']}:\n{out.stderr[-2000:]}")
+    return {"wall_ms": wall, "import_ms": child["import_ms"], "first_ms": child["first_ms"]}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_gunicorn(workdir: str, env: dict, workers: int, preload: bool,
+                 timeout: float = 60.0) -> dict:
+    """One cold gunicorn start: wall time until ``GET /`` returns 200."""
+    port = _free_port()
+    cmd  = [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"),
+            "-w", str(workers), "-b", f"127.0.0.1:{port}", "--log-level", "warning"]
+    if preload:
+        cmd.append("--preload")
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd + ["app:app"], cwd=workdir, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"gunicorn exited:\n{proc.stderr.read().decode()[-2000:]}")
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError(f"gunicorn did not answer within {timeout:.0f}s")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5) as resp:
+                    if resp.status == 200:
+                        break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        return {"wall_ms": (time.perf_counter() - started) * 1000}
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def _summary(runs: list[dict]) -> dict:
+    return {key: round(statistics.median(r[key] for r in runs), 1) for key in runs[0]}
+
+
+# ─── Main ─────────────────────────────────────────────────────────────────────
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--runs", type=int, default=5, help="cold starts per variant")
+    parser.add_argument("--database-url", default=None,
+                        help="database to start against (default: SQLite in --workdir)")
+    parser.add_argument("--gunicorn", action="store_true", help="also time gunicorn starts")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--workdir", default=os.path.join(os.getcwd(), ".bench"))
+    parser.add_argument("--out", default=None, help="result JSON (default: <workdir>/startup.json)")
+    args = parser.parse_args()
+
+    workdir = os.path.abspath(args.workdir)
+    os.makedirs(workdir, exist_ok=True)
+    shutil.rmtree(os.path.join(workdir, "cache"), ignore_errors=True)
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'startup.db')}"
+
+    # Prepare the schema (and compile bytecode) so every timed run is alike
+    subprocess.run([sys.executable, "-m", "flask", "--app", "app", "init-db"], cwd=workdir,
+                   env=_env(database_url, init=False), check=True, capture_output=True)
+
+    variants = [(f"process init={int(init)}", lambda init=init: run_process(
+        workdir, _env(database_url, init))) for init in (True, False)]
+    if args.gunicorn:
+        variants += [
+            (f"gunicorn{' --preload' if preload else ''} init={int(init)}",
+             lambda init=init, preload=preload: run_gunicorn(
+                 workdir, _env(database_url, init), args.workers, preload))
+            for preload in (False, True) for init in (True, False)
+        ]
+
+    result = {"database": database_url.split("://")[0], "runs": args.runs,
+              "workers": args.workers, "variants": {}}
+    print(f"\n{'variant':<28} {'wall ms':>8} {'import ms':>10} {'first req ms':>13}")
+    for name, run in variants:
+        stats = _summary([run() for _ in range(args.runs)])
+        result["variants"][name] = stats
+        print(f"{name:<28} {stats['wall_ms']:>8.0f} "
+              f"{stats.get('import_ms', float('nan')):>10.0f} "
+              f"{stats.get('first_ms', float('nan')):>13.0f}")
+
+    out = os.path.abspath(args.out or os.path.join(workdir, "startup.json"))
+    with open(out, "w") as fh:
+        json.dump(result, fh, indent=2)
+    print(f"\nResult written to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
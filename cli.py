@@ -0,0 +1,221 @@
+"""
+cli
+===
+Flask CLI commands (``flask --app app <command>``).
+
+Commands
+--------
+init-db            Create tables, apply migrations and seed the default company.
+jobs-worker        Run the background job worker pool (see services.job_service).
+merge-customers    Fold duplicate customers into one per identity key.
+seed-data          Fill an empty database with synthetic data for load testing.
+db upgrade         Apply pending schema migrations (see migrations).
+db status          List applied and pending migrations.
+db check-plans     EXPLAIN the hot queries and verify they use their indexes.
+db rebuild-rollup  Recompute the GST monthly rollup from the invoice table.
+"""
+import logging
+import multiprocessing
+import os
+import socket
+import time
+
+import click
+
+import migrations
+from models import db
+from services import customer_service, job_service, rollup_service, seed_service
+
+logger = logging.getLogger(__name__)
+
+
+def register_commands(app):
+    """Attach all CLI commands to *app*."""
+
+    @app.cli.command("init-db")
+    def init_db():
+        """Create missing tables, apply migrations, seed the default company.
+
+        Run once per deploy when INIT_DB_ON_STARTUP=0.  With the flag on,
+        loading the app has already run the pass, so it is reported rather
+        than repeated.
+        """
+        seconds = app.extensions.get("schema_pass_seconds")
+        if seconds is not None:
+            click.echo(f"Database initialised in {seconds:.2f}s "
+                       "(during app start-up, INIT_DB_ON_STARTUP=1).")
+            return
+        from app import init_db as initialise
+        started = time.perf_counter()
+        initialise()
+        click.echo(f"Database initialised in {time.perf_counter() - started:.2f}s.")
+
+    @app.cli.command("jobs-worker")
+    @click.option("--workers", "-w", type=int, default=None,
+                  help="Worker processes (default: JOB_WORKERS).")
+    @click.option("--once", is_flag=True,
+                  help="Exit once the queue is empty instead of polling forever.")
+    def jobs_worker(workers, once):
+        """Process queued imports / exports until interrupted."""
+        workers = workers or app.config["JOB_WORKERS"]
+        if workers <= 1:
+            _work_loop(app, once)
+            return
+
+        # "spawn" gives every worker its own interpreter and DB engine, so no
+        # pooled connection is ever shared across a fork.
+        ctx   = multiprocessing.get_context("spawn")
+        procs = [ctx.Process(target=_spawned_worker, args=(once,)) for _ in range(workers)]
+        for p in procs:
+            p.start()
+        click.echo(f"Started {workers} job workers.")
+        try:
+            for p in procs:
+                p.join()
+        except KeyboardInterrupt:
+            for p in procs:
+                p.terminate()
+
+    @app.cli.command("merge-customers")
+    @click.option("--dry-run", is_flag=True, help="Report what would be merged, change nothing.")
+    def merge_customers(dry_run):
+        """Merge duplicate customers and re-point their invoices / quotations."""
+        stats = customer_service.merge_duplicates(dry_run=dry_run)
+        if dry_run:
+            db.session.rollback()
+            click.echo(f"Would merge {stats['merged']} duplicate(s) in {stats['groups']} group(s).")
+            return
+        db.session.commit()
+        click.echo(
+            f"Merged {stats['merged']} duplicate(s) in {stats['groups']} group(s); "
+            f"re-pointed {stats['invoices']} invoice(s) and {stats['quotations']} quotation(s)."
+        )
+
+    @app.cli.command("seed-data")
+    @click.option("--customers", type=int, default=1000, show_default=True)
+    @click.option("--invoices", type=int, default=20_000, show_default=True)
+    @click.option("--items", type=int, default=3, show_default=True,
+                  help="Average line items per invoice.")
+    @click.option("--quotations", type=int, default=500, show_default=True)
+    @click.option("--years", type=int, default=3, show_default=True,
+                  help="Financial years covered, ending with the current one.")
+    @click.option("--seed", "seed_value", type=int, default=7, show_default=True,
+                  help="Random seed; the same options give the same data.")
+    @click.option("--reset", is_flag=True,
+                  help="Delete all customers, invoices and quotations first.")
+    @click.option("--yes", is_flag=True, help="Do not ask before --reset.")
+    @click.option("--xlsx", "xlsx_path", type=click.Path(dir_okay=False),
+                  help="Also write an upload .xlsx of new invoices to this path.")
+    @click.option("--csv", "csv_path", type=click.Path(dir_okay=False),
+                  help="Also write the same rows as CSV to this path.")
+    @click.option("--file-invoices", type=int, default=1000, show_default=True,
+                  help="Invoices in the --xlsx / --csv file.")
+    @click.option("--files-only", is_flag=True,
+                  help="Only write the files, from the data already in the database.")
+    def seed_data(customers, invoices, items, quotations, years, seed_value, reset, yes,
+                  xlsx_path, csv_path, file_invoices, files_only):
+        """Bulk-insert synthetic customers, quotations and invoices."""
+        if not files_only:
+            if reset:
+                if not yes:
+                    click.confirm(
+                        "Delete ALL customers, invoices and quotations in "
+                        f"{db.engine.url.render_as_string(hide_password=True)}?", abort=True)
+                seed_service.reset()
+                db.session.commit()
+            plan = seed_service.SeedPlan(
+                customers=customers, invoices=invoices, items=items,
+                quotations=quotations, years=years, seed=seed_value,
+            )
+            try:
+                stats = seed_service.seed(plan)
+            except ValueError as exc:
+                db.session.rollback()
+                raise click.ClickException(f"{exc} (use --reset)")
+            click.echo(
+                f"Seeded {stats['customers']} customers, {stats['invoices']} invoices "
+                f"({stats['items']} items, {stats['gaps']} numbering gaps, FY "
+                f"{', '.join(stats['financial_years']) or '—'}) and {stats['quotations']} "
+                f"quotations ({stats['converted']} invoiced) in {stats['seconds']}s."
+            )
+        if xlsx_path or csv_path:
+            written = seed_service.write_import_files(
+                file_invoices, items, xlsx_path=xlsx_path, csv_path=csv_path)
+            click.echo(
+                f"Wrote {written['rows']} rows ({written['invoices']} invoices, numbers "
+                f"{written['first_number']}–{written['last_number']}) to "
+                f"{' and '.join(filter(None, (xlsx_path, csv_path)))}."
+            )
+        elif files_only:
+            raise click.UsageError("--files-only needs --xlsx and/or --csv.")
+
+    @app.cli.group("db")
+    def db_group():
+        """Schema migrations and index checks."""
+
+    @db_group.command("upgrade")
+    def db_upgrade():
+        """Apply pending schema migrations."""
+        applied = migrations.upgrade(db.engine)
+        click.echo(
+            f"Applied migrations: {', '.join(map(str, applied))}" if applied
+            else "Database is up to date."
+        )
+
+    @db_group.command("status")
+    def db_status():
+        """List applied and pending migrations."""
+        done = migrations.applied_versions(db.engine)
+        for version, description, _ in migrations.MIGRATIONS:
+            mark = "applied" if version in done else "PENDING"
+            click.echo(f"{version:03d}  {mark:8s} {description}")
+
+    @db_group.command("check-plans")
+    def db_check_plans():
+        """Fail unless every hot query's plan uses its index."""
+        failed = 0
+        for check in migrations.check_query_plans(db.engine):
+            click.echo(f"[{'ok' if check.ok else 'FAIL'}] {check.name} → {check.expected_index}")
+            if not check.ok:
+                failed += 1
+                click.echo("    " + check.plan.replace("\n", "\n    "))
+        if failed:
+            raise click.ClickException(f"{failed} query plan(s) do not use their index.")
+
+    @db_group.command("rebuild-rollup")
+    def db_rebuild_rollup():
+        """Recompute the GST monthly rollup from scratch."""
+        rows = rollup_service.rebuild()
+        db.session.commit()
+        click.echo(f"GST rollup rebuilt: {rows} rows.")
+
+
+# Seconds between a worker's stale-job / retention sweeps.
+_HOUSEKEEPING_INTERVAL = 60.0
+
+
+def _work_loop(app, once: bool) -> None:
+    """Claim and run jobs until the queue is empty (*once*) or forever."""
+    name = f"{socket.gethostname()}:{os.getpid()}"
+    poll = app.config["JOB_POLL_INTERVAL"]
+    last_housekeeping = 0.0
+    with app.app_context():
+        logger.info("Job worker %s polling every %.1fs.", name, poll)
+        while True:
+            if time.monotonic() - last_housekeeping >= _HOUSEKEEPING_INTERVAL:
+                job_service.housekeeping(app.config["JOB_TIMEOUT"], app.config["JOB_RETENTION"])
+                last_housekeeping = time.monotonic()
+            job = job_service.claim_next(name)
+            if job is None:
+                if once:
+                    return
+                time.sleep(poll)
+                continue
+            job_service.run(job)
+            db.session.remove()
+
+
+def _spawned_worker(once: bool) -> None:
+    """Entry point of a spawned worker process."""
+    from app import app
+    _work_loop(app, once)
@@ -1,18 +1,15 @@
 import os
-import certifi
 import dotenv
 
 dotenv.load_dotenv()
 
-class Config:
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'you-will-never-guess-secret-key-12345'
-
-    # TiDB / MySQL Connection URI
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
 
-    # SSL Configuration for TiDB Cloud
-    SQLALCHEMY_ENGINE_OPTIONS = {
+def _engine_options(uri: str) -> dict:
+    """Pool and TLS options for TiDB / MySQL; certifi is only imported for them."""
+    if not uri.startswith('mysql'):
+        return {}
+    import certifi
+    return {
         "pool_recycle": 300,
         "pool_pre_ping": True,
         "connect_args": {
@@ -22,8 +19,98 @@ class Config:
         }
     }
 
+
+class Config:
+    SECRET_KEY = os.environ.get('SECRET_KEY') or 'you-will-never-guess-secret-key-12345'
+
+    # TiDB / MySQL Connection URI (a sqlite:/// URI works for local runs)
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # SSL Configuration for TiDB Cloud — only applies to MySQL drivers
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI or '')
+
+    # Create missing tables, apply migrations and seed the default company
+    # whenever the app is created.  Convenient for development; production
+    # sets 0 and runs `flask init-db` once per deploy instead, so workers
+    # start without a schema pass against the database.
+    INIT_DB_ON_STARTUP = os.environ.get('INIT_DB_ON_STARTUP', '1') == '1'
+
     # Groq API Key (replaces Gemini)
     GROQ_API_KEY = os.environ.get('GROQ_API_KEY')
+    # Requests per minute allowed by the Groq plan; batch uploads pace their
+    # calls to stay under it.  EXTRACTION_WORKERS bounds the thread pool.
+    GROQ_RPM = int(os.environ.get('GROQ_RPM', '30'))
+    EXTRACTION_WORKERS = int(os.environ.get('EXTRACTION_WORKERS', '4'))
+
+    # Resilience (services.groq_client): per-attempt timeout, overall
+    # deadline incl. retries, retry count, and the circuit breaker's
+    # consecutive-failure threshold / cool-down.  GROQ_BASE_URL overrides
+    # the API host, e.g. http://127.0.0.1:8099 for devtools/groq_stub.py.
+    GROQ_BASE_URL = os.environ.get('GROQ_BASE_URL') or None
+    GROQ_TIMEOUT = float(os.environ.get('GROQ_TIMEOUT', '20'))
+    GROQ_DEADLINE = float(os.environ.get('GROQ_DEADLINE', '45'))
+    GROQ_MAX_RETRIES = int(os.environ.get('GROQ_MAX_RETRIES', '3'))
+    GROQ_BREAKER_FAILURES = int(os.environ.get('GROQ_BREAKER_FAILURES', '5'))
+    GROQ_BREAKER_RESET = float(os.environ.get('GROQ_BREAKER_RESET', '30'))
+
+    # PDF text sent to the model: reading stops once the budget is filled.
+    # PDFs of PDF_PARALLEL_MIN_PAGES+ pages are parsed on PDF_WORKERS
+    # processes (0 or 1 = always read in-process; default: CPUs, max 4).
+    PDF_TEXT_BUDGET = int(os.environ.get('PDF_TEXT_BUDGET', '5000'))
+    PDF_WORKERS = int(os.environ.get('PDF_WORKERS', str(min(4, os.cpu_count() or 1))))
+    PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', '8'))
+
+    # Photos are downscaled so their long side fits IMAGE_MAX_SIDE pixels
+    # and re-encoded as JPEG before upload to the vision model.
+    IMAGE_MAX_SIDE = int(os.environ.get('IMAGE_MAX_SIDE', '1600'))
+    IMAGE_JPEG_QUALITY = int(os.environ.get('IMAGE_JPEG_QUALITY', '85'))
+
+    # Version stamps that keep per-worker caches (company settings, …) in
+    # step across gunicorn workers — must be shared by all workers on a host.
+    CACHE_FOLDER = os.path.join(os.getcwd(), 'cache')
+    # Seconds the dashboard may be served from cache; writes to invoices,
+    # quotations or customers invalidate it sooner.
+    DASHBOARD_CACHE_TTL = float(os.environ.get('DASHBOARD_CACHE_TTL', '30'))
+
+    # AI extraction results, keyed by file hash + model + prompt version.
+    # Least recently used entries are evicted past the byte budget.
+    EXTRACTION_CACHE = os.environ.get('EXTRACTION_CACHE', '1') == '1'
+    EXTRACTION_CACHE_FOLDER = os.path.join(os.getcwd(), 'cache', 'extraction')
+    EXTRACTION_CACHE_MAX_BYTES = int(os.environ.get('EXTRACTION_CACHE_MAX_BYTES', str(50 * 1024 * 1024)))
+
+    # Rendered invoice / quotation print views, keyed by their ETag.
+    DOCUMENT_CACHE = os.environ.get('DOCUMENT_CACHE', '1') == '1'
+    DOCUMENT_CACHE_FOLDER = os.path.join(os.getcwd(), 'cache', 'documents')
+    DOCUMENT_CACHE_MAX_BYTES = int(os.environ.get('DOCUMENT_CACHE_MAX_BYTES', str(20 * 1024 * 1024)))
+
+    # Opt-in profiling (services.sql_profiler): statement count, DB and wall
+    # time per request / job, a log line for every statement slower than
+    # PERF_SLOW_SQL_MS, and the worst of the last PERF_HISTORY requests at
+    # /debug/perf — which also needs PERF_TOKEN.
+    PERF_PROFILE = os.environ.get('PERF_PROFILE', '0') == '1'
+    PERF_SLOW_SQL_MS = float(os.environ.get('PERF_SLOW_SQL_MS', '100'))
+    PERF_HISTORY = int(os.environ.get('PERF_HISTORY', '200'))
+    PERF_TOKEN = os.environ.get('PERF_TOKEN') or None
+
+    # Prometheus metrics at /metrics (services.metrics).  Every worker writes
+    # its samples to METRICS_DIR, which must be shared by all workers on the
+    # host and emptied when the server starts (gunicorn.conf.py does both).
+    METRICS = os.environ.get('METRICS', '0') == '1'
+    METRICS_DIR = os.environ.get('METRICS_DIR') or os.path.join(os.getcwd(), 'cache', 'metrics')
+
+    # Background jobs — when enabled, Excel imports and GST exports are
+    # queued and run by `flask jobs-worker` instead of inside the request.
+    BACKGROUND_JOBS = os.environ.get('BACKGROUND_JOBS', '0') == '1'
+    JOB_FOLDER = os.path.join(os.getcwd(), 'jobs')   # job inputs + results
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', '1.0'))
+    # Seconds a job may stay "running" before the workers mark it failed
+    # (its worker died), and seconds a finished job and its result file are
+    # kept before being deleted.
+    JOB_TIMEOUT = int(os.environ.get('JOB_TIMEOUT', '3600'))
+    JOB_RETENTION = int(os.environ.get('JOB_RETENTION', str(24 * 3600)))
 
-    # Upload folder
-    UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
+    # Excel exports are written to a spooled temp file: kept in memory up to
+    # this many bytes, then rolled over to disk.
+    EXPORT_SPOOL_MAX_SIZE = int(os.environ.get('EXPORT_SPOOL_MAX_SIZE', str(8 * 1024 * 1024)))
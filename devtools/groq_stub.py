@@ -0,0 +1,146 @@
+"""
+devtools.groq_stub
+==================
+A local stand-in for the Groq chat-completions API, for exercising
+``services.groq_client`` (timeouts, retries, circuit breaker) offline.
+
+Run it, then point the app at it::
+
+    python devtools/groq_stub.py --port 8099 --latency 0.2 --error-rate 0.3
+    GROQ_BASE_URL=http://127.0.0.1:8099 GROQ_API_KEY=stub flask --app app run
+
+Every ``POST /openai/v1/chat/completions`` sleeps ``--latency`` seconds,
+then fails with ``--error-status`` (sending ``Retry-After`` for 429) with
+probability ``--error-rate``, otherwise answers with a canned extraction.
+
+The behaviour can be changed while the stub runs, e.g. to simulate an
+outage and recovery::
+
+    curl -X POST 'http://127.0.0.1:8099/_stub?error_rate=1&error_status=503'
+    curl -X POST 'http://127.0.0.1:8099/_stub?error_rate=0&latency=0'
+
+``GET /_stub`` returns the current settings and request counters.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SAMPLE_EXTRACTION = {
+    "customer": {
+        "name"   : "Stub Traders",
+        "address": "1 Test Street, Puducherry",
+        "gstin"  : "34AAAAA0000A1Z5",
+        "state"  : "Puducherry",
+    },
+    "items": [
+        {"description": "Sample item", "qty": 2, "rate": 150.0, "unit": "Nos", "gst_rate": 18},
+    ],
+    "date"           : "2025-04-01",
+    "place_of_supply": "Puducherry",
+}
+
+_settings = {"latency": 0.0, "error_rate": 0.0, "error_status": 503, "retry_after": 1}
+_counters = {"requests": 0, "errors": 0}
+_lock     = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if urlparse(self.path).path == "/_stub":
+            with _lock:
+                return self._json(200, {"settings": _settings, "counters": _counters})
+        self._json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path == "/_stub":
+            return self._configure(parse_qs(url.query))
+        if url.path != "/openai/v1/chat/completions":
+            return self._json(404, {"error": {"message": "not found"}})
+
+        length = int(self.headers.get("Content-Length") or 0)
+        body   = json.loads(self.rfile.read(length) or b"{}")
+        with _lock:
+            settings = dict(_settings)
+            _counters["requests"] += 1
+
+        time.sleep(settings["latency"])
+        if random.random() < settings["error_rate"]:
+            with _lock:
+                _counters["errors"] += 1
+            status  = settings["error_status"]
+            headers = {"Retry-After": str(settings["retry_after"])} if status == 429 else {}
+            return self._json(status, {"error": {"message": f"stub error {status}"}}, headers)
+
+        self._json(200, {
+            "id"     : f"chatcmpl-{uuid.uuid4().hex}",
+            "object" : "chat.completion",
+            "created": int(time.time()),
+            "model"  : body.get("model", "stub"),
+            "choices": [{
+                "index"        : 0,
+                "message"      : {"role": "assistant", "content": json.dumps(SAMPLE_EXTRACTION)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    def _configure(self, query: dict) -> None:
+        with _lock:
+            for key, values in query.items():
+                if key in _settings:
+                    _settings[key] = type(_settings[key])(float(values[-1]))
+            self._json(200, {"settings": _settings})
+
+    def _json(self, status: int, payload: dict, headers: dict | None = None) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass                          # client gave up (timed out)
+
+    def log_message(self, fmt, *args):
+        print(f"[groq-stub] {self.address_string()} {fmt % args}")
+
+
+def serve(port: int = 8099, **settings) -> ThreadingHTTPServer:
+    """Start the stub in a background thread and return the server (for scripts)."""
+    _settings.update({k: v for k, v in settings.items() if v is not None})
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before answering")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="0..1 share of failed calls")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of failures")
+    args = parser.parse_args()
+
+    _settings.update(latency=args.latency, error_rate=args.error_rate,
+                     error_status=args.error_status)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    print(f"Groq stub on http://127.0.0.1:{args.port}  settings={_settings}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
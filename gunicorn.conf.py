@@ -0,0 +1,43 @@
+"""
+gunicorn.conf.py
+================
+Server hooks, loaded automatically by ``gunicorn app:app`` from the
+working directory (bind address and worker count stay on the command line).
+
+- ``on_starting`` empties ``METRICS_DIR`` so Prometheus counters start
+  with the server rather than adding up across deploys;
+- ``post_fork`` gives each worker a fresh connection pool when the app was
+  loaded once in the master with ``--preload``;
+- ``child_exit`` drops the live gauges of a worker that has exited.
+
+Fast restarts: run ``flask --app app init-db`` once per deploy, set
+``INIT_DB_ON_STARTUP=0`` and start ``gunicorn --preload app:app`` — the
+app is imported once and forked, so workers start without importing or
+touching the schema at all.
+"""
+import os
+import shutil
+
+from config import Config
+
+
+def on_starting(server):
+    if Config.METRICS:
+        shutil.rmtree(Config.METRICS_DIR, ignore_errors=True)
+        os.makedirs(Config.METRICS_DIR, exist_ok=True)
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        # Connections the master opened (INIT_DB_ON_STARTUP, …) must not be
+        # shared with the worker; close=False leaves them to the master.
+        from app import app
+        from models import db
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    from services import metrics
+    metrics.mark_process_dead(worker.pid)
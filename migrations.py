@@ -0,0 +1,278 @@
+"""
+migrations
+==========
+Versioned, forward-only schema migrations for live databases.
+
+``db.create_all()`` creates missing tables (with every index declared in
+``models.py``) but never alters a table that already exists.  Each entry
+in :data:`MIGRATIONS` brings an existing database up to the current
+models; applied versions are recorded in the ``schema_migrations`` table
+so every step runs exactly once per database.
+
+Steps must be idempotent (``checkfirst=True`` etc.) because on a fresh
+database ``create_all()`` has already built what they add.
+
+Usage
+-----
+::
+
+    flask --app app init-db          # create tables, migrate, seed the company
+    flask --app app db upgrade       # apply pending migrations
+    flask --app app db status        # list applied / pending versions
+    flask --app app db check-plans   # prove hot queries use their indexes
+
+:func:`check_query_plans` runs ``EXPLAIN`` for the numbering, GST report
+and list queries and reports which index each one uses.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Callable
+
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table, bindparam, inspect, select,
+    text, update,
+)
+from sqlalchemy.engine import Connection, Engine
+
+from models import (
+    Customer, GstMonthlyRollup, Invoice, InvoiceItem, Quotation, QuotationItem, db,
+)
+from services import rollup_service
+from utils.helpers import customer_identity_key, customer_name_key
+
+logger = logging.getLogger(__name__)
+
+_meta = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations", _meta,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+# ─── Helpers ──────────────────────────────────────────────────────────────────
+
+def _create_indexes(conn: Connection, model, *names: str) -> None:
+    """Create the named indexes declared on *model* if they are missing."""
+    table    = model.__table__
+    existing = {ix["name"] for ix in inspect(conn).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name in names and index.name not in existing:
+            logger.info("Creating index %s on %s.", index.name, table.name)
+            index.create(conn)
+
+
+def _add_columns(conn: Connection, model, *names: str) -> None:
+    """``ALTER TABLE ... ADD COLUMN`` for declared columns that are missing."""
+    table    = model.__table__
+    existing = {col["name"] for col in inspect(conn).get_columns(table.name)}
+    for name in names:
+        if name not in existing:
+            col_type = table.c[name].type.compile(dialect=conn.dialect)
+            logger.info("Adding column %s.%s.", table.name, name)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {col_type}"))
+
+
+# ─── Migration steps ──────────────────────────────────────────────────────────
+
+def _m001_index_pack(conn: Connection) -> None:
+    _create_indexes(conn, Invoice,
+                    "ix_invoice_fy_number", "ix_invoice_date_number",
+                    "ix_invoice_customer_id")
+    _create_indexes(conn, InvoiceItem, "ix_invoice_item_invoice_id")
+    _create_indexes(conn, Quotation, "ix_quotation_date", "ix_quotation_customer_id")
+    _create_indexes(conn, QuotationItem, "ix_quotation_item_quotation_id")
+    _create_indexes(conn, Customer, "ix_customer_name", "ix_customer_gstin")
+
+
+def _m002_gst_rollup(conn: Connection) -> None:
+    GstMonthlyRollup.__table__.create(conn, checkfirst=True)
+    rollup_service.rebuild(conn)
+
+
+def _backfill_customer_keys(conn: Connection) -> None:
+    """Stamp every customer with its current name / identity keys.
+
+    The oldest customer of each identity takes the unique key; later
+    duplicates keep NULL until `flask merge-customers` folds them in.
+    Only rows whose keys change are written, and their identity keys are
+    cleared first so re-stamping can't trip the unique index.
+    """
+    table = Customer.__table__
+    taken, rows = set(), []
+    for row in conn.execute(
+        select(table.c.id, table.c.name, table.c.gstin, table.c.name_key, table.c.identity_key)
+        .order_by(table.c.id)
+    ):
+        identity = customer_identity_key(row.name, row.gstin or "")
+        name_key = customer_name_key(row.name)
+        target   = None if identity in taken else identity
+        taken.add(identity)
+        if (row.name_key, row.identity_key) != (name_key, target):
+            rows.append({"_id": row.id, "name_key": name_key, "identity_key": target})
+    if rows:
+        where = table.c.id == bindparam("_id")
+        conn.execute(update(table).where(where).values(identity_key=None), rows)
+        conn.execute(
+            update(table).where(where)
+            .values(name_key=bindparam("name_key"), identity_key=bindparam("identity_key")),
+            rows,
+        )
+
+
+def _m003_customer_identity(conn: Connection) -> None:
+    _add_columns(conn, Customer, "name_key", "identity_key")
+    _backfill_customer_keys(conn)
+    _create_indexes(conn, Customer, "uq_customer_identity_key")
+
+
+def _m004_document_updated_at(conn: Connection) -> None:
+    now = datetime.utcnow()
+    for model in (Invoice, Quotation):
+        _add_columns(conn, model, "updated_at")
+        table = model.__table__
+        conn.execute(update(table).where(table.c.updated_at.is_(None)).values(updated_at=now))
+
+
+def _m005_unicode_customer_keys(conn: Connection) -> None:
+    # Keys built before names were matched script-aware: every name without
+    # ASCII letters / digits keyed to '' and all of them collided on '|'.
+    _backfill_customer_keys(conn)
+
+
+def _m006_rollup_item_rates(conn: Connection) -> None:
+    rollup_service.rebuild(conn)
+
+
+def _m007_updated_at_microseconds(conn: Connection) -> None:
+    # Step 4 added updated_at as DATETIME, which MySQL / TiDB keep to the
+    # second; SQLite already stores microseconds.
+    if conn.dialect.name not in ("mysql", "mariadb"):
+        return
+    for model in (Invoice, Quotation):
+        table    = model.__table__
+        col_type = table.c.updated_at.type.compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {table.name} MODIFY COLUMN updated_at {col_type}"))
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "Index pack for numbering, GST report, lists and customer lookups",
+     _m001_index_pack),
+    (2, "GST monthly rollup table, built from existing invoices",
+     _m002_gst_rollup),
+    (3, "Customer name / identity keys with a unique identity index",
+     _m003_customer_identity),
+    (4, "Invoice / quotation updated_at for print-view cache validation",
+     _m004_document_updated_at),
+    (5, "Re-key customers with Unicode-aware name keys",
+     _m005_unicode_customer_keys),
+    (6, "Rebuild the GST rollup per line-item GST rate",
+     _m006_rollup_item_rates),
+    (7, "Invoice / quotation updated_at with microseconds",
+     _m007_updated_at_microseconds),
+]
+
+
+# ─── Runner ───────────────────────────────────────────────────────────────────
+
+def applied_versions(engine: Engine) -> set[int]:
+    """Return the set of migration versions recorded on *engine*."""
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def upgrade(engine: Engine) -> list[int]:
+    """Apply every pending migration, each in its own transaction.
+
+    Returns:
+        The versions applied by this call (empty when already up to date).
+    """
+    done    = applied_versions(engine)
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, description=description,
+                applied_at=datetime.utcnow(),
+            ))
+        logger.info("Applied migration %03d: %s", version, description)
+        applied.append(version)
+    return applied
+
+
+def init_db(engine: Engine) -> list[int]:
+    """Create missing tables, then apply pending migrations.
+
+    Returns:
+        The migration versions applied by this call.
+    """
+    db.metadata.create_all(engine)
+    return upgrade(engine)
+
+
+# ─── Query-plan check ─────────────────────────────────────────────────────────
+
+@dataclass
+class PlanCheck:
+    name: str
+    expected_index: str
+    plan: str
+
+    @property
+    def ok(self) -> bool:
+        return self.expected_index in self.plan
+
+
+def _hot_queries() -> list[tuple[str, str, object]]:
+    """``(name, expected_index, statement)`` for the queries the indexes serve."""
+    fy_from, fy_to = date(2025, 4, 1), date(2025, 4, 30)
+    return [
+        ("invoice numbering", "ix_invoice_fy_number",
+         select(Invoice.invoice_number_int)
+         .where(Invoice.financial_year == "25-26")
+         .order_by(Invoice.invoice_number_int.desc()).limit(1)),
+        ("duplicate guard / import upsert", "ix_invoice_fy_number",
+         select(Invoice.id)
+         .where(Invoice.financial_year == "25-26", Invoice.invoice_number_int == 7)),
+        ("GST report month scan", "ix_invoice_date_number",
+         select(Invoice.id, Invoice.invoice_number_int)
+         .where(Invoice.date >= fy_from, Invoice.date <= fy_to)
+         .order_by(Invoice.invoice_number_int)),
+        ("invoice list (newest first)", "ix_invoice_date_number",
+         select(Invoice.id)
+         .order_by(Invoice.date.desc(), Invoice.invoice_number_int.desc()).limit(50)),
+        ("quotation list (newest first)", "ix_quotation_date",
+         select(Quotation.id).order_by(Quotation.date.desc()).limit(10)),
+        ("invoice items", "ix_invoice_item_invoice_id",
+         select(InvoiceItem.id).where(InvoiceItem.invoice_id == 1)),
+        ("customer by name", "ix_customer_name",
+         select(Customer.id).where(Customer.name == "ABC Pvt Ltd")),
+        ("customer by GSTIN", "ix_customer_gstin",
+         select(Customer.id).where(Customer.gstin == "33ABCDE1234F1Z5")),
+    ]
+
+
+def check_query_plans(engine: Engine) -> list[PlanCheck]:
+    """``EXPLAIN`` each hot query and report whether it uses its index.
+
+    Uses ``EXPLAIN QUERY PLAN`` on SQLite and ``EXPLAIN`` on MySQL / TiDB;
+    the plan text is searched for the expected index name.
+    """
+    prefix  = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    results = []
+    with engine.connect() as conn:
+        for name, index, stmt in _hot_queries():
+            sql  = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+            rows = conn.execute(text(prefix + sql)).fetchall()
+            plan = "\n".join(" | ".join(str(v) for v in row) for row in rows)
+            results.append(PlanCheck(name, index, plan))
+    return results
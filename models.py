@@ -1,8 +1,16 @@
+import json
+
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy.dialects import mysql
 
 db = SQLAlchemy()
 
+# DATETIME with microseconds on MySQL / TiDB, whose plain DATETIME keeps
+# whole seconds — two saves in the same second must still differ.
+# (SQLite stores microseconds anyway.)
+PreciseDateTime = db.DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql", "mariadb")
+
 
 class Company(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -23,12 +31,23 @@ class Company(db.Model):
 
 
 class Customer(db.Model):
+    __table_args__ = (
+        db.Index('ix_customer_name', 'name'),
+        db.Index('ix_customer_gstin', 'gstin'),
+        # One row per identity; NULL only on not-yet-merged legacy duplicates
+        db.Index('uq_customer_identity_key', 'identity_key', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     address = db.Column(db.String(255), nullable=True)
     gstin = db.Column(db.String(20), nullable=True)
     state = db.Column(db.String(50), nullable=True)
 
+    # Normalised matching keys (utils.helpers.customer_name_key / _identity_key),
+    # kept in step by services.customer_service
+    name_key = db.Column(db.String(100), nullable=True)
+    identity_key = db.Column(db.String(130), nullable=True)
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -40,6 +59,10 @@ class Customer(db.Model):
 
 
 class Quotation(db.Model):
+    __table_args__ = (
+        db.Index('ix_quotation_date', 'date'),
+        db.Index('ix_quotation_customer_id', 'customer_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     quotation_number = db.Column(db.String(20), unique=True, nullable=False)
     date = db.Column(db.Date, default=datetime.utcnow, nullable=False)
@@ -56,12 +79,18 @@ class Quotation(db.Model):
     total_igst = db.Column(db.Float, default=0.0)
     percentage_igst = db.Column(db.Float, default=18.0)
 
+    # Moves on every change; validates the cached print view (services.document_cache)
+    updated_at = db.Column(PreciseDateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
     items = db.relationship(
         'QuotationItem', backref='quotation', lazy=True, cascade='all, delete-orphan'
     )
 
 
 class QuotationItem(db.Model):
+    __table_args__ = (
+        db.Index('ix_quotation_item_quotation_id', 'quotation_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     quotation_id = db.Column(db.Integer, db.ForeignKey('quotation.id'), nullable=False)
     description = db.Column(db.String(255), nullable=False)
@@ -76,6 +105,13 @@ class QuotationItem(db.Model):
 
 class Invoice(db.Model):
     __tablename__ = 'invoice'
+    __table_args__ = (
+        # Numbering, duplicate guard and import upsert: WHERE fy = ? [AND int = ?]
+        db.Index('ix_invoice_fy_number', 'financial_year', 'invoice_number_int'),
+        # GST report range scan and the newest-first invoice list
+        db.Index('ix_invoice_date_number', 'date', 'invoice_number_int'),
+        db.Index('ix_invoice_customer_id', 'customer_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
 
     # Invoice number as string (e.g. "24-25/001") and integer for ordering/gap detection
@@ -109,13 +145,54 @@ class Invoice(db.Model):
     percentage_sgst = db.Column(db.Float, default=9.0)
     percentage_igst = db.Column(db.Float, default=0.0)
 
+    # Moves on every change — including item-only edits, which set it
+    # explicitly; validates the cached print view (services.document_cache)
+    updated_at = db.Column(PreciseDateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
     items = db.relationship(
         'InvoiceItem', backref='invoice', lazy=True, cascade='all, delete-orphan'
     )
 
 
+class InvoiceCounter(db.Model):
+    """Last allocated invoice number per financial year.
+
+    Incremented atomically inside the transaction that inserts the invoice,
+    so numbers stay gap-free and concurrent saves never read the same value.
+    """
+    __tablename__ = 'invoice_counter'
+    financial_year = db.Column(db.String(10), primary_key=True)  # e.g. "24-25"
+    last_number = db.Column(db.Integer, nullable=False, default=0)
+
+
+class GstMonthlyRollup(db.Model):
+    """Per-month GST totals, maintained in the same transaction as the invoices.
+
+    One row per (financial year, calendar month, intra/inter state, GST rate)
+    where the rate is the line items' ``gst_rate``: amounts are summed from
+    the items at that rate, and each invoice is counted once, under the
+    rate of its first item.
+    Rebuild from scratch with ``flask --app app db rebuild-rollup``.
+    """
+    __tablename__ = 'gst_monthly_rollup'
+    financial_year = db.Column(db.String(10), primary_key=True)  # e.g. "24-25"
+    month = db.Column(db.Integer, primary_key=True)              # 1–12
+    is_intra_state = db.Column(db.Boolean, primary_key=True)
+    gst_rate = db.Column(db.Float, primary_key=True)             # item rate, e.g. 18.0
+
+    invoice_count = db.Column(db.Integer, nullable=False, default=0)
+    total_basic = db.Column(db.Float, nullable=False, default=0.0)
+    total_cgst = db.Column(db.Float, nullable=False, default=0.0)
+    total_sgst = db.Column(db.Float, nullable=False, default=0.0)
+    total_igst = db.Column(db.Float, nullable=False, default=0.0)
+    grand_total = db.Column(db.Float, nullable=False, default=0.0)
+
+
 class InvoiceItem(db.Model):
     __tablename__ = 'invoice_item'
+    __table_args__ = (
+        db.Index('ix_invoice_item_invoice_id', 'invoice_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     invoice_id = db.Column(db.Integer, db.ForeignKey('invoice.id'), nullable=False)
 
@@ -131,3 +208,42 @@ class InvoiceItem(db.Model):
     igst_amount = db.Column(db.Float, default=0.0)
     gst_amount = db.Column(db.Float, nullable=False)
     total_amount = db.Column(db.Float, nullable=False)
+
+
+class Job(db.Model):
+    """A queued unit of background work (Excel import, GST export, ...).
+
+    Rows are created by the web process and claimed by ``flask jobs-worker``.
+    ``status`` moves ``queued → running → done | failed``.
+    """
+    __tablename__ = 'job'
+    id = db.Column(db.String(32), primary_key=True)            # uuid4 hex
+    kind = db.Column(db.String(30), nullable=False)            # e.g. "import_invoices"
+    status = db.Column(db.String(10), nullable=False, default='queued', index=True)
+    params = db.Column(db.Text, nullable=True)                 # JSON-encoded handler args
+
+    progress = db.Column(db.Integer, default=0)
+    message = db.Column(db.String(255), nullable=True)
+    result = db.Column(db.Text, nullable=True)                 # JSON-encoded summary
+    result_path = db.Column(db.String(255), nullable=True)     # downloadable output file
+    result_name = db.Column(db.String(100), nullable=True)     # download filename
+    error = db.Column(db.Text, nullable=True)
+    worker = db.Column(db.String(50), nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress or 0,
+            'message': self.message,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'has_download': bool(self.result_path),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -10,17 +10,76 @@ is created to avoid circular-import issues — this is the standard Flask
 pattern for large-Blueprint applications.
 
 Blueprint prefix: ``/``  (no prefix — all paths are absolute)
+
+:func:`document_response` serves the cached invoice / quotation print
+views (see :mod:`services.document_cache`) with conditional-GET support;
+:func:`job_accepted` answers a request whose work was queued as a job.
 """
-from flask import Blueprint
+import hashlib
+from functools import lru_cache
+from typing import Callable
+
+from flask import Blueprint, current_app, jsonify, redirect, request, session, url_for
+from werkzeug.http import is_resource_modified
+
+from services import document_cache
 
 main_bp = Blueprint("main", __name__)
 
+
+@lru_cache(maxsize=None)
+def template_revision(name: str) -> str:
+    """Digest of template *name* and ``base.html`` — part of a print view's
+    ETag, so a deploy that changes the layout retires the cached pages."""
+    env    = current_app.jinja_env
+    digest = hashlib.sha1()
+    for template in (name, "base.html"):
+        digest.update(env.loader.get_source(env, template)[0].encode())
+    return digest.hexdigest()[:12]
+
+
+def document_response(validator, render: Callable[[], str]):
+    """``304`` if the client's copy matches *validator*, else the cached page.
+
+    A page shown with pending flash messages is rendered fresh and neither
+    cached nor given validators, since the messages are part of the HTML.
+    """
+    if "_flashes" in session:
+        return render()
+    if is_resource_modified(request.environ, etag=validator.etag,
+                            last_modified=validator.last_modified):
+        response = current_app.response_class(
+            document_cache.get_or_render(validator, render), mimetype="text/html",
+        )
+    else:
+        response = current_app.response_class(status=304)
+    response.set_etag(validator.etag)
+    response.last_modified = validator.last_modified
+    # Always revalidate (edits show at once), but a current copy costs a 304.
+    response.cache_control.private  = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def job_accepted(job):
+    """Answer a queued job: 202 JSON for API clients, else the progress page."""
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({
+            "job_id"    : job.id,
+            "status_url": url_for("main.api_job_status", id=job.id),
+        }), 202
+    return redirect(url_for("main.job_status", id=job.id))
+
+
 # Import sub-modules AFTER blueprint creation (registers their routes)
 from routes import (  # noqa: E402, F401
     customers,
     dashboard,
+    debug,
     gst,
     invoices,
+    jobs,
+    metrics,
     quotations,
     uploads,
 )
@@ -10,14 +10,16 @@ GET  /customers                 List + add-new form
 POST /customers                 Create customer
 POST /customers/edit/<id>       Update customer
 POST /customers/delete/<id>     Delete customer (blocked if linked records exist)
-GET  /api/customers?q=<query>   JSON typeahead search (used by JS)
+GET  /api/customers?q=<query>   JSON typeahead search, ETag-cached (used by JS)
 """
+import hashlib
 import logging
 
-from flask import flash, jsonify, redirect, render_template, request, url_for
+from flask import current_app, flash, jsonify, redirect, render_template, request, url_for
 
-from models import Company, Customer, db
+from models import Customer, db
 from routes import main_bp
+from services import company_service, customer_service, search_service
 
 logger = logging.getLogger(__name__)
 
@@ -30,13 +32,18 @@ def customers():
         if not name:
             flash("Customer name is required.", "error")
             return redirect(url_for("main.customers"))
+        gstin = request.form.get("gstin", "").strip()
+        existing = customer_service.find(name, gstin)
+        if existing:
+            flash(f'Customer "{existing.name}" already exists.', "warning")
+            return redirect(url_for("main.customers"))
         try:
-            db.session.add(Customer(
-                name    = name,
+            customer_service.resolve_customer(
+                name,
                 address = request.form.get("address", "").strip(),
-                gstin   = request.form.get("gstin",   "").strip(),
+                gstin   = gstin,
                 state   = request.form.get("state",   "").strip(),
-            ))
+            )
             db.session.commit()
             flash("Customer added successfully.", "success")
         except Exception as exc:
@@ -48,7 +55,7 @@ def customers():
     return render_template(
         "customers.html",
         customers = Customer.query.order_by(Customer.name).all(),
-        company   = Company.query.first(),
+        company   = company_service.get_company(),
     )
 
 
@@ -61,12 +68,18 @@ def edit_customer(id: int):
         if not name:
             flash("Customer name is required.", "error")
             return redirect(url_for("main.customers"))
-        customer.name    = name
-        customer.gstin   = request.form.get("gstin",   "").strip()
-        customer.address = request.form.get("address", "").strip()
-        customer.state   = request.form.get("state",   "").strip()
+        customer_service.update_customer(
+            customer,
+            name    = name,
+            address = request.form.get("address", "").strip(),
+            gstin   = request.form.get("gstin",   "").strip(),
+            state   = request.form.get("state",   "").strip(),
+        )
         db.session.commit()
         flash("Customer updated successfully.", "success")
+    except ValueError as exc:
+        db.session.rollback()
+        flash(str(exc), "error")
     except Exception as exc:
         logger.error("Edit customer %d error: %s", id, exc)
         db.session.rollback()
@@ -99,22 +112,35 @@ def delete_customer(id: int):
 
 @main_bp.route("/api/customers")
 def api_customers():
-    """JSON typeahead endpoint — returns up to 10 matching customers.
+    """JSON typeahead endpoint — returns up to 10 ranked matching customers.
+
+    Served from the in-process index in :mod:`services.search_service`
+    (name prefix / infix and GSTIN prefix).  Responses carry an ETag built
+    from the index version — a digest of the indexed customers, identical
+    in every worker — and the query, so a repeated query revalidates to
+    ``304 Not Modified`` without searching again, whichever worker answers.
 
     Query params:
-        q (str): Name substring to search. Returns first 20 if omitted.
+        q (str): Name fragment or GSTIN prefix.  Returns the first 20
+                 customers by name if omitted.
 
     Returns:
         JSON array of customer dicts ``{id, name, address, gstin, state}``.
     """
     try:
-        q = request.args.get("q", "").strip()
-        rows = (
-            Customer.query.filter(Customer.name.ilike(f"%{q}%")).limit(10).all()
-            if q
-            else Customer.query.limit(20).all()
-        )
-        return jsonify([c.to_dict() for c in rows])
+        q     = request.args.get("q", "").strip()
+        index = search_service.get_index()
+        etag  = hashlib.sha1(f"{index.version}:{q.lower()}".encode()).hexdigest()[:20]
+        if request.if_none_match.contains(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = jsonify(index.search(q))
+        response.set_etag(etag)
+        # Browsers always revalidate (no stale suggestions after a customer
+        # is added) but only pay for a 304 while nothing has changed.
+        response.cache_control.private  = True
+        response.cache_control.no_cache = True
+        return response
     except Exception as exc:
         logger.error("Customer search error: %s", exc)
         return jsonify([]), 500
@@ -1,14 +1,16 @@
 """
 routes.dashboard
 ================
-Main landing page — shows recent invoices and quotations at a glance.
+Main landing page — shows recent invoices and quotations at a glance,
+plus this month's GST totals read from the rollup table.  The data comes
+from :mod:`services.dashboard_service` (cached, a few statements per load).
 """
 import logging
 
 from flask import render_template
 
-from models import Company, Invoice, Quotation
 from routes import main_bp
+from services import company_service, dashboard_service
 
 logger = logging.getLogger(__name__)
 
@@ -17,16 +19,19 @@ logger = logging.getLogger(__name__)
 def dashboard():
     """Render the dashboard with recent activity and quick-action stats."""
     try:
-        quotations      = Quotation.query.order_by(Quotation.date.desc()).limit(10).all()
-        invoices        = Invoice.query.order_by(Invoice.date.desc()).limit(10).all()
-        company         = Company.query.first()
-        total_invoices  = Invoice.query.count()
-        total_quotations = Quotation.query.count()
+        data             = dashboard_service.get_dashboard()
+        company          = company_service.get_company()
+        quotations       = data.quotations
+        invoices         = data.invoices
+        total_invoices   = data.total_invoices
+        total_quotations = data.total_quotations
+        month_totals     = data.month_totals
     except Exception as exc:
         logger.error("Dashboard load error: %s", exc)
         quotations = invoices = []
         company    = None
         total_invoices = total_quotations = 0
+        month_totals   = None
 
     return render_template(
         "dashboard.html",
@@ -35,4 +40,5 @@ def dashboard():
         company          = company,
         total_invoices   = total_invoices,
         total_quotations = total_quotations,
+        month_totals     = month_totals,
     )
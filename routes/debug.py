@@ -0,0 +1,84 @@
+"""
+routes.debug
+============
+Opt-in request profiling (``PERF_PROFILE=1``, see ``services.sql_profiler``).
+
+Every request is timed and its SQL counted; the response carries a
+``Server-Timing`` header (visible in the browser's network panel).
+
+Endpoints
+---------
+GET  /debug/perf                 Worst recent requests + per-endpoint totals (JSON, this worker)
+POST /debug/perf/reset           Clear this worker's history
+
+Both need ``PERF_TOKEN`` in an ``X-Perf-Token`` header (or ``?token=``)
+and answer 404 while profiling or the token is not configured.
+"""
+import hmac
+import logging
+
+from flask import abort, current_app, g, jsonify, request
+
+from routes import main_bp
+from services import sql_profiler
+
+logger = logging.getLogger(__name__)
+
+
+# ─── Request hooks ────────────────────────────────────────────────────────────
+
+@main_bp.before_app_request
+def _begin_profile():
+    if current_app.config["PERF_PROFILE"]:
+        label = request.full_path.rstrip("?") if request.query_string else request.path
+        g.perf_token = sql_profiler.begin(request.endpoint or "-", f"{request.method} {label}")
+
+
+@main_bp.after_app_request
+def _end_profile(response):
+    token = g.pop("perf_token", None)
+    if token is not None:
+        profile = sql_profiler.end(token, response.status_code)
+        response.headers["Server-Timing"] = (
+            f'db;dur={profile.db_ms:.1f};desc="{profile.statements} statements", '
+            f"app;dur={profile.wall_ms:.1f}"
+        )
+    return response
+
+
+@main_bp.teardown_app_request
+def _abandon_profile(exc):
+    token = g.pop("perf_token", None)       # after_request did not run (unhandled error)
+    if token is not None:
+        sql_profiler.end(token, 500)
+
+
+# ─── Report ───────────────────────────────────────────────────────────────────
+
+def _authorise() -> None:
+    expected = current_app.config["PERF_TOKEN"]
+    if not current_app.config["PERF_PROFILE"] or not expected:
+        abort(404)
+    given = request.headers.get("X-Perf-Token") or request.args.get("token") or ""
+    if not hmac.compare_digest(given.encode(), expected.encode()):
+        abort(403)
+
+
+@main_bp.route("/debug/perf")
+def debug_perf():
+    """JSON report of this worker's slowest recent requests.
+
+    Query params:
+        limit (int): Requests to list (default 20, max 200).
+    """
+    _authorise()
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 200)
+    return jsonify(sql_profiler.report(limit))
+
+
+@main_bp.route("/debug/perf/reset", methods=["POST"])
+def debug_perf_reset():
+    """Clear this worker's history and per-endpoint totals."""
+    _authorise()
+    sql_profiler.reset()
+    return jsonify({"success": True})
@@ -7,18 +7,22 @@ Endpoints
 ---------
 GET  /gst-report                 Report form (defaults to current month)
 POST /gst-report                 Regenerate report for selected month/year
-GET  /gst-report/export          Download report as .xlsx
+GET  /gst-report/export          Download report as .xlsx (or queue it as a
+                                 background job when BACKGROUND_JOBS is on);
+                                 ``?fy=25-26`` exports the whole financial year
 """
-import io
 import logging
-from calendar import monthrange
+import tempfile
 from datetime import date, datetime
 
-from flask import flash, redirect, render_template, request, send_file, url_for
+from flask import (
+    current_app, flash, redirect, render_template,
+    request, send_file, url_for,
+)
 
-from models import Company, Invoice
-from routes import main_bp
-from services import excel_service
+from routes import job_accepted, main_bp
+from services import company_service, excel_service, job_service, report_service
+from utils.helpers import get_financial_year
 
 logger = logging.getLogger(__name__)
 
@@ -29,9 +33,11 @@ def gst_report():
 
     Reads ``month`` and ``year`` from the POST body (form) or GET query
     string, defaulting to the current month.  Fills gaps in bill-number
-    sequences with empty placeholder rows.
+    sequences with empty placeholder rows.  Rows come from
+    :mod:`services.report_service` (joined tuples); the totals are read
+    from the GST monthly rollup via :mod:`services.rollup_service`.
     """
-    company = Company.query.first()
+    company = company_service.get_company()
     today   = date.today()
 
     if request.method == "POST":
@@ -41,41 +47,7 @@ def gst_report():
         month = int(request.args.get("month", today.month))
         year  = int(request.args.get("year",  today.year))
 
-    from_date = date(year, month, 1)
-    to_date   = date(year, month, monthrange(year, month)[1])
-
-    invoices_in_month = (
-        Invoice.query
-        .filter(Invoice.date >= from_date, Invoice.date <= to_date)
-        .order_by(Invoice.invoice_number_int)
-        .all()
-    )
-
-    # Build report rows with gap detection
-    report_rows: list[dict] = []
-    totals = {"basic": 0.0, "cgst": 0.0, "sgst": 0.0, "igst": 0.0, "total": 0.0}
-
-    if invoices_in_month:
-        min_num = invoices_in_month[0].invoice_number_int
-        max_num = invoices_in_month[-1].invoice_number_int
-        inv_map = {inv.invoice_number_int: inv for inv in invoices_in_month}
-        fy      = invoices_in_month[0].financial_year
-
-        for num in range(min_num, max_num + 1):
-            if num in inv_map:
-                inv = inv_map[num]
-                report_rows.append({"empty": False, "invoice": inv})
-                totals["basic"] += inv.total_basic
-                totals["cgst"]  += inv.total_cgst
-                totals["sgst"]  += inv.total_sgst
-                totals["igst"]  += inv.total_igst
-                totals["total"] += inv.grand_total
-            else:
-                report_rows.append({
-                    "empty"    : True,
-                    "number"   : num,
-                    "formatted": f"{fy}/{str(num).zfill(3)}",
-                })
+    report_rows, totals = report_service.gst_month_report(month, year)
 
     months = [(i, datetime(2000, i, 1).strftime("%B")) for i in range(1, 13)]
     years  = list(range(today.year - 3, today.year + 1))
@@ -87,6 +59,7 @@ def gst_report():
         totals         = totals,
         selected_month = month,
         selected_year  = year,
+        selected_fy    = get_financial_year(date(year, month, 1)),
         months         = months,
         years          = years,
     )
@@ -94,25 +67,41 @@ def gst_report():
 
 @main_bp.route("/gst-report/export")
 def export_gst_report():
-    """Stream the GST report for the requested month as an Excel download."""
+    """Stream the GST report for the requested month (or ``fy``) as an Excel download.
+
+    The write-only workbook is saved into a ``SpooledTemporaryFile`` that
+    ``send_file`` streams from directly — no second in-memory copy.  With
+    ``BACKGROUND_JOBS`` enabled the export is queued and the response
+    points at the job instead (202 JSON for API clients).
+    """
     today = date.today()
     month = int(request.args.get("month", today.month))
     year  = int(request.args.get("year",  today.year))
+    fy    = request.args.get("fy") or None
+
+    if current_app.config["BACKGROUND_JOBS"]:
+        job = job_service.enqueue(
+            "gst_export", {"month": month, "year": year, "fy": fy},
+            folder=current_app.config["JOB_FOLDER"],
+        )
+        return job_accepted(job)
 
+    spool = tempfile.SpooledTemporaryFile(max_size=current_app.config["EXPORT_SPOOL_MAX_SIZE"])
     try:
-        wb = excel_service.build_gst_report_workbook(month, year)
+        fname = excel_service.write_gst_report(spool, month, year, fy=fy)
     except ImportError as exc:
+        spool.close()
         flash(str(exc), "error")
         return redirect(url_for("main.gst_report", month=month, year=year))
+    except ValueError:
+        spool.close()
+        flash(f"Invalid financial year: {fy}", "error")
+        return redirect(url_for("main.gst_report", month=month, year=year))
+    spool.seek(0)
 
-    output = io.BytesIO()
-    wb.save(output)
-    output.seek(0)
-
-    fname = datetime(year, month, 1).strftime("GST_Report_%B_%Y.xlsx")
     return send_file(
-        output,
-        mimetype     = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        spool,
+        mimetype      = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         as_attachment = True,
         download_name = fname,
     )
@@ -5,22 +5,22 @@ Full CRUD for Tax Invoices, plus the invoice list page.
 
 Endpoints
 ---------
-GET  /invoices                   Paginated invoice list
+GET  /invoices                   Keyset-paginated invoice list (fy / month / customer filters)
 GET  /invoice/new                Blank invoice form (auto-assigns next number)
 POST /invoice/new                Create invoice (JSON body)
-GET  /invoice/<id>               View / print invoice
+GET  /invoice/<id>               View / print invoice (cached, ETag / Last-Modified)
 GET  /invoice/<id>/edit          Pre-filled edit form
 POST /invoice/<id>/edit          Update invoice (JSON body)
 POST /invoice/delete/<id>        Delete invoice
 """
 import logging
-from datetime import date
+from datetime import date, datetime
 
-from flask import flash, jsonify, redirect, render_template, request, url_for
+from flask import abort, flash, jsonify, redirect, render_template, request, url_for
 
-from models import Company, Invoice, db
-from routes import main_bp
-from services import invoice_service
+from models import Customer, Invoice, db
+from routes import document_response, main_bp, template_revision
+from services import company_service, document_cache, invoice_service
 from utils.helpers import get_financial_year, number_to_words
 
 logger = logging.getLogger(__name__)
@@ -30,19 +30,80 @@ logger = logging.getLogger(__name__)
 
 @main_bp.route("/invoices")
 def invoices():
-    """Render the full invoice list, newest first."""
+    """Render one page of the invoice list, newest first.
+
+    Query params:
+        fy (str):        Financial year filter, e.g. ``25-26``.
+        month (str):     Calendar month filter, ``YYYY-MM``.
+        customer (int):  Customer id filter.
+        page_size (int): Rows per page (default 50, max 200).
+        after (str):     Keyset cursor ``YYYY-MM-DD_<number>`` from the
+                         previous page's "Next" link.
+    """
+    args    = request.args
+    filters = {
+        "fy"      : args.get("fy", "").strip(),
+        "month"   : args.get("month", "").strip(),
+        "customer": args.get("customer", type=int),
+    }
+    page_size = args.get("page_size", invoice_service.DEFAULT_PAGE_SIZE, type=int)
+    customer  = None
+
     try:
-        all_invoices = (
-            Invoice.query
-            .order_by(Invoice.date.desc(), Invoice.invoice_number_int.desc())
-            .all()
+        page, next_cursor = invoice_service.list_invoices(
+            page_size      = page_size,
+            after          = _parse_cursor(args.get("after", "")),
+            financial_year = filters["fy"] or None,
+            month          = _parse_month(filters["month"]),
+            customer_id    = filters["customer"],
         )
-        company = Company.query.first()
+        if filters["customer"]:
+            customer = db.session.get(Customer, filters["customer"])
+        company = company_service.get_company()
     except Exception as exc:
         logger.error("Invoice list error: %s", exc)
-        all_invoices, company = [], None
+        page, next_cursor, company = [], None, None
+
+    active   = {k: v for k, v in filters.items() if v}
+    next_url = None
+    if next_cursor:
+        next_url = url_for(
+            "main.invoices", page_size=page_size,
+            after=f"{next_cursor[0].isoformat()}_{next_cursor[1]}", **active,
+        )
+    today = date.today()
+    fy_options = [get_financial_year(date(today.year - i, today.month, 1)) for i in range(4)]
+
+    return render_template(
+        "invoices.html",
+        invoices      = page,
+        company       = company,
+        filters       = filters,
+        customer      = customer,
+        fy_options    = fy_options,
+        page_size     = page_size,
+        next_url      = next_url,
+        is_first_page = not args.get("after"),
+        first_url     = url_for("main.invoices", page_size=page_size, **active),
+    )
+
+
+def _parse_cursor(raw: str):
+    """Parse ``YYYY-MM-DD_<number>`` into ``(date, int)``; ``None`` if invalid."""
+    try:
+        day, num = raw.split("_", 1)
+        return datetime.strptime(day, "%Y-%m-%d").date(), int(num)
+    except ValueError:
+        return None
+
 
-    return render_template("invoices.html", invoices=all_invoices, company=company)
+def _parse_month(raw: str):
+    """Parse ``YYYY-MM`` into ``(year, month)``; ``None`` if empty or invalid."""
+    try:
+        parsed = datetime.strptime(raw, "%Y-%m")
+        return parsed.year, parsed.month
+    except ValueError:
+        return None
 
 
 # ─── Create ───────────────────────────────────────────────────────────────────
@@ -50,7 +111,7 @@ def invoices():
 @main_bp.route("/invoice/new", methods=["GET", "POST"])
 def create_invoice():
     """Render the new-invoice form (GET) or save a new invoice (POST/JSON)."""
-    company = Company.query.first()
+    company = company_service.get_company()
 
     if request.method == "POST":
         return _handle_save(request, company, existing=None)
@@ -73,20 +134,27 @@ def create_invoice():
 
 @main_bp.route("/invoice/<int:id>")
 def view_invoice(id: int):
-    """Render the printable Tax Invoice view."""
-    invoice = Invoice.query.get_or_404(id)
-    company = Company.query.first()
+    """Render the printable Tax Invoice view, served from the document cache."""
+    company = company_service.get_company()
     if not company:
         flash("Company settings not configured.", "error")
         return redirect(url_for("main.invoices"))
 
-    amount_in_words = number_to_words(round(invoice.grand_total)) + " Only"
-    return render_template(
-        "view_invoice.html",
-        invoice         = invoice,
-        company         = company,
-        amount_in_words = amount_in_words,
-    )
+    validator = document_cache.invoice_validator(
+        id, company, template_revision("view_invoice.html"))
+    if validator is None:
+        abort(404)
+
+    def render() -> str:
+        invoice = Invoice.query.get_or_404(id)
+        return render_template(
+            "view_invoice.html",
+            invoice         = invoice,
+            company         = company,
+            amount_in_words = number_to_words(round(invoice.grand_total)) + " Only",
+        )
+
+    return document_response(validator, render)
 
 
 # ─── Edit ─────────────────────────────────────────────────────────────────────
@@ -94,7 +162,7 @@ def view_invoice(id: int):
 @main_bp.route("/invoice/<int:id>/edit", methods=["GET", "POST"])
 def edit_invoice(id: int):
     """Pre-fill the invoice form with existing data (GET) or update it (POST/JSON)."""
-    company = Company.query.first()
+    company = company_service.get_company()
     invoice = Invoice.query.get_or_404(id)
 
     if request.method == "POST":
@@ -141,8 +209,7 @@ def delete_invoice(id: int):
     """Permanently delete an invoice."""
     try:
         invoice = Invoice.query.get_or_404(id)
-        db.session.delete(invoice)
-        db.session.commit()
+        invoice_service.delete(invoice)
         flash("Invoice deleted successfully.", "success")
     except Exception as exc:
         logger.error("Delete invoice %d error: %s", id, exc)
@@ -0,0 +1,58 @@
+"""
+routes.jobs
+===========
+Status pages and downloads for background jobs (see ``services.job_service``).
+
+Endpoints
+---------
+GET  /jobs/<id>                  Progress page (polls the JSON endpoint)
+GET  /api/jobs/<id>              JSON status ``{status, progress, message, ...}``
+GET  /jobs/<id>/download         Download the job's result file
+"""
+import logging
+import os
+
+from flask import abort, flash, jsonify, redirect, render_template, send_file, url_for
+
+from models import Job, db
+from routes import main_bp
+from services import job_service
+
+logger = logging.getLogger(__name__)
+
+
+@main_bp.route("/jobs/<id>")
+def job_status(id: str):
+    """Render the progress page for a queued or running job."""
+    job = db.session.get(Job, id) or abort(404)
+    return render_template("job_status.html", job=job.to_dict())
+
+
+@main_bp.route("/api/jobs/<id>")
+def api_job_status(id: str):
+    """JSON status endpoint polled by the progress page."""
+    job = db.session.get(Job, id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    data = job.to_dict()
+    if job.status == job_service.DONE and job.result_path:
+        data["download_url"] = url_for("main.download_job_result", id=id)
+    return jsonify(data)
+
+
+@main_bp.route("/jobs/<id>/download")
+def download_job_result(id: str):
+    """Send the finished job's output file."""
+    job = db.session.get(Job, id) or abort(404)
+    if job.status != job_service.DONE or not job.result_path:
+        flash("This job has no file to download yet.", "warning")
+        return redirect(url_for("main.job_status", id=id))
+    if not os.path.exists(job.result_path):
+        flash("The result file has expired. Please run the export again.", "error")
+        return redirect(url_for("main.job_status", id=id))
+    return send_file(
+        job.result_path,
+        mimetype      = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        as_attachment = True,
+        download_name = job.result_name or os.path.basename(job.result_path),
+    )
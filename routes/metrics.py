@@ -0,0 +1,45 @@
+"""
+routes.metrics
+==============
+Prometheus scrape endpoint and request-latency hooks (``METRICS=1``,
+see ``services.metrics``).
+
+Endpoints
+---------
+GET  /metrics                    Prometheus text format, merged across all workers
+"""
+import logging
+import time
+
+from flask import abort, current_app, g, request
+
+from routes import main_bp
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@main_bp.before_app_request
+def _start_timer():
+    if current_app.config["METRICS"]:
+        g.metrics_started = time.perf_counter()
+
+
+@main_bp.after_app_request
+def _observe_request(response):
+    started = g.pop("metrics_started", None)
+    if started is not None:
+        metrics.observe_request(
+            request.endpoint or "unmatched", request.method, response.status_code,
+            time.perf_counter() - started,
+        )
+    return response
+
+
+@main_bp.route("/metrics")
+def prometheus_metrics():
+    """Every worker's samples, merged (404 while metrics are disabled)."""
+    if not metrics.enabled():
+        abort(404)
+    body, content_type = metrics.render()
+    return current_app.response_class(body, content_type=content_type)
@@ -7,7 +7,7 @@ Endpoints
 ---------
 GET  /quotation/new                  Blank quotation form
 POST /quotation/new                  Save new quotation (JSON body)
-GET  /quotation/<id>                 View / print quotation
+GET  /quotation/<id>                 View / print quotation (cached, ETag / Last-Modified)
 POST /quotation/delete/<id>          Delete quotation
 POST /quotation/<id>/to-invoice      Convert to Tax Invoice
 GET  /company                        Company settings form
@@ -15,11 +15,11 @@ POST /company                        Save company settings
 """
 import logging
 
-from flask import flash, jsonify, redirect, render_template, request, url_for
+from flask import abort, flash, jsonify, redirect, render_template, request, url_for
 
-from models import Company, Customer, Quotation, QuotationItem, db
-from routes import main_bp
-from services import invoice_service
+from models import Company, Quotation, QuotationItem, db
+from routes import document_response, main_bp, template_revision
+from services import company_service, customer_service, document_cache, invoice_service
 from utils.helpers import get_financial_year, number_to_words
 
 logger = logging.getLogger(__name__)
@@ -52,6 +52,7 @@ def company_settings():
             company.gstin         = gstin
             company.phone         = phone
             db.session.commit()
+            company_service.invalidate()
             flash("Company settings updated successfully.", "success")
             return redirect(url_for("main.dashboard"))
         except Exception as exc:
@@ -67,7 +68,7 @@ def company_settings():
 @main_bp.route("/quotation/new", methods=["GET", "POST"])
 def create_quotation():
     """Render the new-quotation form (GET) or save a quotation (POST/JSON)."""
-    company = Company.query.first()
+    company = company_service.get_company()
 
     if request.method == "POST":
         try:
@@ -85,17 +86,12 @@ def create_quotation():
             if not cust_name:
                 return jsonify({"success": False, "error": "Customer name is required"}), 400
 
-            if cust_id:
-                customer = db.session.get(Customer, int(cust_id))
-                if not customer:
-                    return jsonify({"success": False, "error": "Customer not found"}), 404
-                customer.name = cust_name; customer.address = cust_addr
-                customer.gstin = cust_gst; customer.state = cust_state
-            else:
-                customer = Customer(name=cust_name, address=cust_addr,
-                                    gstin=cust_gst, state=cust_state)
-                db.session.add(customer)
-            db.session.flush()
+            try:
+                customer = customer_service.resolve_customer(
+                    cust_name, cust_addr, cust_gst, cust_state, customer_id=cust_id,
+                )
+            except ValueError as exc:
+                return jsonify({"success": False, "error": str(exc)}), 400
 
             date_str = (data.get("date") or "").strip()
             if not date_str:
@@ -166,20 +162,27 @@ def create_quotation():
 
 @main_bp.route("/quotation/<int:id>")
 def view_quotation(id: int):
-    """Render the printable quotation view."""
-    quotation = Quotation.query.get_or_404(id)
-    company   = Company.query.first()
+    """Render the printable quotation view, served from the document cache."""
+    company = company_service.get_company()
     if not company:
         flash("Company settings not configured.", "error")
         return redirect(url_for("main.dashboard"))
 
-    amount_in_words = number_to_words(round(quotation.grand_total)) + " Only"
-    return render_template(
-        "view_quotation.html",
-        quotation       = quotation,
-        company         = company,
-        amount_in_words = amount_in_words,
-    )
+    validator = document_cache.quotation_validator(
+        id, company, template_revision("view_quotation.html"))
+    if validator is None:
+        abort(404)
+
+    def render() -> str:
+        quotation = Quotation.query.get_or_404(id)
+        return render_template(
+            "view_quotation.html",
+            quotation       = quotation,
+            company         = company,
+            amount_in_words = number_to_words(round(quotation.grand_total)) + " Only",
+        )
+
+    return document_response(validator, render)
 
 
 # ─── Delete quotation ─────────────────────────────────────────────────────────
@@ -8,20 +8,31 @@ File-upload endpoints for two different use-cases:
    bill/invoice.  The file is parsed (via Groq AI or direct Excel
    parsing) and the extracted data pre-fills the quotation form.
 
+   Several files can be uploaded at once; they are extracted in
+   parallel and a batch page lists each document's draft, which opens
+   the quotation form via ``/upload/draft``.
+
 2. **Invoice Excel import** (``/invoice/upload-excel``)
    User uploads an Excel file that follows the import template.
    Rows are bulk-imported as Invoice records (create or update).
 
+   With ``BACKGROUND_JOBS`` enabled the import runs in a job worker and
+   the request returns the job id immediately.  That is the only upload
+   written to disk; everything else is parsed from the request's spooled
+   upload buffers.
+
 3. **Template download** (``/invoice/download-template``)
    Serves the blank import template so the user knows the expected format.
 
 Allowed file types (AI upload): PDF, PNG, JPG, JPEG, XLS, XLSX
 Allowed file types (Excel import): XLS, XLSX
-Max upload size: 10 MB
+Max upload size: 10 MB per file, at most 30 files per AI batch
 """
 import io
+import json
 import logging
 import os
+import time
 
 from flask import (
     current_app, flash, redirect, render_template,
@@ -29,15 +40,15 @@ from flask import (
 )
 from werkzeug.utils import secure_filename
 
-from models import Company
-from routes import main_bp
-from services import ai_extraction, excel_service
+from routes import job_accepted, main_bp
+from services import ai_extraction, company_service, excel_service, job_service
 
 logger = logging.getLogger(__name__)
 
 _ALLOWED_DOC  = {"pdf", "png", "jpg", "jpeg", "xls", "xlsx"}
 _ALLOWED_XLSX = {"xls", "xlsx"}
 _MAX_BYTES    = 10 * 1024 * 1024   # 10 MB
+_MAX_BATCH    = 30                 # files per multi-file AI upload
 
 
 def _extension(filename: str) -> str:
@@ -45,36 +56,33 @@ def _extension(filename: str) -> str:
     return filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
 
 
-def _save_upload(file) -> str | None:
-    """Validate and save the uploaded file; return the full path or None."""
+def _check_upload(file) -> str | None:
+    """Validate an AI-upload file; return an error message, or None if it is usable.
+
+    Nothing is written to disk: Werkzeug already holds each uploaded file
+    in a ``SpooledTemporaryFile`` (in memory up to 500 KB, beyond that an
+    anonymous temporary file), and the parsers read ``file.stream``
+    directly — so concurrent uploads of the same file name cannot collide.
+    """
     if not file or not file.filename:
-        flash("No file selected.", "error")
-        return None
+        return "No file selected."
 
     ext = _extension(file.filename)
     if ext not in _ALLOWED_DOC:
-        flash(
+        return (
             f"Unsupported file type '.{ext}'. "
-            "Allowed: PDF, PNG, JPG, JPEG, XLS, XLSX.",
-            "error",
+            "Allowed: PDF, PNG, JPG, JPEG, XLS, XLSX."
         )
-        return None
+    if _size(file) > _MAX_BYTES:
+        return "File too large. Maximum size is 10 MB."
+    return None
 
-    file.seek(0, os.SEEK_END)
-    size = file.tell()
-    file.seek(0)
-    if size > _MAX_BYTES:
-        flash("File too large. Maximum size is 10 MB.", "error")
-        return None
 
-    filename = secure_filename(file.filename)
-    if not filename:
-        flash("Invalid filename.", "error")
-        return None
-
-    path = os.path.join(current_app.config["UPLOAD_FOLDER"], filename)
-    file.save(path)
-    return path
+def _size(file) -> int:
+    file.stream.seek(0, os.SEEK_END)
+    size = file.stream.tell()
+    file.stream.seek(0)
+    return size
 
 
 # ─── AI document upload (quotation pre-fill) ──────────────────────────────────
@@ -89,19 +97,26 @@ def upload_file():
     - **Excel**        Parsed directly via openpyxl (no AI required).
 
     On success the user is redirected to ``create_quotation`` with the
-    extracted data pre-populated.
+    extracted data pre-populated.  When several files are selected they
+    are handled by :func:`_extract_batch` instead.
     """
     if request.method == "POST":
         if "file" not in request.files:
             flash("No file part in the request.", "error")
             return redirect(request.url)
 
-        filepath = _save_upload(request.files["file"])
-        if filepath is None:
+        files = [f for f in request.files.getlist("file") if f.filename]
+        if len(files) > 1:
+            return _extract_batch(files)
+
+        file  = files[0] if files else None
+        error = _check_upload(file)
+        if error:
+            flash(error, "error")
             return redirect(request.url)
 
         try:
-            extracted = ai_extraction.extract_details_from_file(filepath)
+            extracted = ai_extraction.extract_details(file.stream, file.filename)
             if extracted is None:
                 flash(
                     "Could not extract data from the file. "
@@ -110,7 +125,7 @@ def upload_file():
                 )
                 return redirect(request.url)
 
-            company = Company.query.first()
+            company = company_service.get_company()
             return render_template(
                 "create_quotation.html",
                 company  = company,
@@ -120,15 +135,68 @@ def upload_file():
             logger.error("File extraction error: %s", exc)
             flash("Error processing file. Please try again.", "error")
             return redirect(request.url)
-        finally:
-            try:
-                os.remove(filepath)
-            except OSError:
-                pass
 
     return render_template("upload.html")
 
 
+def _extract_batch(files):
+    """Extract every file concurrently and render one draft per document.
+
+    Invalid files are reported on the batch page rather than aborting the
+    whole upload.  Extraction runs on ``ai_extraction.extract_many``'s
+    bounded pool, so the request takes about as long as its slowest file.
+    """
+    if len(files) > _MAX_BATCH:
+        flash(f"Too many files — upload at most {_MAX_BATCH} at a time.", "error")
+        return redirect(request.url)
+
+    results: list[dict | None] = []
+    valid:   list[int] = []                    # result slots of usable files
+    for file in files:
+        error = _check_upload(file)
+        if error:
+            results.append({"filename": file.filename, "extracted": None,
+                            "error": error, "seconds": 0.0})
+        else:
+            valid.append(len(results))
+            results.append(None)
+
+    started   = time.perf_counter()
+    extracted = ai_extraction.extract_many(
+        [(files[slot].filename, files[slot].stream) for slot in valid]
+    )
+    elapsed   = round(time.perf_counter() - started, 2)
+    for slot, result in zip(valid, extracted):
+        results[slot] = result
+
+    ok = sum(1 for r in results if r["extracted"])
+    logger.info("Batch extraction: %d/%d file(s) in %.2fs.", ok, len(results), elapsed)
+    return render_template(
+        "upload_batch.html",
+        results = results,
+        ok      = ok,
+        elapsed = elapsed,
+    )
+
+
+@main_bp.route("/upload/draft", methods=["POST"])
+def upload_draft():
+    """Open the quotation form pre-filled with one draft from a batch upload."""
+    try:
+        extracted = json.loads(request.form.get("extracted") or "")
+    except ValueError:
+        extracted = None
+    if not isinstance(extracted, dict):
+        flash("Invalid draft data.", "error")
+        return redirect(url_for("main.upload_file"))
+
+    return render_template(
+        "create_quotation.html",
+        company   = company_service.get_company(),
+        extracted = extracted,
+    )
+
+
 # ─── Invoice Excel import ──────────────────────────────────────────────────────
 
 @main_bp.route("/invoice/upload-excel", methods=["GET", "POST"])
@@ -138,6 +206,11 @@ def upload_invoice_excel():
     Rows with the same Invoice No (within the same financial year) are
     treated as an **update** to the existing record.  New numbers create
     new invoices.  See the downloadable template for the expected format.
+
+    The file is imported in streaming mode so large sheets commit in
+    chunks and a bad chunk does not undo the rest of the import.  With
+    ``BACKGROUND_JOBS`` enabled the import is queued instead and the user
+    is sent to the job progress page.
     """
     if request.method == "POST":
         if "file" not in request.files:
@@ -150,35 +223,62 @@ def upload_invoice_excel():
             flash("Only Excel (.xlsx / .xls) files are accepted here.", "error")
             return redirect(request.url)
 
-        filepath = _save_upload(file)
-        if filepath is None:
+        if current_app.config["BACKGROUND_JOBS"]:
+            return _queue_import(file)
+
+        if _size(file) > _MAX_BYTES:
+            flash("File too large. Maximum size is 10 MB.", "error")
             return redirect(request.url)
 
         try:
-            result = excel_service.import_invoices(filepath)
+            result = excel_service.import_invoices(file.stream, streaming=True)
             flash(
                 f"Import complete — "
                 f"{result['created']} created, "
                 f"{result['updated']} updated, "
-                f"{result['skipped']} skipped.",
+                + (f"{result['appended']} appended, " if result["appended"] else "")
+                + f"{result['skipped']} skipped.",
                 "success",
             )
+            if result["failed"]:
+                flash(
+                    f"{result['failed']} invoice(s) could not be imported and "
+                    "were rolled back — check the log for details.",
+                    "warning",
+                )
             return redirect(url_for("main.invoices"))
         except ImportError as exc:
             flash(str(exc), "error")
         except Exception as exc:
             logger.error("Excel import error: %s", exc)
             flash(f"Error processing Excel: {exc}", "error")
-        finally:
-            try:
-                os.remove(filepath)
-            except OSError:
-                pass
         return redirect(request.url)
 
     return render_template("upload_invoice.html")
 
 
+def _queue_import(file):
+    """Store the upload under a unique name and queue an import job."""
+    if not file.filename:
+        flash("No file selected.", "error")
+        return redirect(request.url)
+    filename = secure_filename(file.filename)
+    if not filename:
+        flash("Invalid filename.", "error")
+        return redirect(request.url)
+
+    folder = current_app.config["JOB_FOLDER"]
+    path   = job_service.input_path(folder, filename)
+    file.save(path)
+    if os.path.getsize(path) > _MAX_BYTES:
+        os.remove(path)
+        flash("File too large. Maximum size is 10 MB.", "error")
+        return redirect(request.url)
+
+    job = job_service.enqueue("import_invoices", {"path": path}, folder=folder)
+    return job_accepted(job)
+
+
 # ─── Template download ────────────────────────────────────────────────────────
 
 @main_bp.route("/invoice/download-template")
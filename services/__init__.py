@@ -7,7 +7,23 @@ objects.  Routes call services; services call models and utils.
 Modules
 -------
 ai_extraction   Groq LLM + direct Excel parsing for document pre-fill.
+groq_client     Groq calls with deadlines, retries, circuit breaker, counters.
+pdf_text        Budgeted PDF text extraction (header/footer stripping,
+                early stop, page-parallel worker processes).
+image_prep      Photo normalisation before vision upload (orient, downscale,
+                grayscale, re-encode) with timing counters.
 invoice_service Create / update Invoice records from validated payload dicts.
 excel_service   Excel import (invoices) and workbook builders (GST report,
                 invoice upload template).
+report_service  GST report queries: joined row tuples, SQL totals, gap filling.
+rollup_service  Incrementally maintained GST monthly rollup (+ rebuild).
+cache_service   Per-process caches invalidated across workers by version stamps.
+company_service Cached Company settings snapshot.
+dashboard_service Landing-page data in a few joined statements, TTL-cached.
+document_cache  Rendered invoice / quotation print views keyed by a one-row ETag.
+sql_profiler    Opt-in per-request / per-job SQL counts, timings, slow-query log.
+metrics         Prometheus metrics (requests, DB pool, Groq, imports) across workers.
+search_service  In-process customer typeahead index (trigrams + GSTIN prefix).
+customer_service Customer identity keys: resolve on write, bulk-merge duplicates.
+seed_service    Synthetic load-test data (bulk inserts) and matching upload files.
 """
@@ -5,13 +5,23 @@ Extract structured invoice / bill data from uploaded files.
 
 Supported inputs
 ----------------
-- **PDF**   Text extracted via ``pdfplumber`` → sent to Groq text model.
-- **Image** (JPEG / PNG) Base-64 encoded → sent to Groq vision model.
+- **PDF**   Text extracted via ``pdfplumber`` (budgeted and cleaned, see
+            :mod:`services.pdf_text`) → sent to Groq text model.
+- **Image** (JPEG / PNG) Oriented, downscaled and re-encoded
+            (:mod:`services.image_prep`), base-64 → Groq vision model.
 - **Excel** (.xls / .xlsx) Parsed directly via ``openpyxl`` — no LLM needed.
 
 All public functions return a dict matching the schema below, or ``None``
 on failure (the caller decides how to surface the error to the user).
 
+Successful PDF / image extractions are cached on disk, keyed by the
+SHA-256 of the file bytes plus the model and :data:`PROMPT_VERSION`, so a
+re-upload of the same document skips the Groq call entirely.
+
+:func:`extract_many` processes a batch of files on a bounded thread pool;
+Groq calls go through :mod:`services.groq_client` (deadlines, retries,
+circuit breaker, and a ``GROQ_RPM`` rate limit shared by the process).
+
 Return schema
 -------------
 ::
@@ -32,39 +42,86 @@ Return schema
 """
 from __future__ import annotations
 
-import base64
+import hashlib
 import json
 import logging
-from typing import Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Optional, Union
 
 from config import Config
+from services import groq_client, image_prep, pdf_text
+from services.cache_service import DiskLRUCache
 from utils.helpers import parse_date, safe_float, safe_int
 
 logger = logging.getLogger(__name__)
 
-# ─── Groq client (lazy singleton) ─────────────────────────────────────────────
+# A path on disk, or a readable + seekable binary file object such as an
+# upload's spooled stream.
+Source = Union[str, BinaryIO]
 
-_groq_client = None
+TEXT_MODEL   = "llama-3.3-70b-versatile"
+VISION_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
 
+# Bump whenever the prompts, _EXTRACTION_SCHEMA or the text sent to the
+# model change, so cached results produced by the old prompt are no longer
+# served.  2: PDF text has headers / footers stripped (services.pdf_text).
+# 3: images are normalised before upload (services.image_prep).
+PROMPT_VERSION = "3"
 
-def _get_groq_client():
-    """Return a cached Groq client, or None if the API key is missing."""
-    global _groq_client
-    if _groq_client is not None:
-        return _groq_client
-    if not Config.GROQ_API_KEY:
-        logger.warning(
-            "GROQ_API_KEY not set — AI extraction unavailable. "
-            "Add it to your .env file."
-        )
-        return None
+# ─── Result cache (lazy singleton) ────────────────────────────────────────────
+
+_cache = None
+
+
+def _get_cache() -> Optional[DiskLRUCache]:
+    """Return the extraction result cache, or None when disabled."""
+    global _cache
+    if _cache is None and Config.EXTRACTION_CACHE:
+        _cache = DiskLRUCache(Config.EXTRACTION_CACHE_FOLDER, Config.EXTRACTION_CACHE_MAX_BYTES)
+    return _cache
+
+
+def cache_stats() -> Optional[dict]:
+    """Hit / miss counters and size of the extraction cache (None if disabled)."""
+    cache = _get_cache()
+    return cache.stats() if cache else None
+
+
+def _cache_key(source: Source, model: str) -> str:
+    digest = hashlib.sha256()
+    if isinstance(source, str):
+        with open(source, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 16), b""):
+                digest.update(block)
+    else:
+        source.seek(0)
+        for block in iter(lambda: source.read(1 << 16), b""):
+            digest.update(block)
+        source.seek(0)
+    return hashlib.sha256(
+        f"{digest.hexdigest()}:{model}:{PROMPT_VERSION}".encode()
+    ).hexdigest()
+
+
+def _cached(source: Source, name: str, model: str, extract) -> Optional[dict]:
+    """Serve *source*'s result from the cache, or run *extract* and store it."""
+    cache = _get_cache()
+    if cache is None:
+        return extract()
     try:
-        from groq import Groq
-        _groq_client = Groq(api_key=Config.GROQ_API_KEY)
-        logger.info("Groq client initialised.")
-    except ImportError:
-        logger.error("groq package not installed. Run: pip install groq")
-    return _groq_client
+        key = _cache_key(source, model)
+    except OSError as exc:
+        logger.error("Could not read %s: %s", name, exc)
+        return None
+    result = cache.get(key)
+    if result is not None:
+        logger.info("Extraction cache hit for %s.", name)
+        return result
+    result = extract()
+    if result is not None:
+        cache.put(key, result)
+    return result
 
 
 # ─── JSON schema sent to the LLM ──────────────────────────────────────────────
@@ -93,70 +150,114 @@ _EXTRACTION_SCHEMA = """{
 # ─── Public entry point ────────────────────────────────────────────────────────
 
 def extract_details_from_file(filepath: str) -> Optional[dict]:
-    """Dispatch extraction to the correct handler based on file extension.
+    """Extract from a file on disk (see :func:`extract_details`)."""
+    return extract_details(filepath, filepath)
+
+
+def extract_details(source: Source, filename: str) -> Optional[dict]:
+    """Dispatch extraction to the correct handler based on *filename*'s extension.
 
     Args:
-        filepath: Absolute path to the uploaded file on disk.
+        source:   Path on disk, or a binary file object (e.g. an upload's
+                  spooled stream) — read in place, never copied to disk.
+        filename: Original file name; only its extension is used.
 
     Returns:
         Structured dict matching the extraction schema, or ``None`` on failure.
     """
-    logger.info("Extracting details from: %s", filepath)
-    ext = filepath.lower()
+    logger.info("Extracting details from: %s", filename)
+    ext = filename.lower()
 
     if ext.endswith(".pdf"):
-        return _extract_pdf(filepath)
+        return _cached(source, filename, TEXT_MODEL, lambda: _extract_pdf(source))
     if ext.endswith((".jpg", ".jpeg", ".png")):
         mime = "image/jpeg" if ext.endswith((".jpg", ".jpeg")) else "image/png"
-        return _extract_image(filepath, mime)
+        return _cached(source, filename, VISION_MODEL, lambda: _extract_image(source, mime))
     if ext.endswith((".xls", ".xlsx")):
-        return _extract_excel(filepath)
+        return _extract_excel(source)
 
-    logger.error("Unsupported file type: %s", filepath)
+    logger.error("Unsupported file type: %s", filename)
     return None
 
 
+def extract_many(
+    files: list[tuple[str, Source]],
+    max_workers: Optional[int] = None,
+) -> list[dict]:
+    """Extract several ``(filename, source)`` files concurrently; results keep the input order.
+
+    PDF, image and Excel files run side by side on a pool of at most
+    *max_workers* threads (default ``EXTRACTION_WORKERS``), so the wall
+    time approaches that of the slowest document.  Groq calls are paced
+    by :mod:`services.groq_client`'s shared rate limiter.
+
+    Returns:
+        One dict per file: ``{"filename", "extracted", "error", "seconds"}``
+        where ``extracted`` is the schema dict or ``None`` on failure.
+    """
+    def _one(item: tuple[str, Source]) -> dict:
+        filename, source = item
+        started = time.perf_counter()
+        try:
+            extracted, error = extract_details(source, filename), None
+        except Exception as exc:
+            logger.error("Extraction failed for %s: %s", filename, exc)
+            extracted, error = None, str(exc)
+        if extracted is None and error is None:
+            error = "No data could be extracted."
+        return {
+            "filename" : filename,
+            "extracted": extracted,
+            "error"    : error,
+            "seconds"  : round(time.perf_counter() - started, 2),
+        }
+
+    if not files:
+        return []
+    workers = min(len(files), max_workers or Config.EXTRACTION_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract") as pool:
+        return list(pool.map(_one, files))
+
+
 # ─── PDF ──────────────────────────────────────────────────────────────────────
 
-def _extract_pdf(filepath: str) -> Optional[dict]:
-    """Extract text from PDF with pdfplumber, then query Groq text model."""
+def _extract_pdf(source: Source) -> Optional[dict]:
+    """Extract text from PDF (see :mod:`services.pdf_text`), then query Groq text model."""
     try:
-        import pdfplumber  # type: ignore
+        text = pdf_text.extract_text(source)
     except ImportError:
         logger.error("pdfplumber not installed. Run: pip install pdfplumber")
         return None
-
-    try:
-        with pdfplumber.open(filepath) as pdf:
-            text = "\n".join(page.extract_text() or "" for page in pdf.pages)
     except Exception as exc:
         logger.error("PDF text extraction failed: %s", exc)
         return None
 
     if not text.strip():
-        logger.error("No text found in PDF: %s", filepath)
+        logger.error("No text found in PDF.")
         return None
 
-    client = _get_groq_client()
-    if client is None:
+    if not groq_client.is_configured():
         return None
 
     prompt = (
         "Extract invoice/bill details from the text below.\n"
         f"Return ONLY a JSON object matching this schema:\n{_EXTRACTION_SCHEMA}\n"
         "Use null for any field not found. Return ONLY valid JSON.\n\n"
-        f"--- DOCUMENT TEXT ---\n{text[:5000]}"
+        f"--- DOCUMENT TEXT ---\n{text}"
     )
 
     try:
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
+        response = groq_client.chat(
+            model=TEXT_MODEL,
             messages=[{"role": "user", "content": prompt}],
             temperature=0,
             max_tokens=2048,
         )
         raw = response.choices[0].message.content.strip()
         return _parse_json_response(raw)
+    except groq_client.GroqUnavailable as exc:
+        logger.warning("Groq unavailable (PDF): %s", exc)
+        return None
     except Exception as exc:
         logger.error("Groq API error (PDF): %s", exc)
         return None
@@ -164,15 +265,13 @@ def _extract_pdf(filepath: str) -> Optional[dict]:
 
 # ─── Image ────────────────────────────────────────────────────────────────────
 
-def _extract_image(filepath: str, mime_type: str) -> Optional[dict]:
-    """Base-64 encode the image and send to Groq's vision model."""
-    client = _get_groq_client()
-    if client is None:
+def _extract_image(source: Source, mime_type: str) -> Optional[dict]:
+    """Normalise the image (see :mod:`services.image_prep`) and send it to Groq's vision model."""
+    if not groq_client.is_configured():
         return None
 
     try:
-        with open(filepath, "rb") as fh:
-            b64 = base64.b64encode(fh.read()).decode("utf-8")
+        image = image_prep.prepare(source, mime_type)
     except OSError as exc:
         logger.error("Could not read image file: %s", exc)
         return None
@@ -184,8 +283,8 @@ def _extract_image(filepath: str, mime_type: str) -> Optional[dict]:
     )
 
     try:
-        response = client.chat.completions.create(
-            model="meta-llama/llama-4-scout-17b-16e-instruct",
+        response = groq_client.chat(
+            model=VISION_MODEL,
             messages=[
                 {
                     "role": "user",
@@ -193,7 +292,7 @@ def _extract_image(filepath: str, mime_type: str) -> Optional[dict]:
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:{mime_type};base64,{b64}"
+                                "url": f"data:{image.mime_type};base64,{image.b64}"
                             },
                         },
                         {"type": "text", "text": prompt},
@@ -205,6 +304,9 @@ def _extract_image(filepath: str, mime_type: str) -> Optional[dict]:
         )
         raw = response.choices[0].message.content.strip()
         return _parse_json_response(raw)
+    except groq_client.GroqUnavailable as exc:
+        logger.warning("Groq unavailable (image): %s", exc)
+        return None
     except Exception as exc:
         logger.error("Groq API error (image): %s", exc)
         return None
@@ -212,7 +314,7 @@ def _extract_image(filepath: str, mime_type: str) -> Optional[dict]:
 
 # ─── Excel ────────────────────────────────────────────────────────────────────
 
-def _extract_excel(filepath: str) -> Optional[dict]:
+def _extract_excel(source: Source) -> Optional[dict]:
     """Parse an Excel file and return the extraction schema dict.
 
     Expected columns (same as the invoice upload template):
@@ -243,7 +345,7 @@ def _extract_excel(filepath: str) -> Optional[dict]:
         return None
 
     try:
-        wb = openpyxl.load_workbook(filepath, data_only=True)
+        wb = openpyxl.load_workbook(source, data_only=True)
         ws = wb.active
     except Exception as exc:
         logger.error("Could not open Excel file: %s", exc)
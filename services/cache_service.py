@@ -0,0 +1,239 @@
+"""
+services.cache_service
+======================
+Process-local caches that stay coherent across gunicorn workers, and a
+small disk-backed LRU store shared by all workers on a host.
+
+Each worker keeps its own copy of a cached value; a :class:`VersionStamp`
+tells it when that copy is stale.  The stamp is a small file in
+``CACHE_FOLDER`` that is atomically replaced on every change, so checking
+it is one ``os.stat`` — no database round trip — and a write in any worker
+is seen by all the others on their next read.
+
+Without :func:`configure` (scripts, one-off shells) stamps are process-local
+only, which is still correct for a single process.
+
+:func:`invalidate_on_commit` ties a :class:`Versioned` value to the models
+it is built from: any commit that inserted, changed or deleted rows of
+those models — through the ORM or a bulk statement — invalidates it.
+
+:class:`DiskLRUCache` keeps JSON values as one file per key and evicts
+the least recently used files once the folder exceeds its byte budget.
+
+Typical usage
+-------------
+::
+
+    _settings = cache_service.Versioned("settings", load_settings)
+
+    value = _settings.get()      # cached until ...
+    _settings.invalidate()       # ... any process calls this
+
+    _summary = cache_service.Versioned("summary", load_summary, ttl=30)
+    cache_service.invalidate_on_commit(_summary, Invoice, Customer)
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_folder: Optional[str] = None
+
+
+def configure(folder: str) -> None:
+    """Store version stamps in *folder* (shared by every worker on the host)."""
+    global _folder
+    os.makedirs(folder, exist_ok=True)
+    _folder = folder
+
+
+class VersionStamp:
+    """A cheap, cross-process "has this changed?" token."""
+
+    def __init__(self, name: str):
+        self.name   = name
+        self._local = 0      # covers bumps in this process when no folder is set
+
+    def _path(self) -> Optional[str]:
+        return os.path.join(_folder, f"{self.name}.stamp") if _folder else None
+
+    def current(self) -> tuple:
+        """Return an opaque token that changes whenever :meth:`bump` is called."""
+        path = self._path()
+        if path is None:
+            return (self._local,)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return (None, self._local)
+        return (st.st_ino, st.st_mtime_ns, self._local)
+
+    def bump(self) -> None:
+        """Mark the stamped data as changed, for this and every other process."""
+        self._local += 1
+        path = self._path()
+        if path is None:
+            return
+        tmp = f"{path}.{uuid.uuid4().hex}"
+        try:
+            with open(tmp, "w") as fh:
+                fh.write(uuid.uuid4().hex)
+            os.replace(tmp, path)      # new inode → new token everywhere
+        except OSError as exc:
+            logger.warning("Could not bump cache stamp %s: %s", self.name, exc)
+
+
+class Versioned(Generic[T]):
+    """One value, reloaded by *loader* whenever its stamp has moved.
+
+    With *ttl* (seconds) the value is also reloaded once it is that old,
+    bounding staleness from writes the stamp does not see.  ``None``
+    results are not cached, so a missing row is looked up again on the
+    next call.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Optional[T]], ttl: Optional[float] = None):
+        self.stamp   = VersionStamp(name)
+        self.ttl     = ttl
+        self._loader = loader
+        self._entry: Optional[tuple] = None     # (token, expires, value)
+        self._lock   = threading.Lock()
+
+    def get(self) -> Optional[T]:
+        token = self.stamp.current()
+        entry = self._entry
+        if entry is not None and entry[0] == token and time.monotonic() < entry[1]:
+            return entry[2]
+        with self._lock:
+            value   = self._loader()
+            expires = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+            self._entry = (token, expires, value) if value is not None else None
+        return value
+
+    def invalidate(self) -> None:
+        self._entry = None
+        self.stamp.bump()
+
+
+# ─── Commit-time invalidation ─────────────────────────────────────────────────
+# Writes mark the session; the stamp is bumped only after commit so other
+# workers never reload from uncommitted data.  A rolled-back change leaves
+# the mark set, which at worst costs one unnecessary reload.
+
+def invalidate_on_commit(target: Versioned, *models: type) -> None:
+    """Invalidate *target* after every commit that wrote rows of *models*.
+
+    ORM changes are seen at flush; bulk ``insert`` / ``update`` /
+    ``delete`` statements on the models are seen when executed.
+    """
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    mark = f"cache_dirty:{target.stamp.name}"
+
+    @event.listens_for(Session, "after_flush")
+    def _track_flush(session, flush_context) -> None:
+        if any(isinstance(obj, models) for obj in session.new | session.deleted) or any(
+            isinstance(obj, models) and session.is_modified(obj) for obj in session.dirty
+        ):
+            session.info[mark] = True
+
+    @event.listens_for(Session, "do_orm_execute")
+    def _track_bulk(state) -> None:
+        if (state.is_insert or state.is_update or state.is_delete) and \
+                state.bind_mapper is not None and issubclass(state.bind_mapper.class_, models):
+            state.session.info[mark] = True
+
+    @event.listens_for(Session, "after_commit")
+    def _invalidate_after_commit(session) -> None:
+        if session.info.pop(mark, False):
+            target.invalidate()
+
+
+class DiskLRUCache:
+    """JSON values on disk, one file per key, evicted least-recently-used first.
+
+    Recency is the file's mtime, refreshed on every hit, so the order is
+    shared by every process using the same *folder*.  Eviction runs after
+    each :meth:`put` and removes the oldest files until the folder is
+    within *max_bytes*.  Hit / miss counters are per process.
+    """
+
+    def __init__(self, folder: str, max_bytes: int):
+        self.folder    = folder
+        self.max_bytes = max_bytes
+        self.hits      = 0
+        self.misses    = 0
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for *key*, or ``None`` on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as fh:
+                value = json.load(fh)
+            os.utime(path)                       # mark as recently used
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store *value* (JSON-serialisable) under *key*, then evict if over budget."""
+        path = self._path(key)
+        tmp  = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(value, fh)
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.warning("Disk cache write failed for %s: %s", key, exc)
+            return
+        self._evict()
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue                 # evicted by another process
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        total   = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self) -> dict:
+        """``{"hits", "misses", "entries", "bytes"}`` for monitoring."""
+        entries = self._entries()
+        return {
+            "hits"   : self.hits,
+            "misses" : self.misses,
+            "entries": len(entries),
+            "bytes"  : sum(size for _, size, _ in entries),
+        }
@@ -0,0 +1,81 @@
+"""
+services.company_service
+========================
+Cached access to the single :class:`~models.Company` row.
+
+Nearly every page and the Excel import need the company's name, address
+and GSTIN.  :func:`get_company` serves them from a per-process snapshot
+that is reloaded only after :func:`invalidate` — called when company
+settings are saved — so ordinary requests make no query for it.
+
+The snapshot is a frozen :class:`CompanyInfo`, not an ORM instance: it is
+shared across requests and sessions, so it must never be modified or
+lazy-load anything.  Edit the row through ``Company.query`` and call
+:func:`invalidate` after the commit.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+from models import Company, db
+from services import cache_service
+
+# Placeholder written to an empty database; edited later on /company.
+DEFAULT_COMPANY = {
+    "name"          : "SRI VASAVI AGENCIES",
+    "address_line_1": "No.54, West Car Street, Villianur, Puducherry-605 110.",
+    "state"         : "Puducherry",
+    "gstin"         : "34AGLPV5711E1ZC",
+    "phone"         : "99436 77409",
+}
+
+
+@dataclass(frozen=True)
+class CompanyInfo:
+    id: int
+    name: str
+    address_line_1: str
+    state: str
+    gstin: str
+    phone: Optional[str]
+
+
+def _load() -> Optional[CompanyInfo]:
+    company = Company.query.first()
+    if company is None:
+        return None
+    return CompanyInfo(
+        id             = company.id,
+        name           = company.name,
+        address_line_1 = company.address_line_1,
+        state          = company.state,
+        gstin          = company.gstin,
+        phone          = company.phone,
+    )
+
+
+_company = cache_service.Versioned("company", _load)
+
+
+def get_company() -> Optional[CompanyInfo]:
+    """Return the company snapshot, or ``None`` if no company row exists."""
+    return _company.get()
+
+
+def invalidate() -> None:
+    """Drop the cached snapshot in every worker (call after saving Company)."""
+    _company.invalidate()
+
+
+def ensure_default_company() -> bool:
+    """Create the placeholder company if none exists; True if one was created.
+
+    Commits when it creates the row.
+    """
+    if db.session.query(Company.id).first() is not None:
+        return False
+    db.session.add(Company(**DEFAULT_COMPANY))
+    db.session.commit()
+    invalidate()
+    return True
@@ -0,0 +1,201 @@
+"""
+services.customer_service
+=========================
+Customer identity: every write path resolves customers here instead of
+blindly inserting a new row.
+
+A customer's identity is ``customer_identity_key(name, gstin)`` — the
+canonical name key plus the GSTIN when there is one — stored in the
+uniquely indexed ``customer.identity_key`` column.  Resolving a customer
+is therefore one indexed lookup, and the unique index stops concurrent
+requests from creating the same customer twice.
+
+:func:`merge_duplicates` folds customers created before the key existed
+(or that differ only in spelling / punctuation) into one survivor per
+identity, re-pointing their invoices and quotations set-based.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from sqlalchemy import case, delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import Customer, Invoice, Quotation, db
+from utils.helpers import customer_identity_key, customer_name_key, normalize_gstin
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of ids bound into one ``IN (...)`` / ``CASE`` statement.
+_BATCH = 500
+
+
+def keys(name: str, gstin: str = "") -> dict:
+    """``{"name_key", "identity_key"}`` column values for a customer."""
+    return {
+        "name_key"    : customer_name_key(name),
+        "identity_key": customer_identity_key(name, gstin),
+    }
+
+
+def find(name: str, gstin: str = "") -> Optional[Customer]:
+    """The customer with this identity, or ``None`` (one unique-index lookup)."""
+    return Customer.query.filter_by(identity_key=customer_identity_key(name, gstin)).first()
+
+
+def resolve_customer(
+    name: str,
+    address: str = "",
+    gstin: str = "",
+    state: str = "",
+    customer_id: Optional[int] = None,
+) -> Customer:
+    """Return the customer for a form / payload, creating it only if new.
+
+    With *customer_id* the chosen customer is updated in place (see
+    :func:`update_customer`).  Otherwise the identity key is looked up and
+    a match gets any non-blank address / state from the form; a miss
+    inserts a new customer.  The session is flushed, so ``.id`` is set.
+
+    Raises:
+        ValueError: Unknown *customer_id*, or an edit that would collide
+                    with another customer's identity.
+    """
+    gstin = normalize_gstin(gstin)
+    if customer_id:
+        customer = db.session.get(Customer, int(customer_id))
+        if not customer:
+            raise ValueError(f"Customer id={customer_id} not found.")
+        update_customer(customer, name, address, gstin, state)
+        return customer
+
+    customer = find(name, gstin)
+    if customer is None:
+        customer = Customer(name=name, address=address, gstin=gstin, state=state,
+                            **keys(name, gstin))
+        try:
+            with db.session.begin_nested():
+                db.session.add(customer)
+                db.session.flush()
+        except IntegrityError:
+            customer = find(name, gstin)    # created concurrently
+            if customer is None:
+                raise
+    if address:
+        customer.address = address
+    if state:
+        customer.state = state
+    db.session.flush()
+    return customer
+
+
+def update_customer(customer: Customer, name: str, address: str, gstin: str, state: str) -> None:
+    """Overwrite *customer*'s details and keys; the caller commits.
+
+    Raises:
+        ValueError: Another customer already has the new identity.
+    """
+    gstin = normalize_gstin(gstin)
+    other = find(name, gstin)
+    if other is not None and other.id != customer.id:
+        raise ValueError(
+            f'Customer "{other.name}"'
+            + (f" ({other.gstin})" if other.gstin else "")
+            + " already exists."
+        )
+    customer.name    = name
+    customer.address = address
+    customer.gstin   = gstin
+    customer.state   = state
+    for column, value in keys(name, gstin).items():
+        setattr(customer, column, value)
+    db.session.flush()
+
+
+# ─── Bulk merge ───────────────────────────────────────────────────────────────
+
+def merge_duplicates(dry_run: bool = False) -> dict:
+    """Merge customers sharing an identity key into the oldest of them.
+
+    Keys are computed in Python (one scan of the customer table); the
+    writes are set-based: one ``UPDATE ... CASE`` per batch for invoices
+    and for quotations, one ``DELETE ... IN`` per batch for the duplicates
+    and one bulk ``UPDATE`` that fills blank survivor fields and stamps
+    every row's keys.  Everything runs in the caller's transaction; the
+    caller commits.
+
+    Returns:
+        ``{"groups": int, "merged": int, "invoices": int, "quotations": int}``
+    """
+    rows = db.session.execute(
+        select(Customer.id, Customer.name, Customer.address, Customer.gstin,
+               Customer.state, Customer.name_key, Customer.identity_key)
+        .order_by(Customer.id)
+    ).all()
+
+    groups: dict[str, list] = {}
+    for row in rows:
+        groups.setdefault(customer_identity_key(row.name, row.gstin or ""), []).append(row)
+
+    remap: dict[int, int] = {}          # duplicate id → survivor id
+    stamps: list[dict] = []             # bulk UPDATE rows for survivors
+    for identity, members in groups.items():
+        survivor, dups = members[0], members[1:]
+        values = {"id": survivor.id}
+        for field in ("address", "state"):
+            if not getattr(survivor, field):
+                filled = next((getattr(d, field) for d in dups if getattr(d, field)), None)
+                if filled:
+                    values[field] = filled
+        new_keys = keys(survivor.name, survivor.gstin or "")
+        if (survivor.name_key, survivor.identity_key) != (new_keys["name_key"], identity):
+            values.update(new_keys)
+        if len(values) > 1:
+            stamps.append(values)
+        for dup in dups:
+            remap[dup.id] = survivor.id
+
+    stats = {
+        "groups"    : sum(1 for m in groups.values() if len(m) > 1),
+        "merged"    : len(remap),
+        "invoices"  : 0,
+        "quotations": 0,
+    }
+    if dry_run:
+        return stats
+
+    dup_ids = list(remap)
+    for start in range(0, len(dup_ids), _BATCH):
+        batch   = dup_ids[start:start + _BATCH]
+        mapping = {i: remap[i] for i in batch}
+        for model, stat in ((Invoice, "invoices"), (Quotation, "quotations")):
+            stats[stat] += db.session.execute(
+                update(model)
+                .where(model.customer_id.in_(batch))
+                .values(customer_id=case(mapping, value=model.customer_id))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+        db.session.execute(
+            delete(Customer).where(Customer.id.in_(batch))
+            .execution_options(synchronize_session=False)
+        )
+
+    # Clear stale keys first so re-stamping can't trip the unique index
+    rekeyed = [s["id"] for s in stamps if "identity_key" in s]
+    for start in range(0, len(rekeyed), _BATCH):
+        db.session.execute(
+            update(Customer)
+            .where(Customer.id.in_(rekeyed[start:start + _BATCH]))
+            .values(identity_key=None)
+            .execution_options(synchronize_session=False)
+        )
+    if stamps:
+        db.session.execute(update(Customer), stamps)
+
+    logger.info(
+        "Customer merge: %d duplicate(s) in %d group(s) merged; %d invoice(s), "
+        "%d quotation(s) re-pointed.",
+        stats["merged"], stats["groups"], stats["invoices"], stats["quotations"],
+    )
+    return stats
@@ -0,0 +1,91 @@
+"""
+services.dashboard_service
+==========================
+Everything the landing page shows, in four statements and behind a
+short-lived cache.
+
+- recent invoices and recent quotations are each one ``SELECT`` joined to
+  the customer (and, for quotations, to the invoice made from them), so
+  the template never lazy-loads a relationship;
+- both table counts come back from one ``SELECT`` of two scalar
+  subqueries;
+- this month's totals are a primary-key lookup in the GST rollup.
+
+The result is cached per worker for ``DASHBOARD_CACHE_TTL`` seconds and
+dropped in every worker as soon as a commit writes invoices, quotations
+or customers, so the dashboard is never staler than the TTL and usually
+exact.  The company card comes from :mod:`services.company_service`.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any
+
+from sqlalchemy import func, select
+
+from config import Config
+from models import Customer, Invoice, Quotation, db
+from services import cache_service, rollup_service
+
+RECENT_LIMIT = 10
+
+
+@dataclass(frozen=True)
+class Dashboard:
+    invoices: tuple          # rows: id, invoice_number, date, grand_total, customer_name
+    quotations: tuple        # rows: id, quotation_number, date, grand_total, customer_name,
+                             #       invoice_id, invoice_number
+    total_invoices: int
+    total_quotations: int
+    month_totals: dict[str, Any]
+
+
+def _load() -> Dashboard:
+    invoices = db.session.execute(
+        select(Invoice.id, Invoice.invoice_number, Invoice.date, Invoice.grand_total,
+               Customer.name.label("customer_name"))
+        .join(Customer, Invoice.customer_id == Customer.id)
+        .order_by(Invoice.date.desc(), Invoice.invoice_number_int.desc())
+        .limit(RECENT_LIMIT)
+    ).all()
+
+    quotations = db.session.execute(
+        select(Quotation.id, Quotation.quotation_number, Quotation.date, Quotation.grand_total,
+               Customer.name.label("customer_name"),
+               Invoice.id.label("invoice_id"), Invoice.invoice_number)
+        .join(Customer, Quotation.customer_id == Customer.id)
+        .outerjoin(Invoice, Invoice.quotation_id == Quotation.id)
+        .order_by(Quotation.date.desc(), Quotation.id.desc())
+        .limit(RECENT_LIMIT)
+    ).all()
+
+    counts = db.session.execute(
+        select(
+            select(func.count()).select_from(Invoice).scalar_subquery().label("invoices"),
+            select(func.count()).select_from(Quotation).scalar_subquery().label("quotations"),
+        )
+    ).one()
+
+    today = date.today()
+    return Dashboard(
+        invoices         = tuple(invoices),
+        quotations       = tuple(quotations),
+        total_invoices   = counts.invoices,
+        total_quotations = counts.quotations,
+        month_totals     = rollup_service.month_totals(today.month, today.year),
+    )
+
+
+_dashboard = cache_service.Versioned("dashboard", _load, ttl=Config.DASHBOARD_CACHE_TTL)
+cache_service.invalidate_on_commit(_dashboard, Invoice, Quotation, Customer)
+
+
+def get_dashboard() -> Dashboard:
+    """The dashboard data, from cache when fresh."""
+    return _dashboard.get()
+
+
+def invalidate() -> None:
+    """Drop the cached dashboard in every worker."""
+    _dashboard.invalidate()
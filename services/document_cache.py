@@ -0,0 +1,117 @@
+"""
+services.document_cache
+=======================
+Rendered invoice and quotation print views, cached on disk.
+
+A saved document rarely changes, yet every preview, print or shared link
+used to load it with its items and customer, spell out the total in words
+and render the whole template.  Instead each view now has a
+:class:`Validator`, built from one primary-key ``SELECT``:
+
+- the document's ``updated_at``, which moves on every edit (stored to
+  the microsecond, so two saves within one second still differ);
+- the customer details printed on it (customers are edited separately);
+- for a quotation, the invoice made from it (the page links to it);
+
+hashed together with the company snapshot and a *revision* of the
+template supplied by the caller.  The ETag therefore changes exactly when
+the rendered page would, and no stamp has to be bumped by hand.
+
+The HTML is stored under its ETag in a
+:class:`~services.cache_service.DiskLRUCache` shared by every worker on
+the host; entries for superseded versions are simply never read again and
+age out.  ``Last-Modified`` is the document's ``updated_at`` (or the
+linked invoice's, if later) — the ETag is the authoritative validator.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from sqlalchemy import select
+
+from config import Config
+from models import Customer, Invoice, Quotation, db
+from services.cache_service import DiskLRUCache
+
+logger = logging.getLogger(__name__)
+
+_cache: Optional[DiskLRUCache] = None
+
+
+@dataclass(frozen=True)
+class Validator:
+    etag: str
+    last_modified: Optional[datetime]      # UTC, whole seconds (HTTP-date precision)
+
+
+def _get_cache() -> Optional[DiskLRUCache]:
+    """Return the rendered-document cache, or None when disabled."""
+    global _cache
+    if _cache is None and Config.DOCUMENT_CACHE:
+        _cache = DiskLRUCache(Config.DOCUMENT_CACHE_FOLDER, Config.DOCUMENT_CACHE_MAX_BYTES)
+    return _cache
+
+
+def cache_stats() -> Optional[dict]:
+    """Hit / miss counters and size of the document cache (None if disabled)."""
+    cache = _get_cache()
+    return cache.stats() if cache else None
+
+
+# ─── Validators ───────────────────────────────────────────────────────────────
+
+_CUSTOMER_COLUMNS = (Customer.name, Customer.address, Customer.gstin, Customer.state)
+
+
+def invoice_validator(invoice_id: int, company, revision: str) -> Optional[Validator]:
+    """Validator for the invoice print view, or ``None`` if there is no such invoice."""
+    row = db.session.execute(
+        select(Invoice.updated_at, *_CUSTOMER_COLUMNS)
+        .join(Customer, Invoice.customer_id == Customer.id)
+        .where(Invoice.id == invoice_id)
+    ).first()
+    if row is None:
+        return None
+    return _validator("invoice", invoice_id, company, revision, tuple(row), row.updated_at)
+
+
+def quotation_validator(quotation_id: int, company, revision: str) -> Optional[Validator]:
+    """Validator for the quotation print view, or ``None`` if there is no such quotation."""
+    row = db.session.execute(
+        select(Quotation.updated_at, *_CUSTOMER_COLUMNS,
+               Invoice.id.label("invoice_id"), Invoice.invoice_number,
+               Invoice.updated_at.label("invoice_updated_at"))
+        .join(Customer, Quotation.customer_id == Customer.id)
+        .outerjoin(Invoice, Invoice.quotation_id == Quotation.id)
+        .where(Quotation.id == quotation_id)
+    ).first()
+    if row is None:
+        return None
+    changed = max(filter(None, (row.updated_at, row.invoice_updated_at)), default=None)
+    return _validator("quotation", quotation_id, company, revision, tuple(row), changed)
+
+
+def _validator(kind: str, doc_id: int, company, revision: str,
+               state: tuple, changed: Optional[datetime]) -> Validator:
+    digest = hashlib.sha1(repr((kind, doc_id, revision, company, state)).encode())
+    if changed is not None:
+        changed = changed.replace(microsecond=0, tzinfo=timezone.utc)
+    return Validator(f"{kind}-{doc_id}-{digest.hexdigest()[:20]}", changed)
+
+
+# ─── Rendering ────────────────────────────────────────────────────────────────
+
+def get_or_render(validator: Validator, render: Callable[[], str]) -> str:
+    """Return the HTML cached under *validator*, calling *render* on a miss."""
+    cache = _get_cache()
+    if cache is None:
+        return render()
+    html = cache.get(validator.etag)
+    if html is None:
+        html = render()
+        cache.put(validator.etag, html)
+    return html
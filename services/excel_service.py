@@ -7,8 +7,9 @@ Responsibilities
 ----------------
 - **Import**   Parse an uploaded ``.xlsx`` / ``.xls`` file and
                upsert Invoice records into the database.
-- **Export**   Build an ``openpyxl`` ``Workbook`` for the GST monthly
-               report (caller turns it into a Flask ``send_file`` response).
+- **Export**   Stream the GST monthly / annual report into a write-only
+               ``openpyxl`` workbook saved straight to a file object
+               (caller turns it into a Flask ``send_file`` response).
 - **Template** Build the blank invoice-upload template workbook.
 
 Required pip package: ``openpyxl``  (``pip install openpyxl``)
@@ -16,12 +17,20 @@ Required pip package: ``openpyxl``  (``pip install openpyxl``)
 from __future__ import annotations
 
 import logging
-from calendar import monthrange
-from datetime import date, datetime
-from typing import Optional
+import time
+from datetime import datetime
+from typing import BinaryIO, Callable, Optional, Union
 
-from models import Company, Customer, Invoice, InvoiceItem, db
-from utils.helpers import get_financial_year, parse_date, safe_float, safe_int
+from sqlalchemy import delete, insert, select, tuple_, update
+
+from models import Customer, Invoice, InvoiceItem, db
+from services import (
+    company_service, customer_service, invoice_service, metrics, report_service,
+    rollup_service,
+)
+from utils.helpers import (
+    get_financial_year, normalize_gstin, parse_date, safe_float, safe_int,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -39,25 +48,48 @@ def _require_openpyxl():
         ) from exc
 
 
-def _header_styles():
-    """Return a dict of re-usable openpyxl style objects."""
-    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side  # type: ignore
-    thin = Side(style="thin")
-    return {
-        "hdr_fill"   : PatternFill(start_color="1E3A8A", end_color="1E3A8A", fill_type="solid"),
-        "hdr_font"   : Font(color="FFFFFF", bold=True, size=10),
-        "total_fill" : PatternFill(start_color="DBEAFE", end_color="DBEAFE", fill_type="solid"),
-        "total_font" : Font(bold=True, size=10),
-        "empty_fill" : PatternFill(start_color="F1F5F9", end_color="F1F5F9", fill_type="solid"),
-        "border"     : Border(left=thin, right=thin, top=thin, bottom=thin),
-        "center"     : Alignment(horizontal="center", vertical="center"),
-        "right"      : Alignment(horizontal="right"),
-    }
+def _gst_named_styles():
+    """Return the named styles used by the GST report.
+
+    Registered once per workbook, so every cell carries a style *name*
+    instead of its own copies of fill / font / border objects.
+    """
+    from openpyxl.styles import (  # type: ignore
+        Alignment, Border, Font, NamedStyle, PatternFill, Side,
+    )
+    thin   = Side(style="thin")
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+
+    def fill(color):
+        return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+    return [
+        NamedStyle(name="gst_header", fill=fill("1E3A8A"), border=border,
+                   font=Font(color="FFFFFF", bold=True, size=10),
+                   alignment=Alignment(horizontal="center", vertical="center")),
+        NamedStyle(name="gst_cell",   border=border),
+        NamedStyle(name="gst_amount", border=border, alignment=Alignment(horizontal="right")),
+        NamedStyle(name="gst_gap",    border=border, fill=fill("F1F5F9")),
+        NamedStyle(name="gst_total",  border=border, fill=fill("DBEAFE"),
+                   font=Font(bold=True, size=10)),
+    ]
 
 
 # ─── Excel import ─────────────────────────────────────────────────────────────
 
-def import_invoices(filepath: str) -> dict:
+# Invoices per committed chunk when importing in streaming mode.
+IMPORT_CHUNK_SIZE = 200
+
+# Maximum number of values bound into one ``IN (...)`` clause.
+_IN_BATCH = 500
+
+
+def import_invoices(
+    source: Union[str, BinaryIO],
+    streaming: bool = False,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    progress: Optional[Callable[[int], None]] = None,
+) -> dict:
     """Parse an Excel file and upsert Invoice records.
 
     Column layout (row 1 = header, row 2+ = data):
@@ -82,279 +114,576 @@ def import_invoices(filepath: str) -> dict:
     An existing invoice with the same number + financial year is **updated**;
     otherwise a new invoice is **created**.
 
+    Two modes are available:
+
+    - **Full** (default) — the whole sheet is grouped in memory and
+      committed in a single transaction; any error undoes the import.
+    - **Streaming** — the workbook is opened ``read_only`` and rows are
+      grouped into chunks of *chunk_size* invoices.  Each chunk commits on
+      its own, so peak memory is bounded by the chunk size rather than the
+      file size, and a failing chunk is rolled back and counted in
+      ``failed`` without undoing the chunks before or after it.  Rows of an
+      invoice that reappear after its chunk was committed are appended to
+      that invoice.
+
+    In both modes each batch is written set-based by :func:`_write_invoices`
+    (a handful of ``IN (...)`` lookups and executemany inserts), so the
+    import cost grows with row count rather than per-invoice round trips.
+
     Args:
-        filepath: Absolute path to the ``.xlsx`` / ``.xls`` file.
+        source:     Path to the ``.xlsx`` / ``.xls`` file, or a binary file
+                    object such as an upload's spooled stream.
+        streaming:  Use the bounded-memory chunked mode.
+        chunk_size: Invoices per chunk in streaming mode.
+        progress:   Optional callback receiving the number of invoices
+                    processed so far, called after every committed batch.
 
     Returns:
-        ``{"created": int, "updated": int, "skipped": int}``
+        ``{"created": int, "updated": int, "skipped": int, "appended": int,
+        "failed": int}`` — ``appended`` counts rows added (streaming mode) to
+        an invoice an earlier chunk already wrote.
     """
     openpyxl = _require_openpyxl()
 
-    company = Company.query.first()
+    company = company_service.get_company()
     company_prefix = company.gstin[:2] if company and company.gstin else "34"
 
     try:
-        wb = openpyxl.load_workbook(filepath, data_only=True)
+        wb = openpyxl.load_workbook(source, read_only=streaming, data_only=True)
         ws = wb.active
     except Exception as exc:
         raise ValueError(f"Cannot open Excel file: {exc}") from exc
 
-    # ── Group rows by invoice number ─────────────────────────────────────────
+    result    = {"created": 0, "updated": 0, "skipped": 0, "appended": 0, "failed": 0}
+    started   = time.perf_counter()
+    rows_read = 0
+
+    def _rows():
+        nonlocal rows_read
+        for row in ws.iter_rows(min_row=2, values_only=True):
+            rows_read += 1
+            yield row
+
+    rows = _rows()
+
+    try:
+        if not streaming:
+            counts = _write_invoices(_group_invoice_rows(rows), company_prefix)
+            db.session.commit()
+            for key in ("created", "updated", "skipped", "appended"):
+                result[key] += counts[key]
+            if progress:
+                progress(sum(counts.values()))
+        else:
+            committed: set[tuple[str, int]] = set()  # (FY, number) written by earlier chunks
+            done = 0
+            for chunk in _iter_invoice_chunks(rows, chunk_size):
+                _import_chunk(chunk, company_prefix, committed, result)
+                done += len(chunk)
+                if progress:
+                    progress(done)
+    finally:
+        if streaming:
+            wb.close()  # read-only workbooks keep the file handle open
+
+    elapsed = time.perf_counter() - started
+    metrics.observe_import(rows_read, elapsed, "streaming" if streaming else "full")
+    logger.info(
+        "Excel import: %d created, %d updated, %d appended, %d skipped, %d failed; "
+        "%d rows in %.1fs.",
+        result["created"], result["updated"], result["appended"], result["skipped"],
+        result["failed"], rows_read, elapsed,
+    )
+    return result
+
+
+def _parse_row(row) -> Optional[tuple[int, dict, Optional[dict]]]:
+    """Split one sheet row into ``(invoice_no, header_fields, item_or_None)``.
+
+    Returns ``None`` for blank rows and rows without a numeric Invoice No.
+    """
+    if not any(row):
+        return None
+    row = tuple(row) + (None,) * (11 - len(row))  # read-only rows may be short
+    try:
+        inv_num = int(float(str(row[0]).strip()))
+    except (ValueError, TypeError):
+        return None
+
+    header = {
+        "date"           : parse_date(row[1]),
+        "customer_name"  : str(row[2] or "").strip(),
+        "customer_gstin" : str(row[3] or "").strip(),
+        "customer_state" : str(row[4] or "").strip(),
+        "place_of_supply": str(row[5] or "").strip(),
+        "items"          : [],
+    }
+    item = None
+    desc = str(row[6] or "").strip()
+    if desc:
+        item = {
+            "description": desc,
+            "qty"        : safe_int(row[7],    1),
+            "rate"       : safe_float(row[8],  0.0),
+            "unit"       : str(row[9]  or "NOS").strip() or "NOS",
+            "gst_rate"   : safe_float(row[10], 18.0),
+        }
+    return inv_num, header, item
+
+
+def _group_invoice_rows(rows) -> dict[int, dict]:
+    """Group every row of the sheet by invoice number (full mode)."""
     invoice_rows: dict[int, dict] = {}
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        if not any(row):
+    for row in rows:
+        parsed = _parse_row(row)
+        if parsed is None:
             continue
-        try:
-            inv_num = int(float(str(row[0]).strip()))
-        except (ValueError, TypeError):
+        inv_num, header, item = parsed
+        data = invoice_rows.setdefault(inv_num, header)
+        if item:
+            data["items"].append(item)
+    return invoice_rows
+
+
+def _iter_invoice_chunks(rows, chunk_size: int):
+    """Yield ``{invoice_no: data}`` dicts holding at most *chunk_size* invoices.
+
+    A chunk is closed only when a row for a *new* invoice arrives, so the
+    contiguous rows of one invoice always land in the same chunk.
+    """
+    chunk: dict[int, dict] = {}
+    for row in rows:
+        parsed = _parse_row(row)
+        if parsed is None:
             continue
+        inv_num, header, item = parsed
+        if inv_num not in chunk and len(chunk) >= chunk_size:
+            yield chunk
+            chunk = {}
+        data = chunk.setdefault(inv_num, header)
+        if item:
+            data["items"].append(item)
+    if chunk:
+        yield chunk
+
+
+def _import_chunk(
+    chunk: dict[int, dict],
+    company_prefix: str,
+    committed: set[tuple[str, int]],
+    result: dict,
+) -> None:
+    """Write and commit one streaming chunk; roll back only this chunk on error."""
+    try:
+        counts = _write_invoices(chunk, company_prefix, committed)
+        db.session.commit()
+    except Exception as exc:
+        db.session.rollback()
+        logger.error(
+            "Excel import: chunk of %d invoices (%s–%s) rolled back: %s",
+            len(chunk), min(chunk), max(chunk), exc,
+        )
+        result["failed"] += len(chunk)
+        return
+    finally:
+        db.session.expunge_all()  # keep the identity map from growing across chunks
+
+    # Numbers restart every April, so an invoice is its (FY, number) pair.
+    committed.update(
+        (get_financial_year(data["date"]), inv_num)
+        for inv_num, data in chunk.items() if data["customer_name"]
+    )
+    for key in ("created", "updated", "skipped", "appended"):
+        result[key] += counts[key]
 
-        if inv_num not in invoice_rows:
-            invoice_rows[inv_num] = {
-                "date"          : parse_date(row[1]),
-                "customer_name" : str(row[2] or "").strip(),
-                "customer_gstin": str(row[3] or "").strip(),
-                "customer_state": str(row[4] or "").strip(),
-                "place_of_supply": str(row[5] or "").strip(),
-                "items"         : [],
-            }
-
-        desc = str(row[6] or "").strip()
-        if desc:
-            invoice_rows[inv_num]["items"].append({
-                "description": desc,
-                "qty"        : safe_int(row[7],    1),
-                "rate"       : safe_float(row[8],  0.0),
-                "unit"       : str(row[9]  or "NOS").strip() or "NOS",
-                "gst_rate"   : safe_float(row[10], 18.0),
-            })
 
-    created = updated = skipped = 0
+def _write_invoices(
+    groups: dict[int, dict],
+    company_prefix: str,
+    committed: Optional[set[tuple[str, int]]] = None,
+) -> dict:
+    """Upsert a batch of grouped invoices with a fixed number of statements.
+
+    Instead of querying and flushing per invoice, the batch is written
+    set-based:
+
+    1. one ``IN (...)`` lookup of customer identity keys (unique index),
+       plus one executemany ``INSERT`` for the missing ones;
+    2. one ``IN (...)`` lookup for existing ``(financial_year, number)`` pairs;
+    3. executemany ``INSERT`` for new headers and a bulk ``UPDATE`` by
+       primary key for existing ones;
+    4. one ``DELETE ... IN (...)`` for replaced items and one executemany
+       ``INSERT`` for all new items;
+    5. one counter bump per financial year touched, and one GST rollup
+       ``UPDATE`` per (month, tax type, rate) touched.
+
+    The number of round trips therefore depends on the batch size (via
+    :data:`_IN_BATCH`), not on the number of invoices.  The caller commits.
+
+    Args:
+        groups:         ``{invoice_no: data}`` as built by the row parsers.
+        company_prefix: First two digits of the company GSTIN.
+        committed:      ``(financial_year, number)`` keys written by earlier
+                        chunks of the same import; their rows are appended,
+                        not replaced.
+
+    Returns:
+        ``{"created": int, "updated": int, "skipped": int, "appended": int}``
+    """
+    committed = committed or set()
+    counts = {"created": 0, "updated": 0, "skipped": 0, "appended": 0}
 
-    for inv_num, data in invoice_rows.items():
+    # ── Compute headers, items and totals in Python ──────────────────────────
+    prepared: dict[tuple[str, int], dict] = {}
+    for inv_num, data in groups.items():
         if not data["customer_name"]:
             logger.warning("Skipping invoice %s — no customer name.", inv_num)
-            skipped += 1
+            counts["skipped"] += 1
             continue
+        fy = get_financial_year(data["date"])
+        prepared[(fy, inv_num)] = _prepare_invoice(inv_num, fy, data, company_prefix)
+
+    if not prepared:
+        return counts
+
+    customer_ids = _resolve_customer_ids(
+        {p["customer"]["identity_key"]: p["customer"] for p in prepared.values()}
+    )
 
-        # Find or create customer
-        customer = Customer.query.filter(
-            Customer.name.ilike(data["customer_name"])
-        ).first()
-        if not customer:
-            customer = Customer(
-                name    = data["customer_name"],
-                gstin   = data["customer_gstin"],
-                state   = data["customer_state"],
-                address = data["customer_state"],
+    # ── Existing invoices ────────────────────────────────────────────────────
+    existing: dict[tuple[str, int], tuple] = {}
+    for batch in _batched(list(prepared)):
+        rows = db.session.execute(
+            select(
+                Invoice.id, Invoice.financial_year, Invoice.invoice_number_int,
+                Invoice.total_basic, Invoice.total_cgst, Invoice.total_sgst,
+                Invoice.total_igst, Invoice.total_gst, Invoice.grand_total,
+                Invoice.date, Invoice.is_intra_state, Invoice.percentage_cgst,
+                Invoice.percentage_sgst, Invoice.percentage_igst,
+            ).where(tuple_(Invoice.financial_year, Invoice.invoice_number_int).in_(batch))
+        )
+        for row in rows:
+            existing[(row.financial_year, row.invoice_number_int)] = row
+
+    # ── Headers ──────────────────────────────────────────────────────────────
+    new_headers: list[dict] = []
+    header_updates: list[dict] = []
+    replaced: list = []
+    appended: set[tuple[str, int]] = set()
+    rollup_deltas: list = []
+
+    for key, p in prepared.items():
+        header = dict(p["header"], customer_id=customer_ids[p["customer"]["identity_key"]])
+        old = existing.get(key)
+        if old is None:
+            new_headers.append(header)
+            counts["created"] += 1
+        elif key in committed:
+            t = p["totals"]
+            grand_total = round(old.grand_total + t["basic"] + t["gst"], 2)
+            header_updates.append({
+                "id"         : old.id,
+                "total_basic": old.total_basic + t["basic"],
+                "total_cgst" : old.total_cgst  + t["cgst"],
+                "total_sgst" : old.total_sgst  + t["sgst"],
+                "total_igst" : old.total_igst  + t["igst"],
+                "total_gst"  : old.total_gst   + t["gst"],
+                "grand_total": grand_total,
+            })
+            rollup_deltas += rollup_service.item_deltas(
+                old.date, old.is_intra_state, p["items"], count=0,
             )
-            db.session.add(customer)
-            db.session.flush()
-
-        inv_date = data["date"]
-        fy       = get_financial_year(inv_date)
-        fmt_num  = f"{fy}/{str(inv_num).zfill(3)}"
-        is_intra = bool(
-            data["customer_gstin"]
-            and data["customer_gstin"][:2] == company_prefix
+            appended.add(key)
+            counts["appended"] += 1
+        else:
+            for col in ("invoice_number", "percentage_cgst", "percentage_sgst", "percentage_igst"):
+                header.pop(col)  # keep the stored number format and tax rates
+            header_updates.append(dict(header, id=old.id))
+            replaced.append(old)
+            counts["updated"] += 1
+
+    if new_headers:
+        db.session.execute(insert(Invoice), new_headers)
+    if header_updates:
+        db.session.execute(update(Invoice), header_updates)
+
+    invoice_ids = {key: row.id for key, row in existing.items()}
+    new_keys = [k for k in prepared if k not in existing]
+    for batch in _batched(new_keys):
+        rows = db.session.execute(
+            select(Invoice.id, Invoice.financial_year, Invoice.invoice_number_int)
+            .where(tuple_(Invoice.financial_year, Invoice.invoice_number_int).in_(batch))
         )
-
-        # Build line items + totals
-        item_rows = data["items"] or [
-            {"description": "General Supply", "qty": 1, "rate": 0.0, "unit": "NOS", "gst_rate": 18.0}
-        ]
-        total_basic = total_cgst = total_sgst = total_igst = 0.0
-        inv_items: list[InvoiceItem] = []
-
-        for it in item_rows:
-            basic = round(it["qty"] * it["rate"], 2)
-            gst   = round(basic * it["gst_rate"] / 100, 2)
-            cgst  = round(gst / 2, 2) if is_intra else 0.0
-            sgst  = round(gst / 2, 2) if is_intra else 0.0
-            igst  = gst if not is_intra else 0.0
-            total_basic += basic
-            total_cgst  += cgst
-            total_sgst  += sgst
-            total_igst  += igst
-            inv_items.append(InvoiceItem(
-                description  = it["description"],
-                qty          = it["qty"],
-                rate         = it["rate"],
-                unit         = it["unit"],
-                gst_rate     = it["gst_rate"],
-                basic_amount = basic,
-                cgst_amount  = cgst,
-                sgst_amount  = sgst,
-                igst_amount  = igst,
-                gst_amount   = gst,
-                total_amount = basic + gst,
-            ))
-
-        total_gst   = total_cgst + total_sgst + total_igst
-        grand_total = round(total_basic + total_gst, 2)
-
-        existing = Invoice.query.filter_by(
-            invoice_number_int=inv_num, financial_year=fy
-        ).first()
-
-        if existing:
-            existing.date            = inv_date
-            existing.customer_id     = customer.id
-            existing.place_of_supply = data["place_of_supply"]
-            existing.total_basic     = total_basic
-            existing.total_cgst      = total_cgst
-            existing.total_sgst      = total_sgst
-            existing.total_igst      = total_igst
-            existing.total_gst       = total_gst
-            existing.grand_total     = grand_total
-            existing.is_intra_state  = is_intra
-            InvoiceItem.query.filter_by(invoice_id=existing.id).delete()
-            for it in inv_items:
-                it.invoice_id = existing.id
-                db.session.add(it)
-            updated += 1
+        for row in rows:
+            invoice_ids[(row.financial_year, row.invoice_number_int)] = row.id
+
+    # ── Items ────────────────────────────────────────────────────────────────
+    rollup_deltas += rollup_service.stored_deltas(replaced, -1)   # before the DELETE
+    for batch in _batched([old.id for old in replaced]):
+        db.session.execute(delete(InvoiceItem).where(InvoiceItem.invoice_id.in_(batch)))
+
+    # Only a created or replaced invoice gets the placeholder — never rows
+    # appended to an invoice an earlier chunk already wrote.
+    item_rows = []
+    for key, p in prepared.items():
+        if key in appended:
+            items = p["items"]
         else:
-            invoice = Invoice(
-                invoice_number     = fmt_num,
-                invoice_number_int = inv_num,
-                date               = inv_date,
-                financial_year     = fy,
-                customer_id        = customer.id,
-                place_of_supply    = data["place_of_supply"],
-                total_basic        = total_basic,
-                total_cgst         = total_cgst,
-                total_sgst         = total_sgst,
-                total_igst         = total_igst,
-                total_gst          = total_gst,
-                grand_total        = grand_total,
-                percentage_cgst    = 9.0  if is_intra else 0.0,
-                percentage_sgst    = 9.0  if is_intra else 0.0,
-                percentage_igst    = 0.0  if is_intra else 18.0,
-                is_intra_state     = is_intra,
+            items = p["items"] or [_PLACEHOLDER_ITEM]
+            h = p["header"]
+            rollup_deltas += rollup_service.item_deltas(h["date"], h["is_intra_state"], items)
+        item_rows += [dict(item, invoice_id=invoice_ids[key]) for item in items]
+    if item_rows:
+        db.session.execute(insert(InvoiceItem), item_rows)
+
+    # Keep the per-FY number allocator ahead of the imported numbers
+    highest: dict[str, int] = {}
+    for fy, inv_num in prepared:
+        highest[fy] = max(inv_num, highest.get(fy, 0))
+    for fy, inv_num in highest.items():
+        invoice_service.bump_invoice_counter(fy, inv_num)
+
+    rollup_service.apply(rollup_deltas)
+    return counts
+
+
+# Placeholder line for an invoice whose rows carry no item description; it
+# is zero-valued, so the totals are the same with or without it.
+_PLACEHOLDER_ITEM = {
+    "description" : "General Supply",
+    "qty"         : 1,
+    "rate"        : 0.0,
+    "unit"        : "NOS",
+    "gst_rate"    : 18.0,
+    "basic_amount": 0.0,
+    "cgst_amount" : 0.0,
+    "sgst_amount" : 0.0,
+    "igst_amount" : 0.0,
+    "gst_amount"  : 0.0,
+    "total_amount": 0.0,
+}
+
+
+def _prepare_invoice(inv_num: int, fy: str, data: dict, company_prefix: str) -> dict:
+    """Compute the header values, item rows and totals for one invoice."""
+    is_intra = bool(
+        data["customer_gstin"]
+        and data["customer_gstin"][:2] == company_prefix
+    )
+    item_rows = data["items"]
+
+    total_basic = total_cgst = total_sgst = total_igst = 0.0
+    items: list[dict] = []
+    for it in item_rows:
+        basic = round(it["qty"] * it["rate"], 2)
+        gst   = round(basic * it["gst_rate"] / 100, 2)
+        cgst  = round(gst / 2, 2) if is_intra else 0.0
+        sgst  = round(gst / 2, 2) if is_intra else 0.0
+        igst  = gst if not is_intra else 0.0
+        total_basic += basic
+        total_cgst  += cgst
+        total_sgst  += sgst
+        total_igst  += igst
+        items.append({
+            "description" : it["description"],
+            "qty"         : it["qty"],
+            "rate"        : it["rate"],
+            "unit"        : it["unit"],
+            "gst_rate"    : it["gst_rate"],
+            "basic_amount": basic,
+            "cgst_amount" : cgst,
+            "sgst_amount" : sgst,
+            "igst_amount" : igst,
+            "gst_amount"  : gst,
+            "total_amount": basic + gst,
+        })
+
+    total_gst   = total_cgst + total_sgst + total_igst
+    grand_total = round(total_basic + total_gst, 2)
+
+    return {
+        "customer": {
+            "name"   : data["customer_name"],
+            "gstin"  : normalize_gstin(data["customer_gstin"]),
+            "state"  : data["customer_state"],
+            "address": data["customer_state"],
+            **customer_service.keys(data["customer_name"], data["customer_gstin"]),
+        },
+        "header": {
+            "invoice_number"    : f"{fy}/{str(inv_num).zfill(3)}",
+            "invoice_number_int": inv_num,
+            "date"              : data["date"],
+            "financial_year"    : fy,
+            "place_of_supply"   : data["place_of_supply"],
+            "total_basic"       : total_basic,
+            "total_cgst"        : total_cgst,
+            "total_sgst"        : total_sgst,
+            "total_igst"        : total_igst,
+            "total_gst"         : total_gst,
+            "grand_total"       : grand_total,
+            "percentage_cgst"   : 9.0  if is_intra else 0.0,
+            "percentage_sgst"   : 9.0  if is_intra else 0.0,
+            "percentage_igst"   : 0.0  if is_intra else 18.0,
+            "is_intra_state"    : is_intra,
+        },
+        "items" : items,
+        "totals": {
+            "basic": total_basic, "cgst": total_cgst, "sgst": total_sgst,
+            "igst" : total_igst,  "gst" : total_gst,
+        },
+    }
+
+
+def _resolve_customer_ids(wanted: dict[str, dict]) -> dict[str, int]:
+    """Map customer identity keys to ids, bulk-inserting missing customers.
+
+    Args:
+        wanted: ``{identity_key: customer_fields}`` for every customer in the batch.
+    """
+    ids: dict[str, int] = {}
+
+    def _lookup(keys: list[str]) -> None:
+        for batch in _batched(keys):
+            rows = db.session.execute(
+                select(Customer.id, Customer.identity_key)
+                .where(Customer.identity_key.in_(batch))
             )
-            db.session.add(invoice)
-            db.session.flush()
-            for it in inv_items:
-                it.invoice_id = invoice.id
-                db.session.add(it)
-            created += 1
+            for row in rows:
+                ids[row.identity_key] = row.id
+
+    _lookup(list(wanted))
+    missing = [key for key in wanted if key not in ids]
+    if missing:
+        db.session.execute(insert(Customer), [wanted[key] for key in missing])
+        _lookup(missing)
+    return ids
 
-    db.session.commit()
-    logger.info("Excel import: %d created, %d updated, %d skipped.", created, updated, skipped)
-    return {"created": created, "updated": updated, "skipped": skipped}
+
+def _batched(values: list, size: Optional[int] = None):
+    """Yield *values* in slices of at most *size* (default :data:`_IN_BATCH`)."""
+    size = size or _IN_BATCH
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
 
 
 # ─── GST report workbook ──────────────────────────────────────────────────────
 
-def build_gst_report_workbook(month: int, year: int):
-    """Build and return an ``openpyxl.Workbook`` for the GST monthly report.
+_GST_HEADERS = [
+    "Bill No.", "Date", "Customer Name", "GSTIN", "Place of Supply",
+    "Taxable Value", "CGST %", "CGST Amt", "SGST %", "SGST Amt",
+    "IGST %", "IGST Amt", "Total Value",
+]
+_GST_WIDTHS         = [14, 12, 28, 18, 16, 14, 8, 12, 8, 12, 8, 12, 14]
+_GST_AMOUNT_COLUMNS = {5, 7, 9, 11, 12}          # 0-based, right-aligned
+
+
+def write_gst_report(
+    out,
+    month: Optional[int] = None,
+    year:  Optional[int] = None,
+    fy:    Optional[str] = None,
+) -> str:
+    """Write the GST report workbook to *out* and return its download name.
 
-    Fills invoice rows in sequential bill-number order.  Missing numbers
-    in the range appear as greyed-out placeholder rows.
+    Covers one month (*month* / *year*) or, when *fy* (e.g. ``"25-26"``) is
+    given, the whole financial year.  Invoice rows are listed in sequential
+    bill-number order; missing numbers appear as greyed-out placeholder rows.
+
+    The workbook is ``write_only``: rows are streamed from
+    :func:`services.report_service.iter_gst_rows` and flushed to openpyxl's
+    temp storage as they are appended, and every cell references a named
+    style.  Memory stays flat however many invoices the period holds.
 
     Args:
+        out:   A path or a writable, seekable binary file object
+               (e.g. a ``SpooledTemporaryFile``).
         month: 1–12
         year:  e.g. 2025
+        fy:    Financial year; overrides *month* / *year*.
 
     Returns:
-        An ``openpyxl.Workbook`` ready to be streamed to the client.
+        The suggested ``.xlsx`` file name for the download.
     """
     openpyxl = _require_openpyxl()
-    s = _header_styles()
-
-    from_date = date(year, month, 1)
-    to_date   = date(year, month, monthrange(year, month)[1])
-
-    invoices = (
-        Invoice.query
-        .filter(Invoice.date >= from_date, Invoice.date <= to_date)
-        .order_by(Invoice.invoice_number_int)
-        .all()
-    )
-
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = datetime(year, month, 1).strftime("GST %b %Y")
-
-    headers = [
-        "Bill No.", "Date", "Customer Name", "GSTIN", "Place of Supply",
-        "Taxable Value", "CGST %", "CGST Amt", "SGST %", "SGST Amt",
-        "IGST %", "IGST Amt", "Total Value",
-    ]
-    for col, h in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=h)
-        cell.fill      = s["hdr_fill"]
-        cell.font      = s["hdr_font"]
-        cell.alignment = s["center"]
-        cell.border    = s["border"]
-
-    row_idx = 2
-    if invoices:
-        min_num  = invoices[0].invoice_number_int
-        max_num  = invoices[-1].invoice_number_int
-        inv_map  = {inv.invoice_number_int: inv for inv in invoices}
-        fy       = invoices[0].financial_year
-
-        for num in range(min_num, max_num + 1):
-            if num in inv_map:
-                inv = inv_map[num]
-                row_data = [
-                    inv.invoice_number,
-                    inv.date.strftime("%d-%m-%Y"),
-                    inv.customer.name,
-                    inv.customer.gstin or "",
-                    inv.place_of_supply or "",
-                    round(inv.total_basic, 2),
-                    inv.percentage_cgst if inv.is_intra_state else 0,
-                    round(inv.total_cgst, 2),
-                    inv.percentage_sgst if inv.is_intra_state else 0,
-                    round(inv.total_sgst, 2),
-                    inv.percentage_igst if not inv.is_intra_state else 0,
-                    round(inv.total_igst, 2),
-                    round(inv.grand_total, 2),
-                ]
-                for col, val in enumerate(row_data, 1):
-                    cell           = ws.cell(row=row_idx, column=col, value=val)
-                    cell.border    = s["border"]
-                    if col in (6, 8, 10, 12, 13):
-                        cell.alignment = s["right"]
-            else:
-                fmt = f"{fy}/{str(num).zfill(3)}"
-                for col in range(1, 14):
-                    cell        = ws.cell(row=row_idx, column=col,
-                                          value=(fmt if col == 1 else ""))
-                    cell.fill   = s["empty_fill"]
-                    cell.border = s["border"]
-
-            row_idx += 1
-
-    # Totals row
-    total_row = [
+    from openpyxl.cell import WriteOnlyCell  # type: ignore
+    from openpyxl.utils import get_column_letter  # type: ignore
+
+    if fy:
+        from_date, to_date = report_service.fy_bounds(fy)
+        title    = f"GST FY {fy}"
+        filename = f"GST_Report_FY_{fy}.xlsx"
+    else:
+        from_date, to_date = report_service.month_bounds(month, year)
+        title    = datetime(year, month, 1).strftime("GST %b %Y")
+        filename = datetime(year, month, 1).strftime("GST_Report_%B_%Y.xlsx")
+
+    wb = openpyxl.Workbook(write_only=True)
+    for style in _gst_named_styles():
+        wb.add_named_style(style)
+    ws = wb.create_sheet(title)
+    for i, w in enumerate(_GST_WIDTHS, 1):
+        ws.column_dimensions[get_column_letter(i)].width = w
+
+    def styled(values, style_for):
+        row = []
+        for col, val in enumerate(values):
+            cell       = WriteOnlyCell(ws, value=val)
+            cell.style = style_for(col)
+            row.append(cell)
+        return row
+
+    ws.append(styled(_GST_HEADERS, lambda col: "gst_header"))
+
+    def cell_style(col):
+        return "gst_amount" if col in _GST_AMOUNT_COLUMNS else "gst_cell"
+
+    for entry in report_service.with_gaps(report_service.iter_gst_rows(from_date, to_date)):
+        if entry["empty"]:
+            ws.append(styled([entry["formatted"]] + [""] * 12, lambda col: "gst_gap"))
+            continue
+        inv = entry["invoice"]
+        ws.append(styled([
+            inv.invoice_number,
+            inv.date.strftime("%d-%m-%Y"),
+            inv.customer_name,
+            inv.customer_gstin or "",
+            inv.place_of_supply or "",
+            round(inv.total_basic, 2),
+            inv.percentage_cgst if inv.is_intra_state else 0,
+            round(inv.total_cgst, 2),
+            inv.percentage_sgst if inv.is_intra_state else 0,
+            round(inv.total_sgst, 2),
+            inv.percentage_igst if not inv.is_intra_state else 0,
+            round(inv.total_igst, 2),
+            round(inv.grand_total, 2),
+        ], cell_style))
+
+    totals = rollup_service.fy_totals(fy) if fy else rollup_service.month_totals(month, year)
+    ws.append(styled([
         "TOTAL", "", "", "", "",
-        round(sum(i.total_basic  for i in invoices), 2),
+        round(totals["basic"], 2),
         "",
-        round(sum(i.total_cgst   for i in invoices), 2),
+        round(totals["cgst"], 2),
         "",
-        round(sum(i.total_sgst   for i in invoices), 2),
+        round(totals["sgst"], 2),
         "",
-        round(sum(i.total_igst   for i in invoices), 2),
-        round(sum(i.grand_total  for i in invoices), 2),
-    ]
-    for col, val in enumerate(total_row, 1):
-        cell        = ws.cell(row=row_idx, column=col, value=val)
-        cell.fill   = s["total_fill"]
-        cell.font   = s["total_font"]
-        cell.border = s["border"]
-
-    # Column widths
-    for i, w in enumerate([14, 12, 28, 18, 16, 14, 8, 12, 8, 12, 8, 12, 14], 1):
-        ws.column_dimensions[ws.cell(row=1, column=i).column_letter].width = w
+        round(totals["igst"], 2),
+        round(totals["total"], 2),
+    ], lambda col: "gst_total"))
 
-    return wb
+    wb.save(out)
+    return filename
 
 
 # ─── Upload template workbook ─────────────────────────────────────────────────
 
+UPLOAD_TEMPLATE_HEADERS = [
+    "Invoice No*", "Date* (YYYY-MM-DD)", "Customer Name*",
+    "Customer GSTIN", "Customer State", "Place of Supply",
+    "Item Description*", "Qty*", "Rate*", "Unit", "GST Rate (%)",
+]
+
+
 def build_upload_template_workbook():
     """Return a pre-formatted ``openpyxl.Workbook`` for the invoice upload template.
 
@@ -371,14 +700,9 @@ def build_upload_template_workbook():
     ws = wb.active
     ws.title = "Invoice Template"
 
-    headers = [
-        "Invoice No*", "Date* (YYYY-MM-DD)", "Customer Name*",
-        "Customer GSTIN", "Customer State", "Place of Supply",
-        "Item Description*", "Qty*", "Rate*", "Unit", "GST Rate (%)",
-    ]
     hdr_fill = PatternFill(start_color="2563EB", end_color="2563EB", fill_type="solid")
     hdr_font = Font(color="FFFFFF", bold=True)
-    for col, h in enumerate(headers, 1):
+    for col, h in enumerate(UPLOAD_TEMPLATE_HEADERS, 1):
         cell           = ws.cell(row=1, column=col, value=h)
         cell.fill      = hdr_fill
         cell.font      = hdr_font
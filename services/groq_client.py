@@ -0,0 +1,295 @@
+"""
+services.groq_client
+====================
+The one place the app talks to Groq.
+
+:func:`chat` wraps ``client.chat.completions.create`` with:
+
+- **Deadlines** — each attempt gets at most ``GROQ_TIMEOUT`` seconds and
+  the whole call, retries included, at most ``GROQ_DEADLINE``; a slow
+  upstream can no longer pin a gunicorn worker indefinitely.
+- **Retries** — 429, 5xx, timeouts and connection errors are retried up
+  to ``GROQ_MAX_RETRIES`` times with full-jitter exponential backoff
+  (``Retry-After`` is honoured when Groq sends it).  Other errors
+  (bad request, auth) are raised at once.
+- **Circuit breaker** — after ``GROQ_BREAKER_FAILURES`` consecutive
+  upstream failures calls fail fast with :class:`GroqUnavailable` for
+  ``GROQ_BREAKER_RESET`` seconds, then one trial call decides whether to
+  close it again.  Rate limiting (429) does not count as a failure.
+- **Rate limit** — every attempt takes a token from a per-process bucket
+  sized by ``GROQ_RPM``, waiting for one only while the deadline allows.
+- **Counters** — calls, retries, errors by kind and latency
+  (:func:`stats`), per process; the same figures go to
+  :mod:`services.metrics` for all workers.
+
+The SDK's own retries are disabled so this module owns the policy.
+Point ``GROQ_BASE_URL`` at ``devtools/groq_stub.py`` to exercise all of
+this offline.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Optional
+
+from config import Config
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+_BACKOFF_BASE = 0.5     # seconds; attempt n sleeps up to base * 2**n
+_BACKOFF_CAP  = 8.0
+
+
+class GroqUnavailable(Exception):
+    """Groq is not configured, or the circuit breaker is open."""
+
+
+# ─── Rate limiting ────────────────────────────────────────────────────────────
+
+class RateLimiter:
+    """Token bucket shared by every thread in the process.
+
+    Holds up to *per_minute* tokens, refilled continuously; :meth:`acquire`
+    blocks until a token is available, but never past its *deadline*.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = max(1, per_minute)
+        self.rate     = self.capacity / 60.0          # tokens per second
+        self.tokens   = float(self.capacity)
+        self.updated  = time.monotonic()
+        self._lock    = threading.Lock()
+
+    def acquire(self, deadline: Optional[float] = None) -> bool:
+        """Take a token; ``False`` (none taken) if one would only be free
+        after *deadline* (a :func:`time.monotonic` value)."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens  = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if deadline is not None and now + wait >= deadline:
+                return False
+            time.sleep(wait)
+
+
+# ─── Circuit breaker ──────────────────────────────────────────────────────────
+
+class CircuitBreaker:
+    """Closed → open after *threshold* consecutive failures → half-open
+    after *reset_after* seconds, where a single trial call either closes
+    it (success) or re-opens it (failure)."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold: int, reset_after: float):
+        self.threshold   = max(1, threshold)
+        self.reset_after = reset_after
+        self.state       = self.CLOSED
+        self.failures    = 0
+        self.opened_at   = 0.0
+        self._trial      = False            # a half-open trial call is in flight
+        self._lock       = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_after:
+                self.state, self._trial = self.HALF_OPEN, False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Groq circuit closed.")
+            self.state, self.failures, self._trial = self.CLOSED, 0, False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Groq circuit opened after %d failure(s).", self.failures)
+                self.state, self.opened_at, self._trial = self.OPEN, time.monotonic(), False
+
+    def release(self) -> None:
+        """End a half-open trial that neither succeeded nor failed (e.g. a 429)."""
+        with self._lock:
+            self._trial = False
+
+
+# ─── Client (lazy singleton) ──────────────────────────────────────────────────
+
+_client = None
+_client_lock = threading.Lock()
+
+_limiter = RateLimiter(Config.GROQ_RPM)
+_breaker = CircuitBreaker(Config.GROQ_BREAKER_FAILURES, Config.GROQ_BREAKER_RESET)
+
+
+def get_client():
+    """Return the cached SDK client, or None if the key or package is missing."""
+    global _client
+    if _client is not None:
+        return _client
+    if not Config.GROQ_API_KEY:
+        logger.warning(
+            "GROQ_API_KEY not set — AI extraction unavailable. "
+            "Add it to your .env file."
+        )
+        return None
+    with _client_lock:
+        if _client is None:
+            try:
+                from groq import Groq
+            except ImportError:
+                logger.error("groq package not installed. Run: pip install groq")
+                return None
+            _client = Groq(
+                api_key     = Config.GROQ_API_KEY,
+                base_url    = Config.GROQ_BASE_URL or None,
+                timeout     = Config.GROQ_TIMEOUT,
+                max_retries = 0,
+            )
+            logger.info("Groq client initialised.")
+    return _client
+
+
+def is_configured() -> bool:
+    return get_client() is not None
+
+
+def chat(**kwargs: Any):
+    """``chat.completions.create(**kwargs)`` with deadline, retries and breaker.
+
+    Raises:
+        GroqUnavailable: Not configured, or the circuit is open.
+        TimeoutError:    ``GROQ_DEADLINE`` passed before a successful attempt.
+        groq.APIError:   A non-retryable error, or the last retryable one.
+    """
+    client = get_client()
+    if client is None:
+        raise GroqUnavailable("Groq is not configured.")
+
+    deadline = time.monotonic() + Config.GROQ_DEADLINE
+    _count("calls")
+    for attempt in range(Config.GROQ_MAX_RETRIES + 1):
+        if not _breaker.allow():
+            _count("rejected")
+            metrics.observe_groq("rejected", None)
+            raise GroqUnavailable("Groq circuit breaker is open — failing fast.")
+        if not _limiter.acquire(deadline):
+            _breaker.release()
+            _count("deadline")
+            raise TimeoutError("Groq call deadline exceeded waiting for the rate limit.")
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            _breaker.release()
+            _count("deadline")
+            raise TimeoutError("Groq call deadline exceeded.")
+
+        started = time.perf_counter()
+        try:
+            response = client.chat.completions.create(
+                **kwargs, timeout=min(Config.GROQ_TIMEOUT, remaining),
+            )
+        except Exception as exc:
+            elapsed = time.perf_counter() - started
+            _observe(elapsed)
+            kind, retry_after = _classify(exc)
+            _count(f"error_{kind}")
+            metrics.observe_groq(kind, elapsed)
+            if kind == "rate_limited":
+                _breaker.release()
+            elif kind != "client":
+                _breaker.record_failure()
+                metrics.set_groq_circuit_open(_breaker.state == _breaker.OPEN)
+            else:
+                _breaker.release()
+                raise
+
+            delay = retry_after if retry_after is not None else _backoff(attempt)
+            if (attempt == Config.GROQ_MAX_RETRIES or _breaker.state == _breaker.OPEN
+                    or time.monotonic() + delay >= deadline):
+                raise
+            logger.warning("Groq %s (attempt %d); retrying in %.1fs.", kind, attempt + 1, delay)
+            _count("retries")
+            time.sleep(delay)
+            continue
+
+        elapsed = time.perf_counter() - started
+        _observe(elapsed)
+        _breaker.record_success()
+        _count("successes")
+        metrics.observe_groq("ok", elapsed)
+        metrics.set_groq_circuit_open(False)
+        return response
+    raise AssertionError("unreachable")   # pragma: no cover
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(_BACKOFF_CAP, _BACKOFF_BASE * 2 ** attempt))
+
+
+def _classify(exc: Exception) -> tuple[str, Optional[float]]:
+    """``(kind, retry_after)``; kind is rate_limited / server / timeout / connection / client."""
+    try:
+        import groq
+    except ImportError:                  # pragma: no cover — client exists, so groq does
+        return "client", None
+
+    if isinstance(exc, groq.APITimeoutError):
+        return "timeout", None
+    if isinstance(exc, groq.APIConnectionError):
+        return "connection", None
+    if isinstance(exc, groq.APIStatusError):
+        if exc.status_code == 429:
+            return "rate_limited", _retry_after(exc)
+        if exc.status_code >= 500:
+            return "server", _retry_after(exc)
+    return "client", None
+
+
+def _retry_after(exc) -> Optional[float]:
+    try:
+        value = float(exc.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+    return min(value, _BACKOFF_CAP)
+
+
+# ─── Counters (per process) ───────────────────────────────────────────────────
+
+_stats_lock = threading.Lock()
+_stats: dict = {"latency_seconds": 0.0, "latency_count": 0, "latency_max": 0.0}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] = _stats.get(name, 0) + 1
+
+
+def _observe(seconds: float) -> None:
+    with _stats_lock:
+        _stats["latency_seconds"] += seconds
+        _stats["latency_count"]   += 1
+        _stats["latency_max"]      = max(_stats["latency_max"], seconds)
+
+
+def stats() -> dict:
+    """Call / retry / error counters, latency totals and the breaker state."""
+    with _stats_lock:
+        snapshot = dict(_stats)
+    snapshot["breaker"] = _breaker.state
+    return snapshot
@@ -0,0 +1,198 @@
+"""
+services.image_prep
+===================
+Shrink uploaded photos before they are base-64 encoded for the vision model.
+
+Phone photos of bills are 6–12 MB, far above the resolution the model
+reads, and base-64 adds another third.  :func:`prepare` runs a fixed
+pipeline with Pillow:
+
+1. **decode**    — JPEGs are decoded at reduced scale (``Image.draft``)
+                   when the photo is much larger than needed;
+2. **orient**    — apply the EXIF orientation so text is upright;
+3. **downscale** — fit the long side into ``IMAGE_MAX_SIDE`` pixels;
+4. **grayscale** — convert when the image is nearly colourless (most
+                   bills), which makes the JPEG noticeably smaller;
+5. **encode**    — JPEG at ``IMAGE_JPEG_QUALITY``.
+
+If the result is not smaller than the original file, the original bytes
+are sent unchanged.  Without Pillow the original is always sent.
+
+Each step's duration and the before / after payload sizes are logged per
+image and summed in per-process counters (:func:`stats`) for tuning.
+"""
+from __future__ import annotations
+
+import base64
+import io
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import BinaryIO, Union
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Mean HSV saturation (0–255) below which an image is treated as colourless
+_GRAYSCALE_MAX_SATURATION = 24
+_SATURATION_SAMPLE        = (64, 64)
+_EXIF_ORIENTATION         = 0x0112
+
+
+@dataclass
+class PreparedImage:
+    data: bytes
+    mime_type: str
+    original_bytes: int
+    timings: dict[str, float] = field(default_factory=dict)   # step → ms
+    steps: list[str] = field(default_factory=list)            # transforms applied
+
+    @property
+    def b64(self) -> str:
+        return base64.b64encode(self.data).decode("utf-8")
+
+    @property
+    def payload_before(self) -> int:
+        """Base-64 size the unprocessed file would have had."""
+        return 4 * ((self.original_bytes + 2) // 3)
+
+    @property
+    def payload_after(self) -> int:
+        return 4 * ((len(self.data) + 2) // 3)
+
+
+def prepare(source: Union[str, BinaryIO], mime_type: str) -> PreparedImage:
+    """Read *source* (path or binary file object) and return the image to upload.
+
+    Raises:
+        OSError: The file cannot be read.
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as fh:
+            original = fh.read()
+    else:
+        source.seek(0)
+        original = source.read()
+    result = PreparedImage(original, mime_type, len(original))
+
+    try:
+        from PIL import Image  # type: ignore  # noqa: F401
+    except ImportError:
+        logger.warning("Pillow not installed — sending images unprocessed. Run: pip install Pillow")
+        return result
+
+    try:
+        data = _normalise(original, result)
+    except Exception as exc:             # corrupt / unsupported image: let the model try
+        logger.warning("Image normalisation failed: %s", exc)
+        return result
+
+    if len(data) < len(original):
+        result.data, result.mime_type = data, "image/jpeg"
+    else:
+        result.steps.append("kept-original")
+    _record(result)
+    logger.info(
+        "Image prepared: %s; payload %d → %d bytes; %s",
+        "+".join(result.steps) or "none", result.payload_before, result.payload_after,
+        ", ".join(f"{k} {v:.0f}ms" for k, v in result.timings.items()),
+    )
+    return result
+
+
+def _normalise(original: bytes, result: PreparedImage) -> bytes:
+    from PIL import Image, ImageOps  # type: ignore
+
+    max_side = Config.IMAGE_MAX_SIDE
+    clock    = _Clock(result.timings)
+
+    with clock("decode"):
+        img = Image.open(io.BytesIO(original))
+        if img.format == "JPEG" and max(img.size) > 2 * max_side:
+            img.draft("RGB", (max_side, max_side))
+            result.steps.append("draft")
+        img.load()
+
+    with clock("orient"):
+        if img.getexif().get(_EXIF_ORIENTATION, 1) != 1:
+            img = ImageOps.exif_transpose(img)
+            result.steps.append("orient")
+
+    with clock("downscale"):
+        if max(img.size) > max_side:
+            img.thumbnail((max_side, max_side), Image.LANCZOS)
+            result.steps.append("downscale")
+
+    with clock("grayscale"):
+        img = _flatten(img)
+        if img.mode != "L" and _mean_saturation(img) < _GRAYSCALE_MAX_SATURATION:
+            img = img.convert("L")
+        if img.mode == "L":
+            result.steps.append("grayscale")
+
+    with clock("encode"):
+        out = io.BytesIO()
+        img.save(out, "JPEG", quality=Config.IMAGE_JPEG_QUALITY, optimize=True)
+    return out.getvalue()
+
+
+def _flatten(img):
+    """RGB or L copy of *img*; transparency is composited onto white."""
+    from PIL import Image  # type: ignore
+
+    if img.mode in ("RGB", "L"):
+        return img
+    if img.mode in ("RGBA", "LA", "P"):
+        rgba = img.convert("RGBA")
+        background = Image.new("RGB", rgba.size, "white")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    return img.convert("RGB")
+
+
+def _mean_saturation(img) -> float:
+    sample = img.resize(_SATURATION_SAMPLE).convert("HSV")
+    saturation = sample.getchannel("S").getdata()
+    return sum(saturation) / len(saturation)
+
+
+class _Clock:
+    """``with clock("step"):`` adds the block's duration (ms) to *timings*."""
+
+    def __init__(self, timings: dict[str, float]):
+        self.timings = timings
+        self._step   = ""
+        self._start  = 0.0
+
+    def __call__(self, step: str) -> "_Clock":
+        self._step = step
+        return self
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.timings[self._step] = (time.perf_counter() - self._start) * 1000
+
+
+# ─── Tuning counters (per process) ────────────────────────────────────────────
+
+_stats_lock = threading.Lock()
+_stats: dict = {"images": 0, "payload_before": 0, "payload_after": 0, "ms": {}}
+
+
+def _record(result: PreparedImage) -> None:
+    with _stats_lock:
+        _stats["images"]         += 1
+        _stats["payload_before"] += result.payload_before
+        _stats["payload_after"]  += result.payload_after
+        for step, ms in result.timings.items():
+            _stats["ms"][step] = _stats["ms"].get(step, 0.0) + ms
+
+
+def stats() -> dict:
+    """``{"images", "payload_before", "payload_after", "ms": {step: total}}``."""
+    with _stats_lock:
+        return {**_stats, "ms": {k: round(v, 1) for k, v in _stats["ms"].items()}}
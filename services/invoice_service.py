@@ -25,22 +25,36 @@ Typical usage (in a route)
 from __future__ import annotations
 
 import logging
-from datetime import date
+from calendar import monthrange
+from datetime import date, datetime
 from typing import Optional
 
-from models import Customer, Invoice, InvoiceItem, db
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+from models import Invoice, InvoiceCounter, InvoiceItem, db
+from services import customer_service, rollup_service
 from utils.helpers import get_financial_year, safe_float, safe_int
 
 logger = logging.getLogger(__name__)
 
 
 # ─── Invoice numbering ────────────────────────────────────────────────────────
+# Numbers come from the per-FY ``invoice_counter`` row, never from a scan of
+# the invoice table.  Allocation increments the row inside the caller's
+# transaction: the row lock serialises concurrent saves, and a rollback
+# returns the number, so the sequence stays gap-free.
+
+def _format_number(financial_year: str, n: int) -> str:
+    return f"{financial_year}/{str(n).zfill(3)}"
+
 
 def next_invoice_number(financial_year: str) -> tuple[int, str]:
-    """Return ``(next_int, formatted_string)`` for the given financial year.
+    """Return ``(next_int, formatted_string)`` for display — nothing is reserved.
 
-    Queries the highest existing ``invoice_number_int`` in *financial_year*
-    and increments it.  If no invoices exist yet, starts at 1.
+    A single primary-key read of the FY counter.  The number actually used
+    is allocated by :func:`allocate_invoice_number` when the invoice is saved.
 
     Args:
         financial_year: FY string such as ``'24-25'``.
@@ -48,14 +62,170 @@ def next_invoice_number(financial_year: str) -> tuple[int, str]:
     Returns:
         Tuple of ``(int, str)`` e.g. ``(3, '24-25/003')``.
     """
-    last = (
-        Invoice.query
-        .filter_by(financial_year=financial_year)
-        .order_by(Invoice.invoice_number_int.desc())
-        .first()
+    last = db.session.execute(
+        select(InvoiceCounter.last_number)
+        .where(InvoiceCounter.financial_year == financial_year)
+    ).scalar()
+    if last is None:
+        last = _last_used_number(financial_year)
+    n = last + 1
+    return n, _format_number(financial_year, n)
+
+
+def allocate_invoice_number(financial_year: str) -> tuple[int, str]:
+    """Atomically take the next number in *financial_year*.
+
+    Must be called inside the transaction that inserts the invoice.
+
+    Returns:
+        Tuple of ``(int, str)`` e.g. ``(3, '24-25/003')``.
+    """
+    n = reserve_invoice_numbers(financial_year, 1)[0]
+    return n, _format_number(financial_year, n)
+
+
+def reserve_invoice_numbers(financial_year: str, count: int) -> range:
+    """Atomically reserve a block of *count* consecutive numbers.
+
+    One ``UPDATE`` regardless of *count*, for bulk paths that create many
+    invoices in one transaction.
+
+    Returns:
+        The reserved numbers as a :class:`range`.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1.")
+    counter = InvoiceCounter.__table__
+    bump = (
+        update(counter)
+        .where(counter.c.financial_year == financial_year)
+        .values(last_number=counter.c.last_number + count)
     )
-    n = (last.invoice_number_int + 1) if last else 1
-    return n, f"{financial_year}/{str(n).zfill(3)}"
+    if db.session.execute(bump).rowcount == 0:
+        _create_counter(financial_year)
+        db.session.execute(bump)
+    last = db.session.execute(
+        select(counter.c.last_number).where(counter.c.financial_year == financial_year)
+    ).scalar_one()
+    return range(last - count + 1, last + 1)
+
+
+def bump_invoice_counter(financial_year: str, number: int) -> None:
+    """Advance the FY counter to *number* if it is behind.
+
+    Called whenever an invoice is written with an explicit number (manual
+    override, Excel import) so later allocations never collide with it.
+    Usually the counter is already ahead, which costs one ``SELECT``; the
+    guarded ``UPDATE`` runs only when it is behind, and the row is created
+    only when it is missing.  Counters never move backwards, so a value
+    read at or past *number* cannot become stale.
+    """
+    counter = InvoiceCounter.__table__
+    last = db.session.execute(
+        select(counter.c.last_number).where(counter.c.financial_year == financial_year)
+    ).scalar()
+    if last is not None and last >= number:
+        return
+    if last is None:
+        _create_counter(financial_year)
+    db.session.execute(
+        update(counter)
+        .where(counter.c.financial_year == financial_year,
+               counter.c.last_number < number)
+        .values(last_number=number)
+    )
+
+
+def _create_counter(financial_year: str) -> None:
+    """Insert the counter row for a new FY, seeded from existing invoices.
+
+    Runs once per financial year.  A concurrent insert of the same row is
+    ignored (the savepoint keeps the caller's transaction usable).
+    """
+    exists = db.session.execute(
+        select(InvoiceCounter.financial_year)
+        .where(InvoiceCounter.financial_year == financial_year)
+    ).scalar()
+    if exists is not None:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(InvoiceCounter).values(
+                financial_year=financial_year,
+                last_number=_last_used_number(financial_year),
+            ))
+    except IntegrityError:
+        pass  # another transaction created it first
+
+
+def _last_used_number(financial_year: str) -> int:
+    """Highest stored number in *financial_year* (index-only via ix_invoice_fy_number)."""
+    return db.session.execute(
+        select(func.max(Invoice.invoice_number_int))
+        .where(Invoice.financial_year == financial_year)
+    ).scalar() or 0
+
+
+# ─── Invoice list (keyset pagination) ────────────────────────────────────────
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE     = 200
+
+
+def list_invoices(
+    page_size: int = DEFAULT_PAGE_SIZE,
+    after: Optional[tuple[date, int]] = None,
+    financial_year: Optional[str] = None,
+    month: Optional[tuple[int, int]] = None,
+    customer_id: Optional[int] = None,
+) -> tuple[list[Invoice], Optional[tuple[date, int]]]:
+    """Return one page of invoices, newest first, with customers joined in.
+
+    Pages are addressed by a keyset cursor — the ``(date, invoice_number_int)``
+    of the last row of the previous page — rather than an offset, so every
+    page is an index range read on ``ix_invoice_date_number`` and costs the
+    same no matter how deep the user pages.
+
+    Args:
+        page_size:      Rows per page (clamped to ``1..MAX_PAGE_SIZE``).
+        after:          Cursor returned with the previous page, or ``None``.
+        financial_year: Only invoices in this FY (e.g. ``'25-26'``).
+        month:          ``(year, month)`` to restrict to one calendar month.
+        customer_id:    Only invoices for this customer.
+
+    Returns:
+        ``(invoices, next_cursor)`` — *next_cursor* is ``None`` on the last page.
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+
+    query = Invoice.query.options(joinedload(Invoice.customer))
+    if financial_year:
+        query = query.filter(Invoice.financial_year == financial_year)
+    if month:
+        year, mon = month
+        query = query.filter(
+            Invoice.date >= date(year, mon, 1),
+            Invoice.date <= date(year, mon, monthrange(year, mon)[1]),
+        )
+    if customer_id:
+        query = query.filter(Invoice.customer_id == customer_id)
+    if after:
+        last_date, last_num = after
+        query = query.filter(or_(
+            Invoice.date < last_date,
+            and_(Invoice.date == last_date, Invoice.invoice_number_int < last_num),
+        ))
+
+    rows = (
+        query
+        .order_by(Invoice.date.desc(), Invoice.invoice_number_int.desc())
+        .limit(page_size + 1)     # one extra row tells us whether a next page exists
+        .all()
+    )
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, (rows[-1].date, rows[-1].invoice_number_int)
 
 
 # ─── Core save function ───────────────────────────────────────────────────────
@@ -117,28 +287,16 @@ def save(
     if not cust_name:
         raise ValueError("Customer name is required.")
 
-    if cust_id:
-        customer = db.session.get(Customer, int(cust_id))
-        if not customer:
-            raise ValueError(f"Customer id={cust_id} not found.")
-        customer.name    = cust_name
-        customer.address = cust_addr
-        customer.gstin   = cust_gst
-        customer.state   = cust_state
-    else:
-        customer = Customer(
-            name=cust_name, address=cust_addr,
-            gstin=cust_gst, state=cust_state,
-        )
-        db.session.add(customer)
-    db.session.flush()  # populate customer.id before using it below
+    # Matches an existing customer by identity key instead of duplicating it
+    customer = customer_service.resolve_customer(
+        cust_name, cust_addr, cust_gst, cust_state, customer_id=cust_id,
+    )
 
     # ── Date ─────────────────────────────────────────────────────────────────
     date_str = (payload.get("date") or "").strip()
     if not date_str:
         raise ValueError("Invoice date is required.")
     try:
-        from datetime import datetime
         inv_date: date = datetime.strptime(date_str, "%Y-%m-%d").date()
     except ValueError:
         raise ValueError("Invalid date format — expected YYYY-MM-DD.")
@@ -169,9 +327,10 @@ def save(
         raw_str = (payload.get("invoice_number") or "").strip()
         if raw_int:
             inv_num_int = int(raw_int)
-            inv_num_str = raw_str or f"{fy}/{str(inv_num_int).zfill(3)}"
+            inv_num_str = raw_str or _format_number(fy, inv_num_int)
+            bump_invoice_counter(fy, inv_num_int)
         else:
-            inv_num_int, inv_num_str = next_invoice_number(fy)
+            inv_num_int, inv_num_str = allocate_invoice_number(fy)
 
         # Guard against duplicates in the same FY
         conflict = Invoice.query.filter_by(
@@ -190,6 +349,7 @@ def save(
 
     # ── Persist ───────────────────────────────────────────────────────────────
     if existing:
+        rollup_service.remove(existing)  # old contribution, before any change
         # Update header fields
         existing.date            = inv_date
         existing.financial_year  = fy
@@ -205,6 +365,7 @@ def save(
         existing.percentage_sgst = pct_sgst
         existing.percentage_igst = pct_igst
         existing.is_intra_state  = is_intra
+        existing.updated_at      = datetime.utcnow()   # even if only items change
         # Replace all line items
         InvoiceItem.query.filter_by(invoice_id=existing.id).delete()
         invoice = existing
@@ -252,6 +413,7 @@ def save(
             total_amount = safe_float(item.get("total"), 0.0),
         ))
 
+    rollup_service.add(invoice)
     db.session.commit()
     logger.info("Invoice %s saved (id=%s).", invoice.invoice_number, invoice.id)
     return invoice
@@ -281,7 +443,7 @@ def from_quotation(quotation) -> Invoice:
         )
 
     fy               = get_financial_year(quotation.date)
-    inv_num_int, inv_num_str = next_invoice_number(fy)
+    inv_num_int, inv_num_str = allocate_invoice_number(fy)
     is_intra         = quotation.percentage_cgst > 0
 
     invoice = Invoice(
@@ -323,9 +485,24 @@ def from_quotation(quotation) -> Invoice:
             total_amount = item.total_amount,
         ))
 
+    rollup_service.add(invoice)
     db.session.commit()
     logger.info(
         "Quotation %s converted to invoice %s.",
         quotation.quotation_number, inv_num_str,
     )
     return invoice
+
+
+# ─── Delete ───────────────────────────────────────────────────────────────────
+
+def delete(invoice: Invoice) -> None:
+    """Delete *invoice* (and its items) and take it out of the GST rollup.
+
+    Commits; the caller rolls back on error.
+    """
+    number, invoice_id = invoice.invoice_number, invoice.id
+    rollup_service.remove(invoice)
+    db.session.delete(invoice)
+    db.session.commit()
+    logger.info("Invoice %s deleted (id=%s).", number, invoice_id)
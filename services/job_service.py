@@ -0,0 +1,266 @@
+"""
+services.job_service
+====================
+Database-backed job queue for work that is too slow for an HTTP request
+(bulk Excel imports, GST report exports).
+
+The web process calls :func:`enqueue` and returns the job id straight
+away; ``flask jobs-worker`` runs one or more worker processes that call
+:func:`claim_next` / :func:`run` in a loop.  The queue is the ``job``
+table itself, so it works with the same database the app uses — TiDB in
+production, SQLite locally — and needs no broker.
+
+Claiming is an optimistic ``UPDATE ... WHERE status = 'queued'``: only
+the worker whose update touches the row owns the job, so several worker
+processes can poll the same table safely.
+
+Workers also call :func:`housekeeping` now and then: a job left
+``running`` longer than ``JOB_TIMEOUT`` (its worker was killed) is marked
+failed, and finished jobs older than ``JOB_RETENTION`` are deleted along
+with their files.
+
+Typical usage (in a route)
+--------------------------
+::
+
+    job = job_service.enqueue("gst_export", {"month": 4, "year": 2025},
+                              folder=current_app.config["JOB_FOLDER"])
+    return redirect(url_for("main.job_status", id=job.id))
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import uuid
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from sqlalchemy import delete, select, update
+
+from config import Config
+from models import Job, db
+from services import sql_profiler
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+# ─── Producer side ────────────────────────────────────────────────────────────
+
+def enqueue(kind: str, params: dict, folder: str) -> Job:
+    """Create and commit a queued job.
+
+    Args:
+        kind:   Handler name — one of :data:`HANDLERS`.
+        params: JSON-serialisable arguments for the handler.
+        folder: Directory where the job's result file will be written.
+
+    Returns:
+        The committed :class:`~models.Job`.
+
+    Raises:
+        ValueError: If *kind* has no registered handler.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'.")
+    job = Job(
+        id      = uuid.uuid4().hex,
+        kind    = kind,
+        status  = QUEUED,
+        params  = json.dumps(dict(params, folder=folder)),
+        message = "Waiting for a worker…",
+    )
+    db.session.add(job)
+    db.session.commit()
+    logger.info("Job %s (%s) queued.", job.id, kind)
+    return job
+
+
+def input_path(folder: str, filename: str) -> str:
+    """Return a collision-free path inside *folder* for a job's input file."""
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{uuid.uuid4().hex}-{filename}")
+
+
+# ─── Worker side ──────────────────────────────────────────────────────────────
+
+def claim_next(worker: str) -> Optional[Job]:
+    """Atomically claim the oldest queued job for *worker*.
+
+    Returns:
+        The claimed :class:`~models.Job`, or ``None`` if the queue is empty.
+    """
+    while True:
+        job_id = db.session.execute(
+            select(Job.id)
+            .where(Job.status == QUEUED)
+            .order_by(Job.created_at)
+            .limit(1)
+        ).scalar()
+        if job_id is None:
+            db.session.rollback()  # end the read transaction so new jobs are seen
+            return None
+
+        claimed = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == QUEUED)
+            .values(status=RUNNING, worker=worker,
+                    started_at=datetime.utcnow(), message="Running…")
+        ).rowcount
+        db.session.commit()
+        if claimed == 1:
+            return db.session.get(Job, job_id)
+        # Another worker won the race — try the next one.
+
+
+def run(job: Job) -> None:
+    """Execute a claimed *job* and record its outcome on the row."""
+    # Handlers may commit or expunge the session, so work from plain values.
+    job_id, kind = job.id, job.kind
+    params  = json.loads(job.params or "{}")
+    handler = HANDLERS[kind]
+
+    def _progress(done: int, message: Optional[str] = None) -> None:
+        db.session.execute(
+            update(Job).where(Job.id == job_id)
+            .values(progress=done, message=message or f"{done} processed…")
+        )
+        db.session.commit()
+
+    try:
+        with sql_profiler.profile(f"job:{kind}", job_id) if Config.PERF_PROFILE else nullcontext():
+            outcome = handler(job_id, params, _progress)
+    except Exception as exc:
+        logger.error("Job %s (%s) failed: %s", job_id, kind, exc)
+        db.session.rollback()
+        _finish(job_id, FAILED, error=str(exc), message="Failed.")
+        return
+
+    _finish(
+        job_id, DONE,
+        message     = outcome.get("message", "Done."),
+        result      = json.dumps(outcome.get("result")),
+        result_path = outcome.get("path"),
+        result_name = outcome.get("filename"),
+    )
+    logger.info("Job %s (%s) done.", job_id, kind)
+
+
+def _finish(job_id: str, status: str, **values) -> None:
+    db.session.execute(
+        update(Job).where(Job.id == job_id)
+        .values(status=status, finished_at=datetime.utcnow(), **values)
+    )
+    db.session.commit()
+
+
+# ─── Housekeeping ─────────────────────────────────────────────────────────────
+
+def reap_stale(timeout: float) -> int:
+    """Fail jobs that have been ``running`` for more than *timeout* seconds.
+
+    Such a job's worker died (killed, OOM, host restart) without recording
+    an outcome; without this it would show "Running…" forever.
+
+    Returns:
+        The number of jobs marked failed.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=timeout)
+    reaped = db.session.execute(
+        update(Job)
+        .where(Job.status == RUNNING, Job.started_at < cutoff)
+        .values(status=FAILED, finished_at=datetime.utcnow(), message="Failed.",
+                error=f"No result after {timeout:.0f}s — the worker running it stopped.")
+    ).rowcount
+    db.session.commit()
+    if reaped:
+        logger.warning("Marked %d stale running job(s) failed.", reaped)
+    return reaped
+
+
+def purge_finished(retention: float) -> int:
+    """Delete jobs finished more than *retention* seconds ago, and their files.
+
+    Removes the result file (exports) and any input left behind (an import
+    whose worker died before cleaning up).
+
+    Returns:
+        The number of jobs deleted.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=retention)
+    rows = db.session.execute(
+        select(Job.id, Job.params, Job.result_path)
+        .where(Job.status.in_((DONE, FAILED)), Job.finished_at < cutoff)
+    ).all()
+    for row in rows:
+        leftovers = [row.result_path, json.loads(row.params or "{}").get("path")]
+        for path in filter(None, leftovers):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    if rows:
+        db.session.execute(delete(Job).where(Job.id.in_([row.id for row in rows])))
+        logger.info("Purged %d finished job(s).", len(rows))
+    db.session.commit()
+    return len(rows)
+
+
+def housekeeping(timeout: float, retention: float) -> dict:
+    """Run :func:`reap_stale` and :func:`purge_finished`; return their counts."""
+    return {"reaped": reap_stale(timeout), "purged": purge_finished(retention)}
+
+
+# ─── Handlers ─────────────────────────────────────────────────────────────────
+# Each handler receives (job_id, params, progress) and returns a dict with
+# optional keys: "message", "result" (JSON-serialisable), "path" and
+# "filename" (for a downloadable output).
+
+def _import_invoices(job_id: str, params: dict, progress: Callable) -> dict:
+    from services import excel_service
+
+    path = params["path"]
+    try:
+        result = excel_service.import_invoices(
+            path, streaming=True, progress=progress,
+        )
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    return {
+        "result" : result,
+        "message": (
+            f"Import complete — {result['created']} created, "
+            f"{result['updated']} updated, "
+            + (f"{result['appended']} appended, " if result["appended"] else "")
+            + f"{result['skipped']} skipped"
+            + (f", {result['failed']} failed." if result["failed"] else ".")
+        ),
+    }
+
+
+def _gst_export(job_id: str, params: dict, progress: Callable) -> dict:
+    from services import excel_service
+
+    progress(0, "Building workbook…")
+    os.makedirs(params["folder"], exist_ok=True)
+    path  = os.path.join(params["folder"], f"{job_id}.xlsx")
+    fname = excel_service.write_gst_report(
+        path, int(params["month"]), int(params["year"]), fy=params.get("fy"),
+    )
+    return {
+        "path"    : path,
+        "filename": fname,
+        "message" : "Report ready.",
+    }
+
+
+HANDLERS: dict[str, Callable[[str, dict, Callable], dict]] = {
+    "import_invoices": _import_invoices,
+    "gst_export"     : _gst_export,
+}
@@ -0,0 +1,195 @@
+"""
+services.metrics
+================
+Prometheus metrics, aggregated across gunicorn workers (``METRICS=1``).
+
+prometheus_client runs in its multiprocess mode: every process writes
+its samples to memory-mapped files in ``METRICS_DIR`` and :func:`render`
+merges the files of all processes, so ``/metrics`` reports the same
+totals whichever worker answers the scrape.  ``gunicorn.conf.py`` empties
+the directory when the server starts and drops the live gauges of
+workers that exit.
+
+Metrics
+-------
+=============================================  =========  =====================================
+billgen_http_request_duration_seconds          histogram  endpoint, method, status
+billgen_db_pool_checkout_seconds               histogram  wait for a pooled connection
+billgen_db_pool_connections_in_use             gauge      summed over live workers
+billgen_groq_request_duration_seconds          histogram  one per attempt; outcome
+billgen_groq_errors_total                      counter    kind (rate_limited, server, …)
+billgen_groq_circuit_open                      gauge      1 if any live worker's breaker is open
+billgen_import_rows_total                      counter    spreadsheet rows imported; mode
+billgen_import_duration_seconds                histogram  per import; mode
+billgen_import_rows_per_second                 histogram  per import; mode
+=============================================  =========  =====================================
+
+Sustained import throughput is ``rate(billgen_import_rows_total[1h]) /
+rate(billgen_import_duration_seconds_sum[1h])``.
+
+Without ``METRICS=1`` — or without the prometheus_client package — every
+``observe_*`` function is a no-op.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+_POOL_BUCKETS    = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+_RATE_BUCKETS    = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000)
+
+_m: Optional[SimpleNamespace] = None
+_lock = threading.Lock()
+_unavailable = False
+
+
+def _metrics() -> Optional[SimpleNamespace]:
+    """Create the metric objects on first use; None when metrics are off."""
+    global _m, _unavailable
+    if _m is not None or _unavailable or not Config.METRICS:
+        return _m
+    with _lock:
+        if _m is not None or _unavailable:
+            return _m
+        # Multiprocess mode is chosen when prometheus_client is imported.
+        os.makedirs(Config.METRICS_DIR, exist_ok=True)
+        os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", Config.METRICS_DIR)
+        try:
+            from prometheus_client import Counter, Gauge, Histogram
+        except ImportError:
+            logger.error("prometheus_client not installed — metrics disabled. "
+                         "Run: pip install prometheus_client")
+            _unavailable = True
+            return None
+
+        _m = SimpleNamespace(
+            request_seconds = Histogram(
+                "billgen_http_request_duration_seconds", "Request latency by endpoint.",
+                ["endpoint", "method", "status"], buckets=_LATENCY_BUCKETS),
+            checkout_seconds = Histogram(
+                "billgen_db_pool_checkout_seconds", "Time to obtain a pooled DB connection.",
+                buckets=_POOL_BUCKETS),
+            in_use = Gauge(
+                "billgen_db_pool_connections_in_use", "Pooled DB connections checked out.",
+                multiprocess_mode="livesum"),
+            groq_seconds = Histogram(
+                "billgen_groq_request_duration_seconds", "Groq API attempt latency.",
+                ["outcome"], buckets=_LATENCY_BUCKETS),
+            groq_errors = Counter(
+                "billgen_groq_errors_total", "Failed Groq API attempts by kind.", ["kind"]),
+            groq_open = Gauge(
+                "billgen_groq_circuit_open", "1 while the Groq circuit breaker is open.",
+                multiprocess_mode="livemax"),
+            import_rows = Counter(
+                "billgen_import_rows_total", "Spreadsheet rows imported.", ["mode"]),
+            import_seconds = Histogram(
+                "billgen_import_duration_seconds", "Excel import duration.",
+                ["mode"], buckets=_LATENCY_BUCKETS),
+            import_rate = Histogram(
+                "billgen_import_rows_per_second", "Excel import throughput.",
+                ["mode"], buckets=_RATE_BUCKETS),
+        )
+        return _m
+
+
+def enabled() -> bool:
+    return _metrics() is not None
+
+
+def render() -> tuple[bytes, str]:
+    """``(body, content_type)`` of the merged samples of every process.
+
+    Raises:
+        RuntimeError: Metrics are disabled or prometheus_client is missing.
+    """
+    if _metrics() is None:
+        raise RuntimeError("Metrics are disabled.")
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+    from prometheus_client import multiprocess
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=Config.METRICS_DIR)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+# ─── Recording ────────────────────────────────────────────────────────────────
+
+def observe_request(endpoint: str, method: str, status: int, seconds: float) -> None:
+    m = _metrics()
+    if m is not None:
+        m.request_seconds.labels(endpoint, method, str(status)).observe(seconds)
+
+
+def observe_groq(outcome: str, seconds: Optional[float]) -> None:
+    """One Groq attempt; *outcome* is ``ok`` or an error kind from groq_client.
+
+    Calls refused by the open breaker pass ``"rejected"`` and no duration.
+    """
+    m = _metrics()
+    if m is not None:
+        if seconds is not None:
+            m.groq_seconds.labels(outcome).observe(seconds)
+        if outcome != "ok":
+            m.groq_errors.labels(outcome).inc()
+
+
+def set_groq_circuit_open(is_open: bool) -> None:
+    m = _metrics()
+    if m is not None:
+        m.groq_open.set(1 if is_open else 0)
+
+
+def observe_import(rows: int, seconds: float, mode: str) -> None:
+    m = _metrics()
+    if m is not None:
+        m.import_rows.labels(mode).inc(rows)
+        m.import_seconds.labels(mode).observe(seconds)
+        if seconds > 0:
+            m.import_rate.labels(mode).observe(rows / seconds)
+
+
+def instrument_engine(engine) -> None:
+    """Time connection checkouts and track connections in use for *engine*.
+
+    ``Engine.raw_connection`` is where every connection is taken from the
+    pool (waiting if it is exhausted), so it is wrapped on the instance —
+    which, unlike the pool, survives ``engine.dispose()``.  The in-use
+    gauge follows the pool's checkout / checkin events.
+    """
+    m = _metrics()
+    if m is None or getattr(engine, "_billgen_metrics", False):
+        return
+    from sqlalchemy import event
+
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        started = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            m.checkout_seconds.observe(time.perf_counter() - started)
+
+    engine.raw_connection   = timed_raw_connection
+    engine._billgen_metrics = True
+    event.listen(engine, "checkout", lambda *args: m.in_use.inc())
+    event.listen(engine, "checkin", lambda *args: m.in_use.dec())
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop the live gauges of exited worker *pid* (gunicorn ``child_exit``)."""
+    if Config.METRICS:
+        try:
+            from prometheus_client import multiprocess
+        except ImportError:
+            return
+        multiprocess.mark_process_dead(pid, Config.METRICS_DIR)
@@ -0,0 +1,211 @@
+"""
+services.pdf_text
+=================
+PDF → prompt text for :mod:`services.ai_extraction`.
+
+Only the first ``PDF_TEXT_BUDGET`` characters of a document are sent to the
+model, so pages are read in order and reading stops as soon as the budget
+is filled — a 40-page statement usually costs one or two pages of parsing.
+
+Each page's text is cleaned before it counts against the budget:
+
+- runs of spaces / tabs collapse to one space and blank lines are dropped;
+- lines repeated at the top or bottom of most pages read so far (letter
+  heads, "Page 3 of 40" footers — digits are ignored when comparing) are
+  kept once, where they first appear, and dropped from every later page,
+  so the budget is spent on content.
+
+Documents of at least ``PDF_PARALLEL_MIN_PAGES`` pages are parsed in waves
+on a pool of ``PDF_WORKERS`` processes (pdfplumber is pure Python, so
+threads would not help); the budget is checked after every wave.  If the
+pool cannot be used the pages are read in this process instead.
+
+The source may be a path or a binary file object (an upload's spooled
+stream).  Worker processes need a path, so a file object that goes to the
+pool is first copied to a uniquely named temporary file.
+"""
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Union
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_EDGE_LINES     = 2    # lines at the top / bottom of a page checked for boilerplate
+_PAGES_PER_TASK = 2    # pages parsed per worker task
+
+_SPACES = re.compile(r"[ \t\u00a0]+")
+_DIGITS = re.compile(r"\d+")
+
+
+def extract_text(source: Union[str, BinaryIO], budget: Optional[int] = None) -> str:
+    """Return up to *budget* characters of cleaned text from the PDF at *source*.
+
+    Raises:
+        ImportError: pdfplumber is not installed.
+        Exception:   Whatever pdfplumber raises for an unreadable file.
+    """
+    import pdfplumber  # type: ignore
+
+    budget = budget or Config.PDF_TEXT_BUDGET
+    with pdfplumber.open(_rewind(source)) as pdf:
+        page_count = len(pdf.pages)
+        if Config.PDF_WORKERS < 2 or page_count < Config.PDF_PARALLEL_MIN_PAGES:
+            return _read_sequential(pdf, budget)
+
+    try:
+        if isinstance(source, str):
+            return _read_parallel(source, page_count, budget)
+        with _spilled(source) as path:
+            return _read_parallel(path, page_count, budget)
+    except (BrokenProcessPool, OSError) as exc:
+        logger.warning("PDF worker pool unavailable (%s); reading in-process.", exc)
+        _reset_pool()
+        with pdfplumber.open(_rewind(source)) as pdf:
+            return _read_sequential(pdf, budget)
+
+
+def _rewind(source):
+    if not isinstance(source, str):
+        source.seek(0)
+    return source
+
+
+@contextmanager
+def _spilled(fileobj: BinaryIO) -> Iterator[str]:
+    """Yield the path of a uniquely named temporary copy of *fileobj*."""
+    fd, path = tempfile.mkstemp(prefix="pdf-", suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(_rewind(fileobj), out)
+        yield path
+    finally:
+        os.remove(path)
+
+
+# ─── Reading ──────────────────────────────────────────────────────────────────
+
+def _read_sequential(pdf, budget: int) -> str:
+    pages: list[list[str]] = []
+    for page in pdf.pages:
+        pages.append(_clean_lines(page.extract_text() or ""))
+        page.close()                       # drop the parsed layout objects
+        if _filled(pages, budget):
+            break
+    return assemble(pages, budget)
+
+
+def _read_parallel(filepath: str, page_count: int, budget: int) -> str:
+    pool  = _get_pool()
+    wave  = Config.PDF_WORKERS * _PAGES_PER_TASK
+    pages: list[list[str]] = []
+    for start in range(0, page_count, wave):
+        end     = min(page_count, start + wave)
+        futures = [
+            pool.submit(_read_pages, filepath, list(range(first, min(end, first + _PAGES_PER_TASK))))
+            for first in range(start, end, _PAGES_PER_TASK)
+        ]
+        for future in futures:
+            pages.extend(future.result())
+        if _filled(pages, budget):
+            break
+    return assemble(pages, budget)
+
+
+def _read_pages(filepath: str, numbers: list[int]) -> list[list[str]]:
+    """Worker task: cleaned lines of the given 0-based pages."""
+    import pdfplumber  # type: ignore
+
+    with pdfplumber.open(filepath, pages=[n + 1 for n in numbers]) as pdf:
+        return [_clean_lines(page.extract_text() or "") for page in pdf.pages]
+
+
+# ─── Cleaning ─────────────────────────────────────────────────────────────────
+
+def _clean_lines(raw: str) -> list[str]:
+    lines = (_SPACES.sub(" ", line).strip() for line in raw.splitlines())
+    return [line for line in lines if line]
+
+
+def _signature(line: str) -> str:
+    return _DIGITS.sub("#", line.lower())
+
+
+def _edge_indexes(lines: list[str]) -> set[int]:
+    n = len(lines)
+    return set(range(min(n, _EDGE_LINES))) | set(range(max(0, n - _EDGE_LINES), n))
+
+
+def _boilerplate(pages: list[list[str]]) -> set[str]:
+    """Signatures of edge lines found on at least half (and two) of *pages*."""
+    if len(pages) < 2:
+        return set()
+    counts: Counter = Counter()
+    for lines in pages:
+        counts.update({_signature(lines[i]) for i in _edge_indexes(lines)})
+    threshold = max(2, (len(pages) + 1) // 2)
+    return {sig for sig, n in counts.items() if n >= threshold}
+
+
+def assemble(pages: list[list[str]], budget: int) -> str:
+    """Join cleaned *pages*, keeping repeated headers / footers once, cut to *budget*."""
+    repeated = _boilerplate(pages)
+    seen: set[str] = set()
+    kept = []
+    for lines in pages:
+        edges = _edge_indexes(lines)
+        for i, line in enumerate(lines):
+            if i in edges:
+                sig = _signature(line)
+                if sig in repeated:
+                    if sig in seen:
+                        continue
+                    seen.add(sig)
+            kept.append(line)
+    return "\n".join(kept)[:budget]
+
+
+def _filled(pages: list[list[str]], budget: int) -> bool:
+    raw = sum(len(line) + 1 for lines in pages for line in lines)
+    return raw >= budget and len(assemble(pages, budget)) >= budget
+
+
+# ─── Worker pool (lazy, one per process) ──────────────────────────────────────
+# "spawn" rather than fork: the web process runs threads (batch extraction,
+# gunicorn), and forking a threaded process can copy held locks.  Spawned
+# workers re-import the launching script as ``__mp_main__`` once at pool
+# start — a no-op under gunicorn / ``flask run``.
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers = Config.PDF_WORKERS,
+                mp_context  = multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,142 @@
+"""
+services.report_service
+=======================
+Query layer for the GST monthly report, shared by the HTML view
+(``routes.gst``) and the Excel export (``services.excel_service``).
+
+Nothing here loads ORM instances:
+
+- Month / financial-year totals are read from the GST rollup table
+  (:mod:`services.rollup_service`); :func:`gst_totals` aggregates raw
+  invoices for arbitrary date ranges.
+- :func:`gst_rows` returns the invoice rows as lightweight result tuples
+  (invoice columns plus the customer's name and GSTIN from a join);
+  :func:`iter_gst_rows` streams the same rows in batches for exports.
+- :func:`with_gaps` walks those rows in bill-number order and inserts a
+  placeholder for every missing number in the sequence.
+"""
+from __future__ import annotations
+
+from calendar import monthrange
+from datetime import date
+from typing import Iterable, Iterator
+
+from sqlalchemy import func, select
+
+from models import Customer, Invoice, db
+from services import rollup_service
+
+# Columns selected for every report row — attribute names match the
+# Invoice model so templates can read ``row.total_basic`` etc.
+_ROW_COLUMNS = (
+    Invoice.id,
+    Invoice.invoice_number,
+    Invoice.invoice_number_int,
+    Invoice.financial_year,
+    Invoice.date,
+    Invoice.place_of_supply,
+    Invoice.is_intra_state,
+    Invoice.total_basic,
+    Invoice.total_cgst,
+    Invoice.total_sgst,
+    Invoice.total_igst,
+    Invoice.grand_total,
+    Invoice.percentage_cgst,
+    Invoice.percentage_sgst,
+    Invoice.percentage_igst,
+    Customer.name.label("customer_name"),
+    Customer.gstin.label("customer_gstin"),
+)
+
+
+_EMPTY_TOTALS = {"count": 0, "basic": 0.0, "cgst": 0.0, "sgst": 0.0, "igst": 0.0, "total": 0.0}
+
+
+def month_bounds(month: int, year: int) -> tuple[date, date]:
+    """Return the first and last day of *month* / *year*."""
+    return date(year, month, 1), date(year, month, monthrange(year, month)[1])
+
+
+def fy_bounds(fy: str) -> tuple[date, date]:
+    """Return 1 April – 31 March for a financial year such as ``"25-26"``."""
+    start = 2000 + int(fy.split("-")[0])
+    return date(start, 4, 1), date(start + 1, 3, 31)
+
+
+def gst_rows(from_date: date, to_date: date) -> list:
+    """Invoice rows dated within ``[from_date, to_date]``, by bill number."""
+    return db.session.execute(_rows_statement(from_date, to_date)).all()
+
+
+def iter_gst_rows(from_date: date, to_date: date, batch_size: int = 1000) -> Iterator:
+    """Stream the rows of :func:`gst_rows`, *batch_size* at a time.
+
+    Uses ``yield_per`` (a server-side cursor on MySQL / TiDB), so an annual
+    export never holds the whole result set in memory.
+    """
+    stmt = _rows_statement(from_date, to_date).execution_options(yield_per=batch_size)
+    yield from db.session.execute(stmt)
+
+
+def _rows_statement(from_date: date, to_date: date):
+    return (
+        select(*_ROW_COLUMNS)
+        .join(Customer, Customer.id == Invoice.customer_id)
+        .where(Invoice.date >= from_date, Invoice.date <= to_date)
+        .order_by(Invoice.invoice_number_int)
+    )
+
+
+def gst_totals(from_date: date, to_date: date) -> dict:
+    """Totals for an arbitrary date range from one aggregate over invoices.
+
+    Whole months and financial years should use
+    :func:`services.rollup_service.month_totals` / ``fy_totals`` instead.
+
+    Returns:
+        ``{"count", "basic", "cgst", "sgst", "igst", "total"}`` — zeros when
+        the period has no invoices.
+    """
+    row = db.session.execute(
+        select(
+            func.count(Invoice.id).label("count"),
+            func.coalesce(func.sum(Invoice.total_basic), 0).label("basic"),
+            func.coalesce(func.sum(Invoice.total_cgst),  0).label("cgst"),
+            func.coalesce(func.sum(Invoice.total_sgst),  0).label("sgst"),
+            func.coalesce(func.sum(Invoice.total_igst),  0).label("igst"),
+            func.coalesce(func.sum(Invoice.grand_total), 0).label("total"),
+        ).where(Invoice.date >= from_date, Invoice.date <= to_date)
+    ).one()._mapping
+    totals = {key: float(row[key]) for key in ("basic", "cgst", "sgst", "igst", "total")}
+    totals["count"] = int(row["count"])
+    return totals
+
+
+def with_gaps(rows: Iterable) -> Iterator[dict]:
+    """Yield report rows in bill-number order, filling gaps with placeholders.
+
+    *rows* must be sorted by ``invoice_number_int``.  Each yielded dict is
+    either ``{"empty": False, "invoice": row}`` or
+    ``{"empty": True, "number": int, "formatted": "25-26/007"}``.
+    Works on any iterable, so it can consume a streamed result.
+    """
+    prev = None
+    for row in rows:
+        if prev is not None:
+            for num in range(prev + 1, row.invoice_number_int):
+                yield {
+                    "empty"    : True,
+                    "number"   : num,
+                    "formatted": f"{row.financial_year}/{str(num).zfill(3)}",
+                }
+        yield {"empty": False, "invoice": row}
+        prev = row.invoice_number_int
+
+
+def gst_month_report(month: int, year: int) -> tuple[list[dict], dict]:
+    """Return ``(report_rows, totals)`` for the GST view of one month."""
+    from_date, to_date = month_bounds(month, year)
+    rows = gst_rows(from_date, to_date)
+    if not rows:
+        return [], dict(_EMPTY_TOTALS)
+    return list(with_gaps(rows)), rollup_service.month_totals(month, year)
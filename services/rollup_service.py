@@ -0,0 +1,312 @@
+"""
+services.rollup_service
+=======================
+Maintains the ``gst_monthly_rollup`` table (see :class:`models.GstMonthlyRollup`)
+so period summaries never have to scan the invoice table.
+
+Every write path adds the new invoice's contribution and subtracts the old
+one **inside the caller's transaction** — the rollup commits or rolls back
+together with the invoice:
+
+- :func:`add` / :func:`remove` for a single ORM invoice
+  (``invoice_service.save``, ``from_quotation``, ``delete``);
+- :func:`item_deltas` / :func:`stored_deltas` + :func:`apply` for bulk
+  paths (the Excel import), which collect many deltas and write one
+  ``UPDATE`` per affected key.
+
+Rows are keyed by the **line items'** GST rate: an invoice mixing 5 %
+and 18 % goods adds its 5 % items' taxable value and tax to the 5 % row
+and the rest to the 18 % row — the rate-wise summary GST returns need.
+The invoice itself is counted once, under the rate of its first item.
+
+Increments are ``UPDATE ... SET x = x + :d``, so concurrent writers never
+lose each other's changes.  :func:`rebuild` recomputes the table from
+scratch (``flask --app app db rebuild-rollup``).
+
+Readers: :func:`month_totals` and :func:`fy_totals` return the same dict
+shape as :func:`services.report_service.gst_totals`; :func:`rate_totals`
+breaks a period down by tax type and rate.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import date
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from models import GstMonthlyRollup, Invoice, InvoiceItem, db
+from utils.helpers import get_financial_year
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of invoice ids bound into one ``IN (...)``.
+_IN_BATCH = 500
+
+# Rollup column ← key in the totals dicts returned to callers
+_SUM_COLUMNS = {
+    "invoice_count": "count",
+    "total_basic"  : "basic",
+    "total_cgst"   : "cgst",
+    "total_sgst"   : "sgst",
+    "total_igst"   : "igst",
+    "grand_total"  : "total",
+}
+
+
+class RollupKey(NamedTuple):
+    financial_year: str
+    month: int
+    is_intra_state: bool
+    gst_rate: float                  # the line items' GST rate, e.g. 5.0, 18.0
+
+
+def _key(inv_date: date, is_intra: bool, rate) -> RollupKey:
+    return RollupKey(get_financial_year(inv_date), inv_date.month, bool(is_intra),
+                     round(rate or 0.0, 2))
+
+
+# ─── Write side ───────────────────────────────────────────────────────────────
+
+def item_deltas(
+    inv_date: date,
+    is_intra_state: bool,
+    items: Iterable,
+    sign: int = 1,
+    count: int = 1,
+    fallback_rate: float = 0.0,
+) -> list[tuple[RollupKey, dict]]:
+    """Rollup deltas of one invoice's line items, one per GST rate.
+
+    Amounts are the items' ``basic_amount`` / ``cgst_amount`` /
+    ``sgst_amount`` / ``igst_amount`` summed per ``gst_rate``; the total
+    is basic + GST.  The invoice itself is counted once, under the rate of
+    its first item (*fallback_rate* when it has none), so the month's
+    invoice count stays exact however many rates an invoice mixes.
+
+    Args:
+        items:  Dicts or rows with the :class:`~models.InvoiceItem` amount
+                columns, in line order.
+        sign:   ``1`` to add, ``-1`` to subtract.
+        count:  Invoices counted — ``1`` for a whole invoice, ``0`` for
+                items appended to one already in the rollup.
+    """
+    deltas: dict[RollupKey, dict] = {}
+    for it in items:
+        it   = it if isinstance(it, dict) else it._mapping
+        acc  = deltas.setdefault(_key(inv_date, is_intra_state, it["gst_rate"]),
+                                 dict.fromkeys(_SUM_COLUMNS, 0))
+        gst  = (it["cgst_amount"] or 0.0) + (it["sgst_amount"] or 0.0) + (it["igst_amount"] or 0.0)
+        acc["total_basic"] += sign * (it["basic_amount"] or 0.0)
+        acc["total_cgst"]  += sign * (it["cgst_amount"] or 0.0)
+        acc["total_sgst"]  += sign * (it["sgst_amount"] or 0.0)
+        acc["total_igst"]  += sign * (it["igst_amount"] or 0.0)
+        acc["grand_total"] += sign * ((it["basic_amount"] or 0.0) + gst)
+    if count:
+        first = next(iter(deltas), None) or _key(inv_date, is_intra_state, fallback_rate)
+        deltas.setdefault(first, dict.fromkeys(_SUM_COLUMNS, 0))["invoice_count"] += sign * count
+    return list(deltas.items())
+
+
+_ITEM_COLUMNS = (InvoiceItem.gst_rate, InvoiceItem.basic_amount, InvoiceItem.cgst_amount,
+                 InvoiceItem.sgst_amount, InvoiceItem.igst_amount)
+
+
+def stored_deltas(invoices: Iterable, sign: int = 1) -> list[tuple[RollupKey, dict]]:
+    """Deltas of invoices as stored, items included — one ``SELECT`` per batch.
+
+    *invoices* are ORM instances or rows with ``id``, ``date``,
+    ``is_intra_state`` and the three tax percentages.  Call it before the
+    items are replaced or deleted (to subtract) or after they are written
+    (to add; pending items are autoflushed).
+    """
+    by_id = {inv.id: inv for inv in invoices}
+    items: dict[int, list] = {}
+    ids = list(by_id)
+    for start in range(0, len(ids), _IN_BATCH):
+        rows = db.session.execute(
+            select(InvoiceItem.invoice_id, *_ITEM_COLUMNS)
+            .where(InvoiceItem.invoice_id.in_(ids[start:start + _IN_BATCH]))
+            .order_by(InvoiceItem.invoice_id, InvoiceItem.id)
+        )
+        for row in rows:
+            items.setdefault(row.invoice_id, []).append(row)
+
+    deltas = []
+    for inv_id, inv in by_id.items():
+        deltas += item_deltas(inv.date, inv.is_intra_state, items.get(inv_id, ()), sign,
+                              fallback_rate=_header_rate(inv))
+    return deltas
+
+
+def _header_rate(invoice) -> float:
+    return ((invoice.percentage_cgst or 0) + (invoice.percentage_sgst or 0)
+            + (invoice.percentage_igst or 0))
+
+
+def add(invoice) -> None:
+    """Add *invoice* and its items to the rollup (after the items are added)."""
+    apply(stored_deltas([invoice], 1))
+
+
+def remove(invoice) -> None:
+    """Subtract *invoice*'s stored items — call *before* changing or deleting them."""
+    apply(stored_deltas([invoice], -1))
+
+
+def apply(deltas: Iterable[tuple[RollupKey, dict]]) -> None:
+    """Merge *deltas* per key and write one atomic ``UPDATE`` per key.
+
+    A key seen for the first time gets its row inserted (inside a
+    savepoint, so a concurrent insert of the same key is harmless).
+    """
+    merged: dict[RollupKey, dict] = {}
+    for key, values in deltas:
+        acc = merged.setdefault(key, dict.fromkeys(_SUM_COLUMNS, 0))
+        for col, v in values.items():
+            acc[col] += v
+
+    table = GstMonthlyRollup.__table__
+    for key, values in merged.items():
+        if not any(round(v, 6) for v in values.values()):
+            continue
+        bump = (
+            update(table)
+            .where(
+                table.c.financial_year == key.financial_year,
+                table.c.month          == key.month,
+                table.c.is_intra_state == key.is_intra_state,
+                table.c.gst_rate       == key.gst_rate,
+            )
+            .values({col: table.c[col] + v for col, v in values.items()})
+        )
+        if db.session.execute(bump).rowcount == 0:
+            _create_row(key)
+            db.session.execute(bump)
+
+
+def _create_row(key: RollupKey) -> None:
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(GstMonthlyRollup).values(**key._asdict()))
+    except IntegrityError:
+        pass  # another transaction created it first
+
+
+def rebuild(conn=None) -> int:
+    """Recompute the whole rollup from the invoice and item tables.
+
+    Two ``GROUP BY`` statements: item amounts per (month, tax type, item
+    rate), and invoices per (month, tax type, rate of their first item).
+    Every rollup row is replaced.  *conn* is a Connection (migrations) or
+    defaults to the session; the caller commits.
+
+    Returns:
+        The number of rollup rows written.
+    """
+    conn  = conn if conn is not None else db.session
+    year  = func.extract("year", Invoice.date)
+    month = func.extract("month", Invoice.date)
+    amounts = conn.execute(
+        select(
+            year.label("year"), month.label("month"),
+            Invoice.is_intra_state, InvoiceItem.gst_rate.label("rate"),
+            func.sum(InvoiceItem.basic_amount).label("total_basic"),
+            func.sum(InvoiceItem.cgst_amount).label("total_cgst"),
+            func.sum(InvoiceItem.sgst_amount).label("total_sgst"),
+            func.sum(InvoiceItem.igst_amount).label("total_igst"),
+        )
+        .join(Invoice, InvoiceItem.invoice_id == Invoice.id)
+        .group_by(year, month, Invoice.is_intra_state, InvoiceItem.gst_rate)
+    ).all()
+
+    first = (
+        select(InvoiceItem.invoice_id, func.min(InvoiceItem.id).label("item_id"))
+        .group_by(InvoiceItem.invoice_id).subquery()
+    )
+    rate = func.coalesce(
+        InvoiceItem.gst_rate,
+        Invoice.percentage_cgst + Invoice.percentage_sgst + Invoice.percentage_igst,
+    )
+    counts = conn.execute(
+        select(
+            year.label("year"), month.label("month"), Invoice.is_intra_state,
+            rate.label("rate"), func.count(Invoice.id).label("invoice_count"),
+        )
+        .outerjoin(first, first.c.invoice_id == Invoice.id)
+        .outerjoin(InvoiceItem, InvoiceItem.id == first.c.item_id)
+        .group_by(year, month, Invoice.is_intra_state, rate)
+    ).all()
+
+    # Different raw rates can round to the same key, so merge in Python.
+    rows: dict[RollupKey, dict] = {}
+
+    def _acc(g) -> dict:
+        key = _key(date(int(g.year), int(g.month), 1), g.is_intra_state, g.rate)
+        return rows.setdefault(key, dict.fromkeys(_SUM_COLUMNS, 0))
+
+    for g in amounts:
+        acc = _acc(g)
+        for col in ("total_basic", "total_cgst", "total_sgst", "total_igst"):
+            acc[col]           += getattr(g, col) or 0
+            acc["grand_total"] += getattr(g, col) or 0
+    for g in counts:
+        _acc(g)["invoice_count"] += g.invoice_count
+
+    conn.execute(delete(GstMonthlyRollup))
+    if rows:
+        conn.execute(
+            insert(GstMonthlyRollup),
+            [dict(key._asdict(), **values) for key, values in rows.items()],
+        )
+    logger.info("GST rollup rebuilt: %d rows from %d item groups.", len(rows), len(amounts))
+    return len(rows)
+
+
+# ─── Read side ────────────────────────────────────────────────────────────────
+
+def month_totals(month: int, year: int) -> dict:
+    """Totals for one calendar month — a primary-key prefix lookup."""
+    return _totals(get_financial_year(date(year, month, 1)), month)
+
+
+def fy_totals(financial_year: str) -> dict:
+    """Totals for a whole financial year (at most a few dozen rollup rows)."""
+    return _totals(financial_year)
+
+
+def rate_totals(financial_year: str, month: Optional[int] = None) -> list[dict]:
+    """Per (intra/inter state, GST rate) totals for a financial year or one of its months."""
+    r    = GstMonthlyRollup
+    stmt = select(r.is_intra_state, r.gst_rate, *(
+        func.sum(getattr(r, col)).label(name) for col, name in _SUM_COLUMNS.items()
+    )).where(r.financial_year == financial_year)
+    if month is not None:
+        stmt = stmt.where(r.month == month)
+    stmt = stmt.group_by(r.is_intra_state, r.gst_rate).order_by(r.is_intra_state.desc(), r.gst_rate)
+    return [
+        {
+            "is_intra_state": bool(row.is_intra_state),
+            "gst_rate"      : row.gst_rate,
+            "count"         : int(row.count),
+            **{name: round(float(row._mapping[name]), 2)
+               for name in _SUM_COLUMNS.values() if name != "count"},
+        }
+        for row in db.session.execute(stmt)
+        if row.count or round(row.basic, 6) or round(row.total, 6)   # skip keys emptied by deletes
+    ]
+
+
+def _totals(financial_year: str, month: Optional[int] = None) -> dict:
+    r    = GstMonthlyRollup
+    stmt = select(*(
+        func.coalesce(func.sum(getattr(r, col)), 0).label(name)
+        for col, name in _SUM_COLUMNS.items()
+    )).where(r.financial_year == financial_year)
+    if month is not None:
+        stmt = stmt.where(r.month == month)
+    row = db.session.execute(stmt).one()._mapping
+    totals = {name: round(float(row[name]), 2) for name in _SUM_COLUMNS.values() if name != "count"}
+    totals["count"] = int(row["count"])
+    return totals
@@ -0,0 +1,152 @@
+"""
+services.search_service
+=======================
+In-process customer search index behind the ``/api/customers`` typeahead.
+
+``name ILIKE '%q%'`` cannot use an index, so every keystroke used to scan
+the customer table.  Instead each worker holds a :class:`CustomerIndex`:
+
+- a trigram → customer-id posting map over the normalised name (letters
+  and digits of any script), so an infix query only verifies the
+  customers sharing all of its trigrams;
+- a sorted GSTIN list for prefix lookups with :mod:`bisect`.
+
+The index is rebuilt (one ``SELECT`` of the customer table) only when the
+``customers`` version stamp moves.  The stamp is bumped after any commit
+that inserted, changed or deleted customers (see
+:func:`services.cache_service.invalidate_on_commit`), so every write path
+(forms, invoice save, Excel import) is covered without explicit calls.
+
+Ranking (best first): exact name, name prefix, word prefix, GSTIN prefix,
+any infix; ties go to the shorter, then alphabetically earlier name.
+"""
+from __future__ import annotations
+
+import bisect
+import hashlib
+import logging
+import unicodedata
+from typing import Iterable
+
+from sqlalchemy import select
+
+from models import Customer, db
+from services import cache_service
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 10
+BROWSE_LIMIT  = 20      # results for an empty query
+
+# Unicode categories kept by normalize(): letters, numbers and marks (Tamil
+# vowel signs are marks) — the same rule as utils.helpers.customer_name_key.
+_KEEP = ("L", "N", "M")
+
+# Rank tiers — lower is better
+_EXACT, _PREFIX, _WORD_PREFIX, _GSTIN_PREFIX, _INFIX = range(5)
+
+
+def normalize(text: str) -> str:
+    """NFKC-normalise and case-fold *text*; collapse everything but letters,
+    digits and marks (of any script) to single spaces."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return " ".join("".join(c if unicodedata.category(c)[0] in _KEEP else " " for c in text).split())
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class CustomerIndex:
+    """Immutable search index over one snapshot of the customer table."""
+
+    def __init__(self, customers: Iterable[dict]):
+        self.customers: dict[int, dict] = {}
+        self._names: dict[int, str] = {}
+        self._postings: dict[str, set[int]] = {}
+        gstins = []
+        for c in customers:
+            self.customers[c["id"]] = c
+            name = normalize(c["name"])
+            self._names[c["id"]] = name
+            for gram in _trigrams(name):
+                self._postings.setdefault(gram, set()).add(c["id"])
+            if c["gstin"]:
+                gstins.append((c["gstin"].strip().upper(), c["id"]))
+        self._gstins = sorted(gstins)
+        self._by_name = sorted(self.customers, key=lambda cid: self._names[cid])
+        # Part of every ETag: a digest of the indexed rows, so every worker
+        # holding the same customers answers with the same ETag.
+        digest = hashlib.sha1()
+        for cid in sorted(self.customers):
+            digest.update(repr(tuple(self.customers[cid].values())).encode())
+        self.version = digest.hexdigest()[:12]
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list[dict]:
+        """Return up to *limit* customer dicts matching *query*, best first."""
+        q = normalize(query)
+        if not q:
+            # Browse only on a blank query; punctuation alone matches nothing.
+            return [] if query.strip() else [self.customers[cid] for cid in self._by_name[:BROWSE_LIMIT]]
+
+        ranks: dict[int, int] = {}
+        for cid in self._name_candidates(q):
+            name = self._names[cid]
+            if name == q:
+                ranks[cid] = _EXACT
+            elif name.startswith(q):
+                ranks[cid] = _PREFIX
+            elif f" {q}" in f" {name}":
+                ranks[cid] = _WORD_PREFIX
+            elif q in name:
+                ranks[cid] = _INFIX
+
+        gstin_q = query.strip().upper()
+        if gstin_q.isalnum():
+            start = bisect.bisect_left(self._gstins, (gstin_q,))
+            for gstin, cid in self._gstins[start:]:
+                if not gstin.startswith(gstin_q):
+                    break
+                ranks[cid] = min(ranks.get(cid, _GSTIN_PREFIX), _GSTIN_PREFIX)
+
+        best = sorted(ranks, key=lambda cid: (ranks[cid], len(self._names[cid]), self._names[cid]))
+        return [self.customers[cid] for cid in best[:limit]]
+
+    def _name_candidates(self, q: str) -> Iterable[int]:
+        """Ids whose names contain every trigram of *q* (all ids for short queries)."""
+        grams = _trigrams(q)
+        if not grams:
+            return self._names
+        postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+        return set.intersection(*postings) if postings[0] else ()
+
+
+def _build() -> CustomerIndex:
+    rows = db.session.execute(
+        select(Customer.id, Customer.name, Customer.address, Customer.gstin, Customer.state)
+    )
+    index = CustomerIndex(dict(row._mapping) for row in rows)
+    logger.info("Customer search index built: %d customers.", len(index.customers))
+    return index
+
+
+_index = cache_service.Versioned("customers", _build)
+
+# Rebuild after any commit that inserted, changed or deleted customers —
+# forms, invoice save, Excel import and the merge command alike.
+cache_service.invalidate_on_commit(_index, Customer)
+
+
+def get_index() -> CustomerIndex:
+    """The current index, rebuilt first if customers changed since it was built."""
+    return _index.get()
+
+
+def search_customers(query: str, limit: int = DEFAULT_LIMIT) -> list[dict]:
+    """Ranked typeahead results for *query* (see module docstring)."""
+    return get_index().search(query, limit)
+
+
+def invalidate() -> None:
+    """Force every worker to rebuild its index on the next search."""
+    _index.invalidate()
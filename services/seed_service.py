@@ -0,0 +1,463 @@
+"""
+services.seed_service
+=====================
+Synthetic data for load testing (``flask seed-data``) and the route
+benchmarks.
+
+:func:`seed` fills an empty database with a realistic-looking data set:
+
+- customers, most of them in the company's own state (GSTIN prefix from
+  :mod:`services.company_service`) and the rest spread over other states,
+  so reports see both intra-state (CGST + SGST) and inter-state (IGST)
+  invoices; some have no GSTIN at all (B2C);
+- invoices spread evenly over ``years`` financial years up to today,
+  numbered per financial year in date order with occasional gaps;
+- one to ``2 × items − 1`` line items per invoice, drawn from a small
+  product catalogue with mixed GST rates (0 – 28 %);
+- recent quotations, about a third of them already converted to invoices.
+
+Everything is written with executemany ``INSERT``s and explicit primary
+keys — no ORM objects, no per-row round trip — in batches of ``_BATCH``
+invoices per transaction; invoices and items, the bulk of the volume, go
+to the driver as plain tuples.  Line items are copied from a pre-computed
+pool of priced templates instead of rolling every amount afresh.  A
+million item rows take about 20 s on SQLite.
+The invoice counters and GST rollup are set at the end, so the seeded data
+behaves exactly like data entered through the app.
+
+:func:`write_import_files` writes a matching upload file — ``.xlsx`` in
+the :func:`~services.excel_service.build_upload_template_workbook` layout
+and/or the same columns as CSV — numbered after the last seeded invoice,
+for load-testing the Excel import.
+"""
+from __future__ import annotations
+
+import csv
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+
+from models import (
+    Customer, GstMonthlyRollup, Invoice, InvoiceCounter, InvoiceItem,
+    Quotation, QuotationItem, db,
+)
+from services import company_service, dashboard_service, rollup_service, search_service
+from utils.helpers import customer_identity_key, customer_name_key, get_financial_year
+
+logger = logging.getLogger(__name__)
+
+_BATCH     = 5000      # invoices per INSERT batch / transaction
+_POOL_SIZE = 4096      # priced item templates per tax regime
+
+# Two-digit GST state codes for out-of-state customers
+_STATES = [
+    ("33", "Tamil Nadu"), ("32", "Kerala"), ("29", "Karnataka"), ("36", "Telangana"),
+    ("37", "Andhra Pradesh"), ("27", "Maharashtra"), ("24", "Gujarat"), ("07", "Delhi"),
+    ("09", "Uttar Pradesh"), ("19", "West Bengal"), ("34", "Puducherry"), ("08", "Rajasthan"),
+]
+
+# (description, unit, GST rate %, typical rate ₹)
+_CATALOGUE = [
+    ("Rice (25 kg bag)",          "BAG",   0.0,  1450),
+    ("Printed books",             "NOS",   0.0,   320),
+    ("Packaged tea",              "KG",    5.0,   480),
+    ("Cotton fabric",             "MTR",   5.0,   180),
+    ("LED tube light",            "NOS",  12.0,   260),
+    ("Mobile phone cover",        "NOS",  12.0,   150),
+    ("Steel rod 12 mm",           "KG",   18.0,    68),
+    ("PVC pipe 2 in",             "NOS",  18.0,   410),
+    ("Office chair",              "NOS",  18.0,  4200),
+    ("Laptop servicing",          "HRS",  18.0,   900),
+    ("Annual maintenance",        "NOS",  18.0, 12000),
+    ("Transport charges",         "TRIP", 12.0,  2500),
+    ("Cement (50 kg bag)",        "BAG",  28.0,   395),
+    ("Split air conditioner",     "NOS",  28.0, 36500),
+    ("Paint emulsion 20 L",       "NOS",  18.0,  5200),
+    ("Ceramic floor tiles",       "BOX",  18.0,   760),
+]
+
+_NAME_PARTS = (
+    ["Sri", "ABC", "Indus", "Zenith", "Trade", "Global", "Sakthi", "Lotus", "Vel", "Apex"],
+    ["Traders", "Enterprises", "Industries", "Agencies", "Pvt Ltd", "Associates", "& Co"],
+)
+
+
+@dataclass(frozen=True)
+class SeedPlan:
+    customers: int = 1000
+    invoices: int = 20_000
+    items: int = 3                  # average line items per invoice
+    quotations: int = 500
+    years: int = 3                  # financial years covered, ending with the current one
+    gap_rate: float = 0.002         # chance that a number is skipped before an invoice
+    intra_share: float = 0.6        # customers in the company's own state
+    b2c_share: float = 0.15         # customers without a GSTIN
+    seed: int = 7
+
+
+# ─── Building blocks ──────────────────────────────────────────────────────────
+
+def _home_state() -> tuple[str, str]:
+    """``(state code, state name)`` of the company; Puducherry if unset."""
+    company = company_service.get_company()
+    code    = company.gstin[:2] if company and company.gstin else "34"
+    name    = (company.state if company else "") or dict(_STATES).get(code, "")
+    return code, name
+
+
+def _gstin(rng: random.Random, code: str) -> str:
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    pan = "".join(rng.choices(letters, k=5)) + f"{rng.randrange(10000):04d}" + rng.choice(letters)
+    return f"{code}{pan}1Z{rng.choice(letters)}"
+
+
+def _item_pool(rng: random.Random, is_intra: bool) -> list[dict]:
+    """*_POOL_SIZE* priced line items, taxed the intra- or inter-state way."""
+    pool = []
+    for _ in range(_POOL_SIZE):
+        description, unit, gst_rate, typical = rng.choice(_CATALOGUE)
+        qty   = rng.choice((1, 1, 1, 2, 2, 3, 5, 10, 25, 50))
+        rate  = round(typical * rng.uniform(0.85, 1.2), 2)
+        basic = round(qty * rate, 2)
+        gst   = round(basic * gst_rate / 100, 2)
+        half  = round(gst / 2, 2)
+        pool.append({
+            "description" : description,
+            "qty"         : qty,
+            "rate"        : rate,
+            "unit"        : unit,
+            "gst_rate"    : gst_rate,
+            "basic_amount": basic,
+            "cgst_amount" : half if is_intra else 0.0,
+            "sgst_amount" : half if is_intra else 0.0,
+            "igst_amount" : 0.0 if is_intra else gst,
+            "gst_amount"  : half * 2 if is_intra else gst,
+            "total_amount": round(basic + (half * 2 if is_intra else gst), 2),
+        })
+    return pool
+
+
+_ITEM_COLUMNS = ("description", "qty", "rate", "unit", "gst_rate", "basic_amount",
+                 "cgst_amount", "sgst_amount", "igst_amount", "gst_amount", "total_amount")
+_TOTAL_COLUMNS = ("total_basic", "total_cgst", "total_sgst", "total_igst", "total_gst",
+                  "grand_total", "percentage_cgst", "percentage_sgst", "percentage_igst")
+_INVOICE_COLUMNS = ("id", "invoice_number", "invoice_number_int", "financial_year", "date",
+                    "customer_id", "place_of_supply", "is_intra_state", "updated_at",
+                    *_TOTAL_COLUMNS)
+
+
+def _totals(lines: list[dict], is_intra: bool) -> tuple:
+    """Header totals of *lines*, in :data:`_TOTAL_COLUMNS` order."""
+    basic = round(sum(it["basic_amount"] for it in lines), 2)
+    gst   = round(sum(it["gst_amount"] for it in lines), 2)
+    if is_intra:
+        half = round(gst / 2, 2)
+        return basic, half, half, 0.0, gst, round(basic + gst, 2), 9.0, 9.0, 0.0
+    return basic, 0.0, 0.0, gst, gst, round(basic + gst, 2), 0.0, 0.0, 18.0
+
+
+def _insert_rows(table, columns: tuple, rows: list[tuple]) -> None:
+    """executemany ``INSERT`` of positional *rows* straight through the driver.
+
+    Skips SQLAlchemy's per-row parameter processing, which costs more than
+    the insert itself at these volumes — so values must already be in
+    their stored form (ISO date strings, 0 / 1 booleans).
+    """
+    conn  = db.session.connection()
+    quote = conn.dialect.identifier_preparer
+    mark  = "?" if conn.dialect.paramstyle == "qmark" else "%s"
+    conn.exec_driver_sql(
+        f"INSERT INTO {quote.format_table(table)} "
+        f"({', '.join(quote.quote(c) for c in columns)}) "
+        f"VALUES ({', '.join([mark] * len(columns))})",
+        rows,
+    )
+
+
+def _is_empty() -> bool:
+    row = db.session.execute(
+        select(
+            select(Customer.id).limit(1).exists(),
+            select(Invoice.id).limit(1).exists(),
+            select(Quotation.id).limit(1).exists(),
+        )
+    ).one()
+    return not any(row)
+
+
+def reset() -> None:
+    """Delete every customer, invoice, quotation, counter and rollup row.
+
+    Company settings and background jobs are kept.  The caller commits.
+    """
+    for model in (InvoiceItem, Invoice, QuotationItem, Quotation, Customer,
+                  InvoiceCounter, GstMonthlyRollup):
+        db.session.execute(delete(model))
+
+
+# ─── Seeding ──────────────────────────────────────────────────────────────────
+
+def seed(plan: SeedPlan) -> dict:
+    """Bulk-insert the data set described by *plan* into an empty database.
+
+    Commits after every batch.
+
+    Returns:
+        ``{"customers", "invoices", "items", "quotations", "converted",
+        "gaps", "financial_years", "seconds"}``
+
+    Raises:
+        ValueError: The database already holds customers, invoices or
+                    quotations (call :func:`reset` first), or *plan* asks
+                    for invoices or quotations without customers.
+    """
+    if (plan.invoices or plan.quotations) and plan.customers < 1:
+        raise ValueError("Invoices and quotations need at least one customer.")
+    if not _is_empty():
+        raise ValueError("The database already has customers, invoices or quotations; "
+                         "reset it first.")
+
+    started  = time.perf_counter()
+    rng      = random.Random(plan.seed)
+    home     = _home_state()
+    now      = datetime.utcnow()
+    sqlite   = db.engine.dialect.name == "sqlite"
+    if sqlite:
+        db.session.execute(db.text("PRAGMA synchronous = OFF"))
+
+    # ── Customers ────────────────────────────────────────────────────────────
+    others = [s for s in _STATES if s[0] != home[0]]
+    intra  = [False] * (plan.customers + 1)           # indexed by customer id
+    place  = [None] * (plan.customers + 1)            # place of supply, ditto
+    rows   = []
+    for cust_id in range(1, plan.customers + 1):
+        code, state = home if rng.random() < plan.intra_share else rng.choice(others)
+        gstin = "" if rng.random() < plan.b2c_share else _gstin(rng, code)
+        name  = f"{rng.choice(_NAME_PARTS[0])} {cust_id:06d} {rng.choice(_NAME_PARTS[1])}"
+        intra[cust_id] = code == home[0] or not gstin
+        place[cust_id] = (state if gstin else home[1]) or None
+        rows.append({
+            "id"          : cust_id,
+            "name"        : name,
+            "address"     : f"{rng.randint(1, 300)}, Main Road, {state or home[1]}",
+            "gstin"       : gstin or None,
+            "state"       : place[cust_id],
+            "name_key"    : customer_name_key(name),
+            "identity_key": customer_identity_key(name, gstin),
+        })
+        if len(rows) == _BATCH:
+            db.session.execute(insert(Customer.__table__), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(Customer.__table__), rows)
+    db.session.commit()
+
+    # ── Invoices and items ───────────────────────────────────────────────────
+    pools     = {True: _item_pool(rng, True), False: _item_pool(rng, False)}
+    values    = {regime: [tuple(it[c] for c in _ITEM_COLUMNS) for it in pool]
+                 for regime, pool in pools.items()}
+    picks     = range(_POOL_SIZE)
+    stamp     = now.strftime("%Y-%m-%d %H:%M:%S.%f")
+    today     = date.today()
+    fy_start  = date(today.year if today.month >= 4 else today.year - 1, 4, 1)
+    first     = fy_start.replace(year=fy_start.year - max(plan.years, 1) + 1)
+    span      = (today - first).days + 1
+    max_lines = max(2 * plan.items - 1, 1)
+    counters: dict[str, int] = {}
+    gaps = item_id = 0
+    headers, lines = [], []
+    last_day = None
+
+    for n in range(1, plan.invoices + 1):
+        day = first + timedelta(days=(n - 1) * span // plan.invoices)
+        if day != last_day:
+            last_day, iso_day, fy = day, day.isoformat(), get_financial_year(day)
+        num = counters.get(fy, 0) + 1
+        if rng.random() < plan.gap_rate:
+            num  += rng.randint(1, 3)
+            gaps += 1
+        counters[fy] = num
+
+        cust_id  = rng.randint(1, plan.customers)
+        is_intra = intra[cust_id]
+        chosen   = rng.choices(picks, k=rng.randint(1, max_lines))
+        pool     = pools[is_intra]
+        headers.append((
+            n, f"{fy}/{num:03d}", num, fy, iso_day, cust_id, place[cust_id], int(is_intra),
+            stamp, *_totals([pool[i] for i in chosen], is_intra),
+        ))
+        for i in chosen:
+            item_id += 1
+            lines.append((item_id, n, *values[is_intra][i]))
+        if len(headers) == _BATCH or n == plan.invoices:
+            _insert_rows(Invoice.__table__, _INVOICE_COLUMNS, headers)
+            _insert_rows(InvoiceItem.__table__, ("id", "invoice_id", *_ITEM_COLUMNS), lines)
+            db.session.commit()
+            headers, lines = [], []
+            logger.info("Seeded %d / %d invoices.", n, plan.invoices)
+
+    if counters:
+        db.session.execute(insert(InvoiceCounter.__table__), [
+            {"financial_year": fy, "last_number": last} for fy, last in counters.items()
+        ])
+
+    # ── Quotations (recent; about a third already invoiced) ──────────────────
+    q_headers, q_lines, links = [], [], []
+    recent = [i for i in range(max(1, plan.invoices - 90 * plan.invoices // span),
+                               plan.invoices + 1)] if plan.invoices else []
+    linked = iter(rng.sample(recent, min(len(recent), plan.quotations // 3)))
+    for n in range(1, plan.quotations + 1):
+        cust_id  = rng.randint(1, plan.customers)
+        is_intra = intra[cust_id]
+        its      = rng.choices(pools[is_intra], k=rng.randint(1, max_lines))
+        totals   = dict(zip(_TOTAL_COLUMNS, _totals(its, is_intra)))
+        q_headers.append({
+            "id"              : n,
+            "quotation_number": f"QT-S{n:07d}",
+            "date"            : today - timedelta(days=rng.randrange(90)),
+            "customer_id"     : cust_id,
+            "place_of_supply" : place[cust_id],
+            "updated_at"      : now,
+            **{k: totals[k] for k in ("total_basic", "total_gst", "grand_total", "total_igst",
+                                      "percentage_cgst", "percentage_sgst", "percentage_igst")},
+        })
+        q_lines.extend({
+            "quotation_id": n,
+            **{k: it[k] for k in ("description", "qty", "rate", "unit", "gst_rate",
+                                  "basic_amount", "gst_amount", "total_amount")},
+        } for it in its)
+        if n % 3 == 0:
+            invoice_id = next(linked, None)
+            if invoice_id is not None:
+                links.append({"b_id": invoice_id, "b_quotation": n})
+    if q_headers:
+        db.session.execute(insert(Quotation.__table__), q_headers)
+        db.session.execute(insert(QuotationItem.__table__), q_lines)
+    if links:
+        table = Invoice.__table__
+        db.session.execute(
+            update(table).where(table.c.id == bindparam("b_id"))
+            .values(quotation_id=bindparam("b_quotation")),
+            links,
+        )
+
+    rollup_service.rebuild()
+    db.session.commit()
+    if sqlite:
+        db.session.execute(db.text("PRAGMA synchronous = FULL"))
+        db.session.execute(db.text("ANALYZE"))
+        db.session.commit()
+
+    # Core inserts bypass the ORM hooks that normally drop these caches
+    search_service.invalidate()
+    dashboard_service.invalidate()
+
+    stats = {
+        "customers"      : plan.customers,
+        "invoices"       : plan.invoices,
+        "items"          : item_id,
+        "quotations"     : plan.quotations,
+        "converted"      : len(links),
+        "gaps"           : gaps,
+        "financial_years": sorted(counters),
+        "seconds"        : round(time.perf_counter() - started, 1),
+    }
+    logger.info("Seeded %d customers, %d invoices (%d items), %d quotations in %.1fs.",
+                plan.customers, plan.invoices, item_id, plan.quotations, stats["seconds"])
+    return stats
+
+
+# ─── Import files ─────────────────────────────────────────────────────────────
+
+def write_import_files(
+    invoices: int,
+    items: int = 3,
+    xlsx_path: Optional[str] = None,
+    csv_path: Optional[str] = None,
+    seed_value: int = 11,
+) -> dict:
+    """Write an invoice upload file of *invoices* new invoices.
+
+    Rows follow :data:`~services.excel_service.UPLOAD_TEMPLATE_HEADERS`.
+    Invoices are dated across the current financial year up to today and
+    numbered after its last allocated number, so importing the file
+    creates them rather than updating seeded ones.  Customers are taken
+    from the database (new ones are invented if it has none); the
+    ``.xlsx`` is written with openpyxl's streaming write-only mode.
+
+    Returns:
+        ``{"invoices", "rows", "first_number", "last_number"}``
+    """
+    from services.excel_service import UPLOAD_TEMPLATE_HEADERS, _require_openpyxl
+
+    if not (xlsx_path or csv_path):
+        raise ValueError("Give an .xlsx and/or a .csv path.")
+
+    rng   = random.Random(seed_value)
+    today = date.today()
+    fy    = get_financial_year(today)
+    start = date(today.year if today.month >= 4 else today.year - 1, 4, 1)
+    last  = db.session.execute(
+        select(func.max(InvoiceCounter.last_number)).where(InvoiceCounter.financial_year == fy)
+    ).scalar() or 0
+    last  = max(last, db.session.execute(
+        select(func.max(Invoice.invoice_number_int)).where(Invoice.financial_year == fy)
+    ).scalar() or 0)
+
+    home      = _home_state()
+    customers = [
+        (row.name, row.gstin or "", row.state or home[1])
+        for row in db.session.execute(
+            select(Customer.name, Customer.gstin, Customer.state).order_by(Customer.id).limit(5000)
+        )
+    ] or [
+        (f"Load Test Buyer {i:04d} Traders", _gstin(rng, code), state)
+        for i, (code, state) in enumerate(rng.choices([home] + _STATES, k=200), 1)
+    ]
+
+    sheet = writer = None
+    files = []
+    if xlsx_path:
+        wb    = _require_openpyxl().Workbook(write_only=True)
+        sheet = wb.create_sheet("Invoice Template")
+        sheet.append(UPLOAD_TEMPLATE_HEADERS)
+    if csv_path:
+        fh     = open(csv_path, "w", newline="", encoding="utf-8")
+        files.append(fh)
+        writer = csv.writer(fh)
+        writer.writerow(UPLOAD_TEMPLATE_HEADERS)
+
+    rows = 0
+    span = (today - start).days + 1
+    try:
+        for n in range(invoices):
+            number = last + n + 1
+            day    = (start + timedelta(days=n * span // max(invoices, 1))).isoformat()
+            name, gstin, state = rng.choice(customers)
+            for _ in range(rng.randint(1, max(2 * items - 1, 1))):
+                description, unit, gst_rate, typical = rng.choice(_CATALOGUE)
+                row = [number, day, name, gstin, state, state, description,
+                       rng.choice((1, 2, 3, 5, 10)), round(typical * rng.uniform(0.85, 1.2), 2),
+                       unit, gst_rate]
+                if sheet is not None:
+                    sheet.append(row)
+                if writer is not None:
+                    writer.writerow(row)
+                rows += 1
+        if xlsx_path:
+            wb.save(xlsx_path)
+    finally:
+        for fh in files:
+            fh.close()
+
+    return {
+        "invoices"    : invoices,
+        "rows"        : rows,
+        "first_number": last + 1 if invoices else None,
+        "last_number" : last + invoices if invoices else None,
+    }
@@ -0,0 +1,220 @@
+"""
+services.sql_profiler
+=====================
+Opt-in SQL accounting per request and per background job
+(``PERF_PROFILE=1``).
+
+:func:`install` hooks the engine's cursor events.  Every unit of work
+between :func:`begin` and :func:`end` — each HTTP request (hooks in
+:mod:`routes.debug`) and each job (:func:`profile` in
+:mod:`services.job_service`) — then records:
+
+- statement count, total DB time and wall time, also summed per endpoint;
+- its slowest statements and its most repeated one (an N+1 lazy load
+  shows up as the same ``SELECT`` run dozens of times);
+- a warning log line for each statement slower than ``PERF_SLOW_SQL_MS``,
+  naming the endpoint it ran under.
+
+The last ``PERF_HISTORY`` units are kept in a ring; :func:`report` returns
+the worst of them and the per-endpoint totals.  All figures are per
+process (each gunicorn worker has its own).  Statements outside a unit —
+start-up, CLI commands — still reach the slow log.  Disabled, nothing is
+registered and nothing is measured.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_KEEP_SLOWEST = 3       # statements kept per unit
+_SQL_PREVIEW  = 300     # characters of SQL shown in logs and reports
+
+
+@dataclass
+class Profile:
+    endpoint: str                     # Flask endpoint or "job:<kind>"
+    label: str                        # "GET /invoices?…", job id, …
+    started_at: float = field(default_factory=time.time)
+    statements: int = 0
+    db_ms: float = 0.0
+    wall_ms: float = 0.0
+    status: Optional[int] = None
+    slowest: list = field(default_factory=list)           # [(ms, sql)], slowest first
+    repeats: Counter = field(default_factory=Counter)     # sql → executions
+    _start: float = field(default_factory=time.perf_counter, repr=False)
+
+    def _observe(self, statement: str, ms: float) -> None:
+        self.statements += 1
+        self.db_ms      += ms
+        self.repeats[statement] += 1
+        if len(self.slowest) < _KEEP_SLOWEST or ms > self.slowest[-1][0]:
+            self.slowest = sorted(self.slowest + [(ms, statement)], reverse=True)[:_KEEP_SLOWEST]
+
+    def to_dict(self) -> dict:
+        repeated = self.repeats.most_common(1)
+        return {
+            "endpoint"  : self.endpoint,
+            "label"     : self.label,
+            "status"    : self.status,
+            "at"        : time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+            "statements": self.statements,
+            "db_ms"     : round(self.db_ms, 1),
+            "wall_ms"   : round(self.wall_ms, 1),
+            "slowest"   : [{"ms": round(ms, 1), "sql": _preview(sql)} for ms, sql in self.slowest],
+            "most_repeated": (
+                {"count": repeated[0][1], "sql": _preview(repeated[0][0])} if repeated else None
+            ),
+        }
+
+
+_current: ContextVar[Optional[Profile]] = ContextVar("sql_profile", default=None)
+
+_lock      = threading.Lock()
+_history: deque = deque(maxlen=max(1, Config.PERF_HISTORY))
+_endpoints: dict[str, dict] = {}
+_since     = time.time()
+
+
+def _preview(statement: str) -> str:
+    sql = " ".join(statement.split())
+    return sql if len(sql) <= _SQL_PREVIEW else sql[:_SQL_PREVIEW] + "…"
+
+
+# ─── Engine events ────────────────────────────────────────────────────────────
+
+def install(engine: Engine) -> None:
+    """Time every statement *engine* executes (idempotent)."""
+    if event.contains(engine, "before_cursor_execute", _before_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "after_cursor_execute", _after_execute)
+    event.listen(engine, "handle_error", _on_error)
+    logger.info("SQL profiler installed (slow statements ≥ %.0f ms are logged).",
+                Config.PERF_SLOW_SQL_MS)
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("perf_started", []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    ms      = (time.perf_counter() - conn.info["perf_started"].pop()) * 1000
+    profile = _current.get()
+    if profile is not None:
+        profile._observe(statement, ms)
+    if ms >= Config.PERF_SLOW_SQL_MS:
+        logger.warning(
+            "Slow SQL %.0f ms under %s%s: %s", ms,
+            profile.endpoint if profile else "(no request)",
+            f" [{profile.label}]" if profile else "",
+            _preview(statement),
+        )
+
+
+def _on_error(exception_context) -> None:
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("perf_started"):
+        conn.info["perf_started"].pop()       # after_cursor_execute will not run
+
+
+# ─── Units of work ────────────────────────────────────────────────────────────
+
+def begin(endpoint: str, label: str) -> Token:
+    """Start profiling the current request / job; pass the token to :func:`end`."""
+    return _current.set(Profile(endpoint, label))
+
+
+def end(token: Token, status: Optional[int] = None) -> Optional[Profile]:
+    """Finish the unit started by *token*, record it and return its profile."""
+    profile = _current.get()
+    _current.reset(token)
+    if profile is None:
+        return None
+    profile.wall_ms = (time.perf_counter() - profile._start) * 1000
+    profile.status  = status
+    _record(profile)
+    return profile
+
+
+@contextmanager
+def profile(endpoint: str, label: str = "") -> Iterator[Profile]:
+    """``with profile("job:import", job_id):`` — begin / end around a block."""
+    token = begin(endpoint, label)
+    status = None
+    try:
+        yield _current.get()
+        status = 200
+    except BaseException:
+        status = 500
+        raise
+    finally:
+        finished = end(token, status)
+        logger.info("%s %s: %d statements, %.0f ms DB, %.0f ms wall.", endpoint, label,
+                    finished.statements, finished.db_ms, finished.wall_ms)
+
+
+def _record(profile: Profile) -> None:
+    with _lock:
+        _history.append(profile)
+        totals = _endpoints.setdefault(profile.endpoint, {
+            "requests": 0, "statements": 0, "db_ms": 0.0, "wall_ms": 0.0, "max_wall_ms": 0.0,
+        })
+        totals["requests"]    += 1
+        totals["statements"]  += profile.statements
+        totals["db_ms"]       += profile.db_ms
+        totals["wall_ms"]     += profile.wall_ms
+        totals["max_wall_ms"]  = max(totals["max_wall_ms"], profile.wall_ms)
+
+
+# ─── Reporting ────────────────────────────────────────────────────────────────
+
+def report(limit: int = 20) -> dict:
+    """The *limit* slowest recent units and per-endpoint averages, this process only."""
+    with _lock:
+        recent    = list(_history)
+        endpoints = {name: dict(t) for name, t in _endpoints.items()}
+
+    per_endpoint = []
+    for name, t in endpoints.items():
+        n = t["requests"]
+        per_endpoint.append({
+            "endpoint"       : name,
+            "requests"       : n,
+            "avg_statements" : round(t["statements"] / n, 1),
+            "avg_db_ms"      : round(t["db_ms"] / n, 1),
+            "avg_wall_ms"    : round(t["wall_ms"] / n, 1),
+            "max_wall_ms"    : round(t["max_wall_ms"], 1),
+        })
+    per_endpoint.sort(key=lambda e: e["avg_wall_ms"] * e["requests"], reverse=True)
+
+    return {
+        "pid"        : os.getpid(),
+        "since"      : time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(_since)),
+        "slow_sql_ms": Config.PERF_SLOW_SQL_MS,
+        "recent"     : len(recent),
+        "worst"      : [p.to_dict() for p in sorted(recent, key=lambda p: p.wall_ms, reverse=True)[:limit]],
+        "endpoints"  : per_endpoint,
+    }
+
+
+def reset() -> None:
+    """Forget the history and per-endpoint totals."""
+    global _since
+    with _lock:
+        _history.clear()
+        _endpoints.clear()
+        _since = time.time()
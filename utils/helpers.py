@@ -8,6 +8,8 @@ including tests, CLI scripts, and background jobs.
 """
 from __future__ import annotations
 
+import re
+import unicodedata
 from datetime import date, datetime
 from typing import Union
 
@@ -100,6 +102,61 @@ def get_financial_year(d: date) -> str:
     return f"{str(y - 1)[-2:]}-{str(y)[-2:]}"
 
 
+# ─── Customer identity ────────────────────────────────────────────────────────
+
+# Letters, digits and combining marks of any script survive in a name key —
+# Tamil vowel signs (ா, ி, ்) are marks, not letters, and carry meaning.
+_KEY_KEEP = ("L", "N", "M")
+
+# Spellings folded together so "ABC Private Limited" == "M/s. A.B.C Pvt Ltd"
+_KEY_WORDS = {"private": "pvt", "limited": "ltd", "and": "&", "company": "co"}
+
+
+def customer_name_key(name: str) -> str:
+    """Return the canonical form of a customer name used for matching.
+
+    NFKC-normalises and case-folds, drops punctuation, collapses
+    whitespace, folds common company-suffix spellings and removes a
+    leading "M/s".  Letters and digits of every script are kept, so names
+    in Tamil or any other script get distinct keys.  A name with nothing
+    left after that (only punctuation) keys on its trimmed, case-folded
+    self — the key is never ``''`` for a non-blank name.
+
+    Examples:
+        >>> customer_name_key("  M/s. ABC Private  Limited ")
+        'abc pvt ltd'
+        >>> customer_name_key("A.B.C. Pvt. Ltd.")
+        'abc pvt ltd'
+        >>> customer_name_key("முருகன் ஸ்டோர்ஸ்")
+        'முருகன் ஸ்டோர்ஸ்'
+    """
+    raw   = unicodedata.normalize("NFKC", name or "").casefold()
+    text  = raw.replace("&", " and ")
+    text  = re.sub(r"(?<=\b[a-z])\.(?=[a-z]\b)", "", text)    # a.b.c → abc
+    text  = "".join(c if unicodedata.category(c)[0] in _KEY_KEEP else " " for c in text)
+    words = [_KEY_WORDS.get(w, w) for w in text.split()]
+    if words[:2] == ["m", "s"]:
+        words = words[2:]
+    return " ".join(words) or " ".join(raw.split())
+
+
+def normalize_gstin(gstin: str) -> str:
+    """Upper-case *gstin* and strip spaces; ``''`` when blank."""
+    return re.sub(r"\s+", "", gstin or "").upper()
+
+
+def customer_identity_key(name: str, gstin: str = "") -> str:
+    """``'<name key>|<GSTIN>'`` — the unique identity of a customer.
+
+    Examples:
+        >>> customer_identity_key("ABC Pvt Ltd", "33abcde1234f1z5")
+        'abc pvt ltd|33ABCDE1234F1Z5'
+        >>> customer_identity_key("ABC Pvt Ltd")
+        'abc pvt ltd|'
+    """
+    return f"{customer_name_key(name)}|{normalize_gstin(gstin)}"
+
+
 # ─── Date Parsing ──────────────────────────────────────────────────────────────
 
 _DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%m/%d/%Y", "%d.%m.%Y")